@@ -0,0 +1,99 @@
+"""Daily citation aggregate for the dashboard
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-06-01 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "002"
+down_revision = "001"
+branch_labels = None
+depends_on = None
+
+
+def _has_timescaledb() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    return bool(
+        bind.execute(
+            sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+        ).scalar()
+    )
+
+
+def _citations_is_hypertable() -> bool:
+    # 001's create_hypertable fails when the primary key lacks detected_at,
+    # leaving citations a plain table even with the extension installed
+    if not _has_timescaledb():
+        return False
+    return bool(
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT 1 FROM timescaledb_information.hypertables "
+                "WHERE hypertable_schema = current_schema() "
+                "AND hypertable_name = 'citations'"
+            )
+        )
+        .scalar()
+    )
+
+
+def upgrade() -> None:
+    # Citations of a URL over a time window (dedupe and scoped dashboards)
+    op.create_index(
+        "idx_citations_url_detected_at", "citations", ["url", "detected_at"]
+    )
+    op.create_index("idx_audits_user_id_url", "audits", ["user_id", "url"])
+
+    # Checked up front: a failed statement would abort the migration transaction
+    if not _citations_is_hypertable():
+        return
+
+    # Created empty, as a continuous aggregate cannot be filled in a
+    # transaction; the refresh policy fills it in the background
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS citations_daily
+        WITH (timescaledb.continuous) AS
+        SELECT time_bucket(INTERVAL '1 day', detected_at) AS day,
+               url,
+               engine,
+               count(*) AS citations
+        FROM citations
+        GROUP BY day, url, engine
+        WITH NO DATA
+        """
+    )
+    # Recent days are combined with raw rows on read (real-time aggregation)
+    op.execute(
+        "ALTER MATERIALIZED VIEW citations_daily "
+        "SET (timescaledb.materialized_only = false)"
+    )
+    op.execute(
+        """
+        SELECT add_continuous_aggregate_policy(
+            'citations_daily',
+            start_offset => INTERVAL '400 days',
+            end_offset => INTERVAL '1 hour',
+            schedule_interval => INTERVAL '15 minutes',
+            if_not_exists => TRUE
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_citations_daily_url ON citations_daily (url, day)"
+    )
+
+
+def downgrade() -> None:
+    if _has_timescaledb():
+        op.execute("DROP MATERIALIZED VIEW IF EXISTS citations_daily")
+    op.drop_index("idx_audits_user_id_url", table_name="audits")
+    op.drop_index("idx_citations_url_detected_at", table_name="citations")
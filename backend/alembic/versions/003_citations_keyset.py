@@ -0,0 +1,24 @@
+"""Keyset pagination index on citations
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-06-08 00:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "003"
+down_revision = "002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Citation listing order and page cursors: (detected_at, id) descending
+    op.create_index("idx_citations_detected_at_id", "citations", ["detected_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_citations_detected_at_id", table_name="citations")
@@ -0,0 +1,31 @@
+"""Citation dedupe keys per URL, engine, prompt and dedupe window
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-06-15 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A plain table: a unique index on the citations hypertable would have
+    # to include detected_at, so it could not dedupe within a window.
+    # Conflict target of the dedupe claims (ON CONFLICT DO NOTHING).
+    op.create_table(
+        "citation_dedupe_keys",
+        sa.Column("dedupe_bucket", sa.BigInteger(), primary_key=True),
+        sa.Column("key_hash", sa.String(64), primary_key=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("citation_dedupe_keys")
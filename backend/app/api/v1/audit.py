@@ -1,13 +1,25 @@
 """Audit API endpoints."""
 
+import asyncio
+import json
+import uuid
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from pydantic import BaseModel
 
-from ...core.database import get_db
+from ...core.config import settings
+from ...core.database import get_async_db
+from ...core.redis_pool import get_redis
+from ...core.security import api_key_user_id
 from ...core.security import verify_api_key_simple as verify_api_key
+from ...core.validation import validate_url
+from ...models.api_key import APIKey
 from ...services.audit_service import AuditService
+from ...services.bulk_audit import BulkAuditJob
+from ...tasks.audit_tasks import bulk_audit_site
 
 
 router = APIRouter()
@@ -20,13 +32,37 @@ class AuditRequest(BaseModel):
     url: Optional[str] = None
     content: Optional[str] = None
     format: str = "markdown"
+    # Re-process only the sections of an edited document that changed
+    incremental: bool = False
+
+
+class BatchAuditItem(AuditRequest):
+    """One document of a batch audit."""
+
+    # Echoed back on the result line, to match results to documents
+    id: Optional[str] = None
+
+
+class BatchAuditRequest(BaseModel):
+    """Batch audit request model."""
+
+    items: List[BatchAuditItem]
+
+
+class BulkAuditRequest(BaseModel):
+    """Bulk audit request model."""
+
+    urls: Optional[List[str]] = None
+    sitemap_url: Optional[str] = None
+    # Resume an earlier job, skipping the pages it already saved
+    job_id: Optional[str] = None
 
 
 @router.post("/aieo/audit")
 async def audit_content(
     request: AuditRequest,
     api_key: str = Depends(verify_api_key),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Audit content for AIEO score.
@@ -39,14 +75,20 @@ async def audit_content(
             detail="Either url or content must be provided",
         )
 
+    # Saved audits scope the key owner's citation dashboard
+    user_id = await api_key_user_id(db, api_key)
     try:
         result = await audit_service.audit(
             url=request.url,
             content=request.content,
             format=request.format,
-            db=db,
+            user_id=user_id,
+            incremental=request.incremental,
         )
         return result
+    except HTTPException:
+        # Service errors (e.g. 503 when scoring is saturated) pass through
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -57,3 +99,112 @@ async def audit_content(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal error: {str(e)}",
         )
+
+
+@router.post("/aieo/audit/batch")
+async def audit_batch(
+    request: BatchAuditRequest,
+    api_key: str = Depends(verify_api_key),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Audit several documents, streaming the results as NDJSON.
+
+    Each line holds one result as soon as it is ready, with the index of
+    its item (and its id, when given); results do not arrive in request
+    order. A failed item gets a line with an error instead of a score.
+    """
+    if not request.items or len(request.items) > settings.BATCH_AUDIT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {settings.BATCH_AUDIT_MAX_ITEMS} items per batch",
+        )
+
+    user_id = await api_key_user_id(db, api_key)
+
+    async def lines():
+        items = [item.model_dump() for item in request.items]
+        async for result in audit_service.audit_batch(items, user_id=user_id):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/aieo/audit/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def start_bulk_audit(
+    request: BulkAuditRequest,
+    api_key: str = Depends(verify_api_key),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Queue a bulk audit of a site.
+
+    Either urls or sitemap_url must be provided. Results are saved to the
+    audits table; poll GET /aieo/audit/bulk/{job_id} for progress.
+    """
+    if bool(request.urls) == bool(request.sitemap_url):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Exactly one of urls or sitemap_url must be provided",
+        )
+    if request.urls and len(request.urls) > settings.BULK_MAX_URLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_MAX_URLS} URLs per job",
+        )
+
+    try:
+        for url in request.urls or [request.sitemap_url or ""]:
+            validate_url(url)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+
+    user_id = await api_key_user_id(db, api_key)
+    job_id = request.job_id or str(uuid.uuid4())
+    # Another caller's job can be neither resumed nor taken over
+    if not await BulkAuditJob(job_id, get_redis()).claim(
+        bulk_job_owner(user_id, api_key)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bulk audit job not found: {job_id}",
+        )
+    # Publishing to the broker is blocking I/O
+    await asyncio.to_thread(
+        bulk_audit_site.apply_async,
+        kwargs={
+            "job_id": job_id,
+            "urls": request.urls,
+            "sitemap_url": request.sitemap_url,
+            "user_id": user_id,
+        },
+        task_id=job_id,
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/aieo/audit/bulk/{job_id}")
+async def get_bulk_audit_progress(
+    job_id: str,
+    api_key: str = Depends(verify_api_key),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Progress of a bulk audit queued with the same API key's account."""
+    job = BulkAuditJob(job_id, get_redis())
+    owner = bulk_job_owner(await api_key_user_id(db, api_key), api_key)
+    if not await job.owned_by(owner):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bulk audit job not found: {job_id}",
+        )
+    return await job.progress()
+
+
+def bulk_job_owner(user_id: Optional[str], api_key: str) -> str:
+    """Owner recorded with a bulk job: the key's user, or the key itself."""
+    if user_id:
+        return f"user:{user_id}"
+    return f"key:{APIKey.hash_key(api_key)}"
@@ -1,11 +1,12 @@
 """Citations API endpoints."""
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from ...core.database import get_db
-from ...core.security import verify_api_key
+from ...core.database import get_async_db
+from ...core.errors import InvalidRequestError
+from ...core.security import api_key_user_id, verify_api_key
 from ...services.citation_tracker import CitationTracker
 
 
@@ -20,22 +21,20 @@ async def get_citations(
     engine: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=100),
     cursor: Optional[str] = Query(None),
+    include_count: bool = Query(False),
     api_key: str = Depends(verify_api_key),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    List citations for URL/domain.
+    List citations for URL/domain, newest first, one page at a time.
     """
-    citations = citation_tracker.get_citations(
-        db=db,
-        url=url,
-        domain=domain,
-        engine=engine,
-        days=30,
-    )
-
-    # Apply limit
-    citations = citations[:limit]
+    filters = {"url": url, "domain": domain, "engine": engine, "days": 30}
+    try:
+        citations, next_cursor = await citation_tracker.get_citations_page(
+            db=db, limit=limit, cursor=cursor, **filters
+        )
+    except ValueError as e:
+        raise InvalidRequestError(str(e))
 
     # Convert to dict format
     data = [
@@ -56,19 +55,27 @@ async def get_citations(
     return {
         "data": data,
         "pagination": {
-            "next_cursor": None,  # Cursor pagination - to be implemented in v1.1
-            "has_more": len(citations) >= limit,
-            "total_count": len(citations),
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+            # Counting scans every match, so it is only done on request
+            "total_count": (
+                await citation_tracker.count_citations(db=db, **filters)
+                if include_count
+                else None
+            ),
         },
     }
 
 
 @router.get("/aieo/dashboard")
 async def get_dashboard(
+    days: int = Query(30, ge=1, le=365),
     api_key: str = Depends(verify_api_key),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Get share-of-voice metrics.
+    Get share-of-voice metrics for the pages audited by the key's owner.
     """
-    return citation_tracker.get_dashboard_data(db=db)
+    return await citation_tracker.get_dashboard_data(
+        db=db, user_id=await api_key_user_id(db, api_key), days=days
+    )
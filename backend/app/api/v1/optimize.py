@@ -45,6 +45,9 @@ async def optimize_content(
             style=request.style,
         )
         return result
+    except HTTPException:
+        # Service errors (e.g. 503 when scoring is saturated) pass through
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
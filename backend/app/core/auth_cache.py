@@ -0,0 +1,194 @@
+"""In-process cache of verified API keys, and batched usage tracking."""
+
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import bindparam, update
+
+from .cache import LocalCache
+from .config import settings
+from .database import AsyncSessionLocal
+from .redis_pool import get_redis
+from ..models.api_key import APIKey
+
+logger = logging.getLogger("aieo")
+
+# Pub/sub channel revoked key hashes are announced on
+REVOCATION_CHANNEL = "auth:revoked"
+
+
+class VerifiedKey(NamedTuple):
+    """What authentication needs to know about an active API key."""
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    expires_at: Optional[datetime]
+
+
+class APIKeyCache:
+    """
+    Short-lived LRU of verified API keys, by key hash.
+
+    Only active keys are cached, for at most ttl seconds, so a key disabled
+    in the database stops working within ttl everywhere. revoke() drops a
+    key at once: locally, and in every process listening for revocations
+    on Redis.
+    """
+
+    def __init__(self, max_items: Optional[int] = None, ttl: Optional[int] = None):
+        max_items = max_items or settings.API_KEY_CACHE_MAX_ITEMS
+        self.keys = LocalCache(
+            max_items=max_items,
+            max_bytes=max_items,
+            ttl=ttl or settings.API_KEY_CACHE_TTL,
+        )
+        self._listener: Optional[asyncio.Task] = None
+
+    def get(self, key_hash: str) -> Optional[VerifiedKey]:
+        """Cached key, or None if not verified recently."""
+        return self.keys.get(key_hash)
+
+    def set(self, key_hash: str, key: VerifiedKey):
+        """Cache a key just verified against the database."""
+        self.keys.set(key_hash, key, 1)
+
+    async def revoke(self, key_hash: str):
+        """Drop a key from this process and announce it to the others."""
+        self.keys.delete(key_hash)
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+        try:
+            await redis_client.publish(REVOCATION_CHANNEL, key_hash)
+        except Exception as e:
+            logger.warning(f"Failed to announce API key revocation: {e}")
+
+    def start(self):
+        """Listen for revocations from other processes (on startup)."""
+        if self._listener is None and get_redis() is not None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop listening (on shutdown)."""
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            listener.cancel()
+            try:
+                await listener
+            except asyncio.CancelledError:
+                pass
+
+    async def _listen(self):
+        while True:
+            redis_client = get_redis()
+            if redis_client is None:
+                return
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                async for message in pubsub.listen():
+                    self.keys.delete(message["data"].decode("utf-8"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries still expire after the TTL while disconnected
+                logger.warning(f"API key revocation listener failed: {e}")
+                await asyncio.sleep(settings.API_KEY_CACHE_TTL)
+            finally:
+                await pubsub.aclose()
+
+
+class UsageCounter:
+    """
+    Count API key usage in process and write it to the database in batches.
+
+    Instead of an UPDATE and a commit per request, counts and last use are
+    added to api_keys by a background task once per flush interval, in one
+    executemany over the keys used since; requests never wait for it.
+    """
+
+    def __init__(self, flush_interval: Optional[int] = None, session_factory=None):
+        self.flush_interval = (
+            settings.API_KEY_USAGE_FLUSH_INTERVAL
+            if flush_interval is None
+            else flush_interval
+        )
+        self.session_factory = session_factory or AsyncSessionLocal
+        self._counts: Counter = Counter()
+        self._last_used: Dict[uuid.UUID, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def record(self, key_id: uuid.UUID):
+        """Count a request made with a key."""
+        self._counts[key_id] += 1
+        self._last_used[key_id] = datetime.utcnow()
+
+    def start(self):
+        """Flush every flush interval in the background (on startup)."""
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write the pending counts and stop flushing (on shutdown)."""
+        if self._task is None:
+            await self.flush()
+            return
+        self._stopping.set()
+        try:
+            await self._task
+        finally:
+            self._task = self._stopping = None
+
+    async def _run(self):
+        # Not cancelled on stop, so a write in progress is never cut short
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        """Add the pending counts to the database."""
+        if not self._counts:
+            return
+        rows = [
+            {"key_id": key_id, "uses": count, "used_at": self._last_used[key_id]}
+            for key_id, count in self._counts.items()
+        ]
+        counts, last_used = self._counts, self._last_used
+        self._counts, self._last_used = Counter(), {}
+        try:
+            await self._write(rows)
+        except Exception as e:
+            # Kept for the next flush, with the uses counted meanwhile
+            logger.warning(f"Failed to record API key usage, will retry: {e}")
+            counts.update(self._counts)
+            for key_id, used_at in self._last_used.items():
+                last_used[key_id] = max(last_used.get(key_id, used_at), used_at)
+            self._counts, self._last_used = counts, last_used
+
+    async def _write(self, rows):
+        table = APIKey.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("key_id"))
+            .values(
+                usage_count=table.c.usage_count + bindparam("uses"),
+                last_used_at=bindparam("used_at"),
+            )
+        )
+        async with self.session_factory() as db:
+            await db.execute(statement, rows)
+            await db.commit()
+
+
+# Shared by every request of the process
+api_key_cache = APIKeyCache()
+usage_counter = UsageCounter()
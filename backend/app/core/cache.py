@@ -0,0 +1,283 @@
+"""Two-tier result cache: in-process LRU in front of Redis."""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from .redis_pool import get_redis
+
+logger = logging.getLogger("aieo")
+
+# Caches by name, for reporting their counters
+CACHES: Dict[str, "TwoTierCache"] = {}
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+
+    Least recently used entries are evicted when either the entry count or
+    the total size of the entries (their serialized length) exceeds its
+    limit.
+    """
+
+    def __init__(self, max_items: int, max_bytes: int, ttl: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_bytes = 0
+        self.evictions = 0
+        # key -> (expires_at, size, value)
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int):
+        """Store a value of the given size, evicting old entries as needed."""
+        self.delete(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.size_bytes += size
+        while len(self._entries) > self.max_items or self.size_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+
+    def delete(self, key: str):
+        """Remove a value if present."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+    def clear(self):
+        """Remove all values."""
+        self._entries.clear()
+        self.size_bytes = 0
+
+
+class TwoTierCache:
+    """
+    Cache JSON-serializable results in process memory and in Redis.
+
+    Reads try the in-process tier first, then Redis (filling the local tier
+    on a hit). get_or_compute() coalesces concurrent misses for the same key
+    into a single computation. Either tier can be disabled. Cached values are
+    shared between callers and must not be modified.
+
+    Redis is accessed through the shared asyncio pool unless a client is
+    given.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        redis_client=None,
+        ttl: Optional[int] = None,
+        local_enabled: Optional[bool] = None,
+        redis_enabled: Optional[bool] = None,
+        local_max_items: Optional[int] = None,
+        local_max_bytes: Optional[int] = None,
+        local_ttl: Optional[int] = None,
+    ):
+        self.name = name
+        self.ttl = ttl or settings.REDIS_CACHE_TTL
+        if local_enabled is None:
+            local_enabled = settings.CACHE_LOCAL_ENABLED
+        if redis_enabled is None:
+            redis_enabled = settings.CACHE_REDIS_ENABLED
+
+        self.local = None
+        if local_enabled:
+            self.local = LocalCache(
+                max_items=local_max_items or settings.CACHE_LOCAL_MAX_ITEMS,
+                max_bytes=local_max_bytes or settings.CACHE_LOCAL_MAX_BYTES,
+                ttl=local_ttl or settings.CACHE_LOCAL_TTL,
+            )
+        self.redis_enabled = redis_enabled
+        self._redis = redis_client
+
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        CACHES[name] = self
+
+    @property
+    def redis(self):
+        """Redis client of the second tier, or None if it is disabled."""
+        if not self.redis_enabled:
+            return None
+        return self._redis if self._redis is not None else get_redis()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Get a cached value from the nearest tier that has it."""
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not None:
+                self.local_hits += 1
+                return value
+
+        redis = self.redis
+        if redis is not None:
+            try:
+                cached = await redis.get(key)
+            except Exception as e:
+                logger.warning(f"Cache read failed for {key}: {e}")
+                cached = None
+            if cached:
+                value = json.loads(cached)
+                self.redis_hits += 1
+                if self.local is not None:
+                    self.local.set(key, value, len(cached))
+                return value
+
+        self.misses += 1
+        return None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict]]:
+        """
+        Get several cached values, with one Redis MGET for the local misses.
+
+        Returns:
+            Values in key order, None where not cached
+        """
+        values: List[Optional[Dict]] = [None] * len(keys)
+        remote = []
+        for i, key in enumerate(keys):
+            value = self.local.get(key) if self.local is not None else None
+            if value is not None:
+                self.local_hits += 1
+                values[i] = value
+            else:
+                remote.append(i)
+
+        redis = self.redis
+        if remote and redis is not None:
+            try:
+                cached = await redis.mget([keys[i] for i in remote])
+            except Exception as e:
+                logger.warning(f"Cache read failed for {len(remote)} keys: {e}")
+                cached = [None] * len(remote)
+            for i, serialized in zip(remote, cached):
+                if serialized:
+                    values[i] = json.loads(serialized)
+                    self.redis_hits += 1
+                    if self.local is not None:
+                        self.local.set(keys[i], values[i], len(serialized))
+
+        self.misses += sum(value is None for value in values)
+        return values
+
+    async def set(self, key: str, value: Dict):
+        """Store a value in every enabled tier."""
+        serialized = json.dumps(value)
+        if self.local is not None:
+            self.local.set(key, value, len(serialized))
+        redis = self.redis
+        if redis is not None:
+            try:
+                await redis.setex(key, self.ttl, serialized)
+            except Exception as e:
+                logger.warning(f"Cache write failed for {key}: {e}")
+
+    async def delete(self, key: str):
+        """Remove a value from every enabled tier."""
+        if self.local is not None:
+            self.local.delete(key)
+        redis = self.redis
+        if redis is not None:
+            try:
+                await redis.delete(key)
+            except Exception as e:
+                logger.warning(f"Cache delete failed for {key}: {e}")
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Dict]], lookup: bool = True
+    ) -> Dict:
+        """
+        Get a cached value, or compute and cache it.
+
+        Concurrent calls for the same key share one computation. It runs as
+        its own task, so a caller that is cancelled does not cancel it for
+        the others.
+
+        Args:
+            key: Cache key
+            compute: Coroutine function producing the value on a miss
+            lookup: False when the caller already found the key missing
+
+        Returns:
+            The cached or computed value
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        if lookup:
+            value = await self.get(key)
+            if value is not None:
+                return value
+
+        # Another caller may have started while this one read from Redis
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_and_set(key, compute))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        """Hit, miss, coalescing and eviction counters."""
+        return {
+            "local_enabled": self.local is not None,
+            "redis_enabled": self.redis_enabled,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.local.evictions if self.local is not None else 0,
+            "local_items": len(self.local) if self.local is not None else 0,
+            "local_bytes": self.local.size_bytes if self.local is not None else 0,
+        }
+
+    async def _compute_and_set(
+        self, key: str, compute: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        value = await compute()
+        if value is not None:
+            await self.set(key, value)
+        return value
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the error retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """Counters of every cache, by name."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -25,6 +25,22 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_CACHE_TTL: int = 86400  # 24 hours in seconds
+    REDIS_MAX_CONNECTIONS: int = 50  # Shared pool size per process
+    REDIS_POOL_TIMEOUT: float = 2.0  # Seconds to wait for a free connection
+    REDIS_SOCKET_TIMEOUT: float = 1.0  # Seconds per command
+    REDIS_CONNECT_TIMEOUT: float = 1.0  # Seconds to connect
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # Seconds idle before a connection is pinged
+
+    # Result Cache
+    CACHE_LOCAL_ENABLED: bool = True  # In-process tier in front of Redis
+    CACHE_REDIS_ENABLED: bool = True  # Redis tier (also needs REDIS_URL)
+    CACHE_LOCAL_MAX_ITEMS: int = 1024  # Results kept per process
+    CACHE_LOCAL_MAX_BYTES: int = 32 * 1024 * 1024  # 32MB of serialized results
+    CACHE_LOCAL_TTL: int = 300  # Seconds before a local copy is re-read
+    CACHE_HOT_FLUSH_INTERVAL: int = 10  # Seconds between request-count flushes
+    CACHE_HOT_MAX_KEYS: int = 10000  # Most requested documents tracked
+    CACHE_WARMUP_TOP_N: int = 500  # Documents re-scored after a scorer upgrade
+    CACHE_WARMUP_MAX_SOURCE_BYTES: int = 256 * 1024  # Larger content is not warmed
 
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/1"
@@ -34,6 +50,13 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
     DEFAULT_AI_MODEL: str = "gpt-4"
+    XAI_API_KEY: Optional[str] = None
+    XAI_BASE_URL: str = "https://api.x.ai/v1"
+    ANTHROPIC_BASE_URL: str = "https://api.anthropic.com"
+    GROK_PROBE_MODEL: str = "grok-3"  # Model asked by citation probes
+    CLAUDE_PROBE_MODEL: str = (
+        "claude-3-5-sonnet-latest"  # Model asked by citation probes
+    )
 
     # Vector DB
     QDRANT_URL: str = "http://localhost:6333"
@@ -43,15 +66,95 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = "change-me-in-production"
     API_KEY_HEADER: str = "X-API-Key"
-    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_PER_MINUTE: int = 60  # Default limit (anonymous and unknown keys)
+    # Requests per minute by plan of the API key's owner (User.plan)
+    RATE_LIMIT_PLANS: dict[str, int] = {"free": 60, "pro": 600, "enterprise": 3000}
+    RATE_LIMIT_PLAN_CACHE_TTL: int = 300  # Seconds an API key's plan is cached
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000  # Keys tracked without Redis, LRU
+    API_KEY_CACHE_TTL: int = 60  # Seconds a verified API key is trusted
+    API_KEY_CACHE_MAX_ITEMS: int = 10000  # Verified keys cached per process
+    API_KEY_USAGE_FLUSH_INTERVAL: int = 10  # Seconds between usage count writes
 
     # Content Limits
     MAX_CONTENT_WORDS: int = 50000
     MAX_CONTENT_SIZE_BYTES: int = 10 * 1024 * 1024  # 10MB
 
+    # URL Fetching
+    FETCH_HTTP2: bool = True  # Needs h2 (httpx[http2])
+    FETCH_MAX_CONNECTIONS: int = 100  # Shared pool size per process
+    FETCH_MAX_KEEPALIVE: int = 20  # Idle connections kept open
+    FETCH_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept
+    FETCH_PER_HOST_CONNECTIONS: int = 6  # Concurrent requests per host
+    FETCH_TIMEOUT: float = 30.0  # Seconds per request
+    FETCH_METADATA_TTL: int = 7 * 86400  # ETag/Last-Modified kept for a week
+
+    # Content Parsing
+    CONTENT_PARSER_BACKEND: str = "standard"  # "standard", "fast" or "commonmark"
+
+    # Named Entity Recognition
+    ENTITY_DETECTOR: str = "spacy"  # "spacy", "heuristic" or "auto" (spacy if loaded)
+    ENTITY_GAZETTEER_PATH: Optional[str] = None  # Extra known entities, one per line
+    SPACY_MODEL: str = "en_core_web_sm"
+    NER_BATCH_SIZE: int = 32  # Chunks per nlp.pipe batch
+    NER_N_PROCESS: int = 1  # spaCy processes per batch (scoring workers use 1)
+    NER_CHUNK_CHARS: int = 100000  # Long texts are split at sentence breaks
+
+    # Incremental Scoring
+    INCREMENTAL_SECTION_CACHE_SIZE: int = 2048  # Parsed sections kept per worker
+
+    # Scoring Workers
+    SCORING_POOL_SIZE: int = 2  # 0 scores in a thread of the API process
+    SCORING_MAX_TASKS_PER_CHILD: int = 500  # 0 keeps workers (always on Python < 3.11)
+    SCORING_QUEUE_DEPTH: int = 16  # Jobs waiting for a worker before 503
+    SCORING_BATCH_SIZE: int = 16  # Batch/bulk audit documents scored per job
+    SCORING_BATCH_WINDOW: float = 0.02  # Seconds a document waits for its batch
+
+    # Batch Audits
+    BATCH_AUDIT_MAX_ITEMS: int = 100  # Documents per POST /aieo/audit/batch
+    BATCH_AUDIT_CONCURRENCY: int = 16  # Documents of one batch audited at a time
+
+    # Audit Persistence (write-behind)
+    AUDIT_WRITE_QUEUE_SIZE: int = 10000  # Unsaved audits held before submit waits
+    AUDIT_WRITE_BATCH_SIZE: int = 500  # Audit rows per INSERT
+    AUDIT_WRITE_FLUSH_INTERVAL: float = 1.0  # Seconds a batch waits to fill
+    AUDIT_WRITE_RETRIES: int = 3  # Retries of a failed batch before row by row
+    AUDIT_WRITE_RETRY_DELAY: float = 0.5  # Seconds before the first retry, doubling
+
+    # Bulk Audits
+    BULK_MAX_URLS: int = 50000  # Pages per job
+    BULK_CONCURRENCY: int = 32  # Pages fetched and scored at a time
+    BULK_PER_DOMAIN_CONCURRENCY: int = 4  # Concurrent requests per domain
+    BULK_DOMAIN_DELAY: float = 0.05  # Seconds between request starts per domain
+    BULK_INSERT_BATCH_SIZE: int = 200  # Audit rows per INSERT
+    BULK_SCORING_RETRIES: int = 5  # Retries when the scoring pool is saturated
+    BULK_JOB_TTL: int = 7 * 86400  # Progress kept (and resumable) for a week
+
     # Citation Tracking
     CITATION_PROBE_INTERVAL_HOURS: int = 24
     CITATION_DETECTION_ENGINES: list[str] = ["grok", "claude"]
+    CITATION_CONTEXT_CHARS: int = 200  # Answer text kept on each side of a citation
+    CITATION_INSERT_BATCH_SIZE: int = 1000  # Citation rows per INSERT
+    CITATION_DEDUPE_BUCKET: int = (
+        3600  # Seconds in which a repeat detection is a duplicate
+    )
+    CITATION_DEDUPE_KEY_DAYS: int = 2  # Days a detection is checked for repeats
+    CITATION_PROBE_CONCURRENCY: int = 16  # Probes in flight per run, all engines
+    CITATION_PROBE_ENGINE_CONCURRENCY: int = 4  # Probes in flight per engine
+    CITATION_PROBE_RATE: float = (
+        2.0  # Probe starts per second per engine (0 = no limit)
+    )
+    CITATION_PROBE_BURST: int = 4  # Probes an idle engine may start at once
+    CITATION_PROBE_TIMEOUT: float = 30.0  # Seconds per probe attempt
+    CITATION_PROBE_RETRIES: int = 3  # Retries of timed-out or rate-limited probes
+    CITATION_PROBE_BACKOFF: float = 0.5  # Base of the jittered exponential backoff
+    # Per-engine overrides, e.g. {"grok": {"concurrency": 2, "rate": 1.0}}
+    CITATION_PROBE_ENGINE_LIMITS: dict[str, dict] = {}
+    # Synthetic engines for load tests (no outside service is called)
+    CITATION_MOCK_ENGINES: bool = False  # Answer every probe with a mock engine
+    CITATION_MOCK_CITATION_RATE: float = 0.3  # Share of prompts citing the URL
+    CITATION_MOCK_LATENCY_MS: float = 800.0  # Median answer latency
+    CITATION_MOCK_LATENCY_SIGMA: float = 0.5  # Log-normal spread (0 = fixed)
+    CITATION_MOCK_ERROR_RATE: float = 0.0  # Share of probes answered 429
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,27 @@
 """Database connection and session management."""
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from .config import settings
 
-# Create database engine
+# asyncio driver of each database
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> URL:
+    """A database URL with the asyncio driver of its database."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+# Create database engine (Celery tasks, migrations and worker threads)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_size=settings.DATABASE_POOL_SIZE,
@@ -16,6 +32,37 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# asyncio engine for request handlers: waiting on the database does not
+# block the event loop, so other requests keep being served meanwhile
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
+
+# Objects stay readable after commit, without a reload
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def unpooled_async_sessionmaker() -> async_sessionmaker:
+    """
+    asyncio session factory whose connections close when the session does.
+
+    asyncio connections belong to the event loop that opened them, and
+    Celery tasks run each job in a new loop, so they cannot share the pool.
+    """
+    return async_sessionmaker(
+        create_async_engine(
+            async_database_url(settings.DATABASE_URL), poolclass=NullPool
+        ),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
 # Base class for models
 Base = declarative_base()
 
@@ -27,3 +74,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for FastAPI to get an asyncio database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
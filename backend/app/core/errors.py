@@ -52,3 +52,19 @@ class InvalidRequestError(AIEOError):
                 }
             },
         )
+
+
+class ScoringUnavailableError(AIEOError):
+    """Scoring workers are saturated or unavailable."""
+
+    def __init__(self, message: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": {
+                    "code": "SCORING_UNAVAILABLE",
+                    "message": message,
+                }
+            },
+            headers={"Retry-After": "1"},
+        )
@@ -2,7 +2,9 @@
 
 from fastapi import APIRouter
 from sqlalchemy import text
+from .cache import cache_stats
 from .database import engine
+from .redis_pool import get_redis
 
 router = APIRouter()
 
@@ -21,17 +23,16 @@ async def health_check():
         health_status["checks"]["database"] = f"unhealthy: {str(e)}"
         health_status["status"] = "degraded"
 
-    # Check Redis (if configured)
-    try:
-        from .config import settings
-        import redis
-
-        if settings.REDIS_URL:
-            redis_client = redis.Redis.from_url(settings.REDIS_URL)
-            redis_client.ping()
+    # Check Redis (if configured), over the shared pool
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            await redis_client.ping()
             health_status["checks"]["redis"] = "healthy"
-    except Exception:
-        health_status["checks"]["redis"] = "unavailable"
+        except Exception:
+            health_status["checks"]["redis"] = "unavailable"
+
+    health_status["cache"] = cache_stats()
 
     return health_status
 
@@ -1,39 +1,97 @@
 """Custom middleware."""
 
-import time
+import json
 import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+import time
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .rate_limit import RateLimiter
 
 logger = logging.getLogger("aieo")
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Logging middleware for request/response tracking."""
+class RequestMiddleware:
+    """
+    Request timing, logging and rate limiting in one layer.
+
+    A plain ASGI middleware: the response is passed through as the app sends
+    it, with the log line and headers added at its start, so streamed
+    responses are not buffered or relayed through extra tasks. Requests over
+    the rate limit are answered with 429 without reaching the app.
+    """
+
+    def __init__(self, app: ASGIApp, rate_limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.rate_limiter = rate_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         start_time = time.time()
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
 
         # Log request
-        logger.info(
-            f"{request.method} {request.url.path} - "
-            f"Client: {request.client.host if request.client else 'unknown'}"
-        )
+        logger.info(f"{method} {path} - Client: {client[0] if client else 'unknown'}")
+
+        rate_headers = {}
+        app = self.app
+        if self.rate_limiter is not None:
+            api_key = Headers(scope=scope).get("x-api-key")
+            allowed, limit, remaining, retry_after = await self.rate_limiter.check(
+                api_key
+            )
+            rate_headers = {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(remaining),
+            }
+            if not allowed:
+                app = rate_limited_response(retry_after)
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Calculate duration
+                duration = time.time() - start_time
 
-        # Process request
-        response = await call_next(request)
+                # Log response
+                logger.info(
+                    f"{method} {path} - "
+                    f"Status: {message['status']} - "
+                    f"Duration: {duration:.3f}s"
+                )
 
-        # Calculate duration
-        duration = time.time() - start_time
+                headers = MutableHeaders(scope=message)
+                for name, value in rate_headers.items():
+                    headers[name] = value
+                # Add timing header
+                headers["X-Process-Time"] = str(duration)
+            await send(message)
 
-        # Log response
-        logger.info(
-            f"{request.method} {request.url.path} - "
-            f"Status: {response.status_code} - "
-            f"Duration: {duration:.3f}s"
-        )
+        await app(scope, receive, send_with_headers)
 
-        # Add timing header
-        response.headers["X-Process-Time"] = str(duration)
 
-        return response
+def rate_limited_response(retry_after: float) -> Response:
+    """429 response for a request over its rate limit."""
+    retry_after = max(math.ceil(retry_after), 1)
+    return Response(
+        content=json.dumps(
+            {
+                "error": {
+                    "code": "RATE_LIMITED",
+                    "message": f"Rate limit exceeded. Retry after {retry_after} seconds.",
+                    "retry_after": retry_after,
+                }
+            }
+        ),
+        status_code=429,
+        media_type="application/json",
+        headers={"Retry-After": str(retry_after)},
+    )
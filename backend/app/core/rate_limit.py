@@ -1,53 +1,204 @@
-"""Rate limiting middleware."""
+"""Per API key rate limiting."""
 
-from fastapi import Request, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
 import time
-from collections import defaultdict
-from typing import Dict
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
+from redis.exceptions import NoScriptError
+
+from .auth_cache import api_key_cache
+from .cache import LocalCache
 from .config import settings
+from .database import AsyncSessionLocal
+from .redis_pool import get_redis
+from .security import api_key_plan
+from ..models.api_key import APIKey
 
+# Limits are per minute
+PERIOD = 60.0
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware."""
+# GCRA (generic cell rate algorithm) in one atomic step. A key stores only
+# its theoretical arrival time (TAT): each request pushes it one emission
+# interval (period / limit) ahead, and a request is refused while that would
+# put the TAT more than a period beyond now. Times are in milliseconds from
+# the Redis clock, so every worker and node shares one view of time.
+#
+# KEYS[1]: limiter key; ARGV[1]: emission interval; ARGV[2]: period
+# Returns {allowed, remaining, retry after}
+GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local wait = new_tat - now - period
+if wait > 0 then
+    return {0, 0, wait}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, math.floor((period - (new_tat - now)) / interval), 0}
+"""
 
-    def __init__(self, app, requests_per_minute: int = None):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute or settings.RATE_LIMIT_PER_MINUTE
-        self.requests: Dict[str, list] = defaultdict(list)
 
-    async def dispatch(self, request: Request, call_next):
-        # Get API key from header
-        api_key = request.headers.get("X-API-Key", "anonymous")
+def gcra(
+    tat: Optional[float], now: float, interval: float, period: float
+) -> Tuple[bool, float, int, float]:
+    """
+    One GCRA decision, as GCRA_SCRIPT makes it.
 
-        # Check rate limit
-        if not self._check_rate_limit(api_key):
-            return Response(
-                content='{"error": {"code": "RATE_LIMITED", "message": "Rate limit exceeded. Retry after 60 seconds.", "retry_after": 60}}',
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                media_type="application/json",
-                headers={"Retry-After": "60"},
-            )
+    Args:
+        tat: Stored theoretical arrival time, or None for a new key
+        now: Current time
+        interval: Emission interval (period / limit)
+        period: Window a full burst of requests is spread over
 
-        response = await call_next(request)
-        return response
+    Returns:
+        Whether the request is allowed, the TAT to store, the requests
+        left and the seconds to wait before retrying
+    """
+    tat = max(tat if tat is not None else now, now)
+    new_tat = tat + interval
+    wait = new_tat - now - period
+    if wait > 0:
+        return False, tat, 0, wait
+    return True, new_tat, int((period - (new_tat - now)) // interval), 0.0
 
-    def _check_rate_limit(self, key: str) -> bool:
-        """Check if request is within rate limit."""
-        now = time.time()
-        minute_ago = now - 60
 
-        # Clean old requests
-        self.requests[key] = [
-            req_time for req_time in self.requests[key] if req_time > minute_ago
-        ]
+class LocalRateLimiter:
+    """
+    GCRA rate limiter for one process, bounded in memory.
+
+    Keys are kept in LRU order and the least recently seen are dropped over
+    max_keys; a key whose TAT has passed is indistinguishable from a new
+    one, so idle keys are dropped first at no cost in accuracy.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def hit(self, key: str, limit: int) -> Tuple[bool, int, float]:
+        """Count a request; returns allowed, remaining and retry-after."""
+        allowed, tat, remaining, wait = gcra(
+            self._tats.get(key), time.monotonic(), PERIOD / limit, PERIOD
+        )
+        self._tats[key] = tat
+        self._tats.move_to_end(key)
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+        return allowed, remaining, wait
+
+
+class RedisRateLimiter:
+    """GCRA rate limiter shared by all workers through Redis."""
+
+    def __init__(self):
+        self._sha: Optional[str] = None
+
+    async def hit(self, redis_client, key: str, limit: int) -> Tuple[bool, int, float]:
+        """Count a request; returns allowed, remaining and retry-after."""
+        args = (PERIOD * 1000 / limit, PERIOD * 1000)
+        if self._sha is None:
+            self._sha = await redis_client.script_load(GCRA_SCRIPT)
+        try:
+            result = await redis_client.evalsha(self._sha, 1, key, *args)
+        except NoScriptError:
+            # Script cache flushed (restart or failover)
+            self._sha = None
+            result = await redis_client.eval(GCRA_SCRIPT, 1, key, *args)
+        allowed, remaining, wait = result
+        return bool(allowed), int(remaining), float(wait) / 1000
 
-        # Check limit
-        if len(self.requests[key]) >= self.requests_per_minute:
-            return False
 
-        # Record request
-        self.requests[key].append(now)
-        return True
+class RateLimiter:
+    """
+    Per API key rate limiter, applied by RequestMiddleware.
+
+    Requests are limited per API key, at the limit of the plan of the key's
+    owner (plan_limits, falling back to requests_per_minute). Plans are only
+    looked up for keys authentication has verified recently; other keys get
+    the default limit without a query, so made-up keys cannot load the
+    database. Decisions are
+    made in Redis when it is available, so limits hold across processes,
+    and by a bounded in-process limiter otherwise.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        plan_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.requests_per_minute = requests_per_minute or settings.RATE_LIMIT_PER_MINUTE
+        self.plan_limits = (
+            plan_limits if plan_limits is not None else settings.RATE_LIMIT_PLANS
+        )
+        self.redis_limiter = RedisRateLimiter()
+        self.local_limiter = LocalRateLimiter(settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+        # Verified API key hash -> plan of its owner ("" for keys without one)
+        self.plans = LocalCache(
+            max_items=settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+            max_bytes=settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+            ttl=settings.RATE_LIMIT_PLAN_CACHE_TTL,
+        )
+
+    async def check(self, api_key: Optional[str]) -> Tuple[bool, int, int, float]:
+        """
+        Count a request against its API key's limit.
+
+        Args:
+            api_key: X-API-Key header, or None for anonymous requests
+
+        Returns:
+            Whether the request is allowed, the limit per minute, the
+            requests left and the seconds to wait before retrying
+        """
+        api_key = api_key or "anonymous"
+        limit = await self._limit_for(api_key)
+        # Limiter keys (in Redis too) hold the key's hash, never the key
+        key = "anonymous" if api_key == "anonymous" else APIKey.hash_key(api_key)
+        allowed, remaining, retry_after = await self._check_rate_limit(key, limit)
+        return allowed, limit, remaining, retry_after
+
+    async def _limit_for(self, api_key: str) -> int:
+        """Requests per minute allowed for an API key."""
+        if api_key == "anonymous" or not self.plan_limits:
+            return self.requests_per_minute
+        key_hash = APIKey.hash_key(api_key)
+        plan = self.plans.get(key_hash)
+        if plan is None:
+            # Runs before authentication: only keys already verified are
+            # looked up, the others may be made up
+            if api_key_cache.get(key_hash) is None:
+                return self.requests_per_minute
+            try:
+                plan = await self._lookup_plan(api_key) or ""
+            except Exception:
+                # Database unavailable: default limit, looked up again later
+                return self.requests_per_minute
+            self.plans.set(key_hash, plan, 1)
+        return self.plan_limits.get(plan, self.requests_per_minute)
+
+    async def _lookup_plan(self, api_key: str) -> Optional[str]:
+        """Plan of the owner of an API key, from the database."""
+        async with AsyncSessionLocal() as db:
+            return await api_key_plan(db, api_key)
+
+    async def _check_rate_limit(self, key: str, limit: int) -> Tuple[bool, int, float]:
+        """Check if request is within rate limit."""
+        # Decided in Redis when available, so limits hold across processes
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                return await self.redis_limiter.hit(
+                    redis_client, f"ratelimit:{key}", limit
+                )
+            except Exception:
+                pass
+        return self.local_limiter.hit(key, limit)
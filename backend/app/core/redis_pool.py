@@ -0,0 +1,55 @@
+"""Shared asyncio Redis connection pool."""
+
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from .config import settings
+
+logger = logging.getLogger("aieo")
+
+_client: Optional[aioredis.Redis] = None
+
+
+def create_redis_client(url: Optional[str] = None) -> aioredis.Redis:
+    """
+    Create an asyncio Redis client over a bounded connection pool.
+
+    When every connection is busy, commands wait up to REDIS_POOL_TIMEOUT
+    for one to be released instead of opening more.
+    """
+    pool = aioredis.BlockingConnectionPool.from_url(
+        url or settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+async def init_redis() -> Optional[aioredis.Redis]:
+    """Create the shared client (on startup), if Redis is configured."""
+    global _client
+    if _client is None and settings.REDIS_URL:
+        _client = create_redis_client()
+        logger.info(
+            f"Redis pool created ({settings.REDIS_MAX_CONNECTIONS} connections)"
+        )
+    return _client
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """Get the shared client, or None before startup or without Redis."""
+    return _client
+
+
+async def close_redis():
+    """Close the shared client and its connections (on shutdown)."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+        await client.connection_pool.disconnect()
@@ -1,22 +1,27 @@
 """Security utilities for authentication and authorization."""
 
 from fastapi import Header, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 
-from .database import get_db
+from .auth_cache import VerifiedKey, api_key_cache, usage_counter
+from .database import get_async_db
 from ..models.api_key import APIKey
+from ..models.user import User
 
 
 async def verify_api_key(
     x_api_key: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> str:
     """
     Verify API key from request header.
 
     Checks against database, validates expiration, and tracks usage.
+    Verified keys are cached for API_KEY_CACHE_TTL seconds, and usage is
+    written in batches, so most requests do not touch the database.
     """
     if not x_api_key:
         raise HTTPException(
@@ -28,32 +33,71 @@ async def verify_api_key(
     # Hash the provided key
     key_hash = APIKey.hash_key(x_api_key)
 
-    # Look up in database
-    api_key = (
-        db.query(APIKey).filter(APIKey.key_hash == key_hash, APIKey.is_active).first()
-    )
-
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid API key",
+    verified = api_key_cache.get(key_hash)
+    if verified is None:
+        # Look up in database
+        api_key = await db.scalar(
+            select(APIKey).where(APIKey.key_hash == key_hash, APIKey.is_active)
         )
 
+        if not api_key:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key",
+            )
+
+        verified = VerifiedKey(api_key.id, api_key.user_id, api_key.expires_at)
+        api_key_cache.set(key_hash, verified)
+
     # Check expiration
-    if api_key.expires_at and api_key.expires_at < datetime.utcnow():
+    if verified.expires_at and verified.expires_at < datetime.utcnow():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="API key has expired",
         )
 
     # Update usage tracking
-    api_key.last_used_at = datetime.utcnow()
-    api_key.usage_count += 1
-    db.commit()
+    usage_counter.record(verified.id)
 
     return x_api_key
 
 
+async def api_key_user_id(db: AsyncSession, x_api_key: str) -> Optional[str]:
+    """ID of the user owning an API key, or None for unknown keys."""
+    verified = api_key_cache.get(APIKey.hash_key(x_api_key))
+    if verified is not None:
+        return str(verified.user_id)
+    user_id = await db.scalar(
+        select(APIKey.user_id).where(APIKey.key_hash == APIKey.hash_key(x_api_key))
+    )
+    return str(user_id) if user_id else None
+
+
+async def revoke_api_key(db: AsyncSession, x_api_key: str) -> bool:
+    """
+    Deactivate an API key, effective at once in every process.
+
+    Returns:
+        Whether the key existed
+    """
+    key_hash = APIKey.hash_key(x_api_key)
+    result = await db.execute(
+        update(APIKey).where(APIKey.key_hash == key_hash).values(is_active=False)
+    )
+    await db.commit()
+    await api_key_cache.revoke(key_hash)
+    return result.rowcount > 0
+
+
+async def api_key_plan(db: AsyncSession, x_api_key: str) -> Optional[str]:
+    """Plan of the user owning an active API key, or None for unknown keys."""
+    return await db.scalar(
+        select(User.plan)
+        .join(APIKey, APIKey.user_id == User.id)
+        .where(APIKey.key_hash == APIKey.hash_key(x_api_key), APIKey.is_active)
+    )
+
+
 async def verify_api_key_simple(x_api_key: Optional[str] = Header(None)) -> str:
     """
     Simple API key verification for MVP/testing.
@@ -1,29 +1,77 @@
 """Main FastAPI application."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from .core.auth_cache import api_key_cache, usage_counter
 from .core.config import settings
-from .core.rate_limit import RateLimitMiddleware
+from .core.database import async_engine
+from .core.rate_limit import RateLimiter
 from .core.logging_config import setup_logging
-from .core.middleware import LoggingMiddleware
+from .core.middleware import RequestMiddleware
 from .core.health import router as health_router
+from .core.redis_pool import close_redis, init_redis
 from .api.v1 import audit, optimize, citations, patterns
+from .services.audit_writer import audit_writer
+from .services.http_fetcher import http_fetcher
+from .services.scoring_executor import scoring_executor
+from .tasks.cache_tasks import schedule_warmup_after_upgrade
 
 # Configure logging
 logger = setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared resources on startup and release them on shutdown."""
+    await init_redis()
+    api_key_cache.start()
+    usage_counter.start()
+    audit_writer.start()
+    # Spawn scoring workers up front so spaCy loads before the first request
+    await scoring_executor.start()
+    # Re-score the hottest audits in the background after a scorer upgrade
+    try:
+        if await schedule_warmup_after_upgrade():
+            logger.info("Scorer changed, queued audit cache warm-up")
+    except Exception as e:
+        logger.warning(f"Could not schedule audit cache warm-up: {e}")
+    yield
+    await api_key_cache.stop()
+    await usage_counter.stop()
+    # Save the audits still queued before the connections close
+    await audit_writer.stop()
+    scoring_executor.shutdown()
+    await http_fetcher.close()
+    await close_redis()
+    await async_engine.dispose()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
-# Logging middleware (first, to log all requests)
-app.add_middleware(LoggingMiddleware)
+# Timing, logging and rate limiting, in one layer inside CORS so that
+# refused requests still carry CORS headers
+app.add_middleware(
+    RequestMiddleware,
+    rate_limiter=(
+        None
+        if settings.DEBUG
+        else RateLimiter(
+            requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+            plan_limits=settings.RATE_LIMIT_PLANS,
+        )
+    ),
+)
 
 # CORS middleware
 app.add_middleware(
@@ -34,13 +82,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Rate limiting middleware
-if not settings.DEBUG:
-    app.add_middleware(
-        RateLimitMiddleware,
-        requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
-    )
-
 
 # Exception handlers
 @app.exception_handler(Exception)
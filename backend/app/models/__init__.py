@@ -1 +1,7 @@
 """Database models."""
+
+# Imported together so relationships between them always resolve
+from .api_key import APIKey  # noqa: F401
+from .audit import Audit  # noqa: F401
+from .citation import Citation, CitationDedupeKey  # noqa: F401
+from .user import User  # noqa: F401
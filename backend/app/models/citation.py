@@ -1,6 +1,6 @@
 """Citation model."""
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
@@ -23,3 +23,20 @@ class Citation(Base):
     confidence = Column(Float, nullable=True)  # 0-1
     detected_at = Column(DateTime(timezone=True), nullable=False, index=True)
     verified = Column(Boolean, default=False, nullable=False)
+
+
+class CitationDedupeKey(Base):
+    """
+    URL, engine and prompt cited in a CITATION_DEDUPE_BUCKET window.
+
+    Citations are deduplicated on this table's primary key rather than on a
+    unique index of citations: unique indexes of a TimescaleDB hypertable
+    must include its partitioning column, detected_at, which differs
+    between repeat detections of a window.
+    """
+
+    __tablename__ = "citation_dedupe_keys"
+
+    dedupe_bucket = Column(BigInteger, primary_key=True)
+    # SHA-256 of URL, engine and prompt, short enough for any index
+    key_hash = Column(String(64), primary_key=True)
@@ -1,30 +1,58 @@
 """Audit service for content analysis."""
 
-import httpx
-from typing import Dict, Optional
-from sqlalchemy.orm import Session
+import asyncio
+import hashlib
+import logging
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import redis
-import json
 
+from ..core.cache import TwoTierCache
 from ..core.config import settings
+from ..core.errors import AIEOError
+from ..core.redis_pool import get_redis
 from ..core.validation import validate_content_size, validate_url, sanitize_content
-from ..core.errors import ContentTooLargeError, FetchFailedError
 from ..core.monitoring import track_performance
-from ..models.audit import Audit as AuditModel
-from .scoring_engine import ScoringEngine
+from .scoring_executor import ScoringExecutor, scoring_executor
+from .audit_writer import AuditWriter, audit_writer
 from .benchmark_service import BenchmarkService
+from .cache_warmup import HotKeyTracker, save_source
+from .scoring_engine import SCORER_VERSION, scorer_fingerprint
+from .http_fetcher import HTTPFetcher, http_fetcher
+
+logger = logging.getLogger("aieo")
+
+
+def audit_key_prefix() -> str:
+    """Prefix of the cache keys of audit results from the current scorer."""
+    return f"audit:v{SCORER_VERSION}:{scorer_fingerprint()}"
 
 
 class AuditService:
     """Service for auditing content."""
 
-    def __init__(self):
-        self.scoring_engine = ScoringEngine()
+    def __init__(
+        self,
+        executor: Optional[ScoringExecutor] = None,
+        redis_client=None,
+        fetcher: Optional[HTTPFetcher] = None,
+        writer: Optional[AuditWriter] = None,
+    ):
+        self.scoring_executor = executor or scoring_executor
+        self.fetcher = fetcher or http_fetcher
+        self.audit_writer = writer or audit_writer
         self.benchmark_service = BenchmarkService()
-        self.redis_client = (
-            redis.Redis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
-        )
+        # None uses the shared asyncio pool created at startup
+        self._redis_client = redis_client
+        self.cache = TwoTierCache("audit", redis_client=redis_client)
+        self.hot_keys = HotKeyTracker(redis_client)
+
+    @property
+    def redis_client(self):
+        """Redis client, or None when Redis is not configured."""
+        if self._redis_client is not None:
+            return self._redis_client
+        return get_redis()
 
     @track_performance
     async def audit(
@@ -33,7 +61,7 @@ class AuditService:
         content: Optional[str] = None,
         format: str = "markdown",
         user_id: Optional[str] = None,
-        db: Session = None,
+        incremental: bool = False,
     ) -> Dict:
         """
         Audit content and return score with gaps.
@@ -42,152 +70,248 @@ class AuditService:
             url: URL to fetch content from
             content: Raw content string
             format: Content format ('markdown' or 'html')
-            user_id: Optional user ID
-            db: Database session
+            user_id: Optional user ID; the audit is saved for this user
+            incremental: Only re-process sections changed since earlier audits
 
         Returns:
             Audit result dictionary
         """
+        _, result = await self.audit_with_hash(
+            url=url,
+            content=content,
+            format=format,
+            user_id=user_id,
+            incremental=incremental,
+        )
+        return result
+
+    async def audit_with_hash(
+        self,
+        url: Optional[str] = None,
+        content: Optional[str] = None,
+        format: str = "markdown",
+        user_id: Optional[str] = None,
+        incremental: bool = False,
+        cache_lookup: bool = True,
+        batch: bool = False,
+    ) -> Tuple[str, Dict]:
+        """
+        Audit content, also returning the hash of the audited content.
+
+        cache_lookup=False skips reading the cache, for callers that have
+        already found the content missing from it. batch=True scores the
+        content together with the other documents of a batch or bulk audit.
+
+        Returns:
+            Tuple of content hash and audit result dictionary
+        """
         # Validate inputs
+        document = None
         if url:
             validate_url(url)
-            content = await self._fetch_url(url)
             format = "html"
+            # Pages are parsed in a worker; the raw HTML is not kept
+            fetched = await self.fetcher.fetch(url)
+            if fetched.not_modified:
+                # Unchanged page: serve the cached result without parsing
+                cached = await self.cache.get(
+                    self._get_cache_key(fetched.content_hash, format)
+                )
+                if cached is not None:
+                    await self.hot_keys.record(f"{format}:{fetched.content_hash}")
+                    return fetched.content_hash, cached
+                fetched = await self.fetcher.fetch(url, conditional=False)
+            document = fetched.document
+            content_hash = document.content_hash
         elif content:
             content = sanitize_content(content)
             validate_content_size(content)
+            content_hash = _hash_content(content)
         else:
             raise ValueError("Either url or content must be provided")
 
-        # Check cache
-        cache_key = self._get_cache_key(content)
-        cached_result = self._get_from_cache(cache_key)
-        if cached_result:
-            return cached_result
+        async def compute() -> Dict:
+            # Score content in a worker, off the event loop
+            if batch and not incremental:
+                score_result = await self.scoring_executor.score_batched(
+                    content, format, document=document
+                )
+            elif document is not None:
+                score_result = await self.scoring_executor.score_document(document)
+            else:
+                score_result = await self.scoring_executor.score(
+                    content, format, incremental=incremental
+                )
 
-        # Score content
-        score_result = self.scoring_engine.score(content, format)
+            # Generate benchmark
+            benchmark = await self.benchmark_service.calculate_benchmark(
+                content=content if document is None else document.text,
+                score=score_result["score"],
+            )
 
-        # Generate benchmark
-        benchmark = await self.benchmark_service.calculate_benchmark(
-            content=content,
-            score=score_result["score"],
-        )
+            # Build result
+            result = {
+                "score": score_result["score"],
+                "grade": score_result["grade"],
+                "gaps": score_result.get("gaps", []),
+                "fixes": [],  # Will be populated by optimization service
+                "benchmark": benchmark,
+            }
 
-        # Build result
-        result = {
-            "score": score_result["score"],
-            "grade": score_result["grade"],
-            "gaps": score_result.get("gaps", []),
-            "fixes": [],  # Will be populated by optimization service
-            "benchmark": benchmark,
-        }
+            # Saved in the background, after the response is sent
+            if user_id:
+                await self.audit_writer.submit(
+                    audit_row(user_id, content_hash, url, result)
+                )
 
-        # Cache result
-        self._save_to_cache(cache_key, result)
+            # Keep the source so the result can be re-scored after an upgrade
+            await save_source(self.redis_client, hot_member, url=url, content=content)
 
-        # Save to database if user_id provided
-        if db and user_id:
-            self._save_audit(db, user_id, content, url, result)
+            return result
 
-        return result
+        hot_member = f"{format}:{content_hash}"
+        await self.hot_keys.record(hot_member)
 
-    async def _fetch_url(self, url: str) -> str:
-        """Fetch content from URL."""
-        try:
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(
-                    url,
-                    headers={
-                        "User-Agent": "AIEO-Bot/1.0 (Content Analysis Tool)",
-                    },
-                )
-                response.raise_for_status()
+        # Cached results are served without scoring; concurrent audits of the
+        # same content share one run
+        cache_key = self._get_cache_key(
+            content_hash, format, incremental=incremental and document is None
+        )
+        result = await self.cache.get_or_compute(
+            cache_key, compute, lookup=cache_lookup
+        )
+        return content_hash, result
 
-                # Check content size
-                content = response.text
-                if len(content) > settings.MAX_CONTENT_SIZE_BYTES:
-                    raise ContentTooLargeError(
-                        f"Fetched content exceeds maximum size limit ({settings.MAX_CONTENT_SIZE_BYTES} bytes)"
-                    )
+    async def audit_batch(
+        self,
+        items: List[Dict],
+        concurrency: Optional[int] = None,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Audit several documents, yielding each result as soon as it is ready.
+
+        Cached results of pasted content are read with a single Redis MGET
+        and come first; the other items are audited concurrently on the
+        scoring pool. Every result carries the item's index (and id, when
+        given); failed items carry an error instead of a score.
+
+        Args:
+            items: Dicts with url or content, and optionally format,
+                incremental and id
+            concurrency: Items audited at a time (default BATCH_AUDIT_CONCURRENCY)
+            user_id: Optional user ID; new audits are saved for this user
+
+        Yields:
+            Result dictionaries, in completion order
+        """
+
+        def tagged(i: int, body: Dict) -> Dict:
+            line = {"index": i}
+            if items[i].get("id") is not None:
+                line["id"] = items[i]["id"]
+            line.update(body)
+            return line
 
-                return content
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                raise FetchFailedError(f"URL not found: {url}")
-            elif e.response.status_code == 403:
-                raise FetchFailedError(
-                    f"Access forbidden: {url} (may require authentication)"
+        # Keys of pasted content are known without fetching or parsing
+        known = {}
+        for i, item in enumerate(items):
+            if item.get("content") and not item.get("url"):
+                format = item.get("format") or "markdown"
+                content_hash = _hash_content(sanitize_content(item["content"]))
+                key = self._get_cache_key(
+                    content_hash, format, incremental=item.get("incremental", False)
                 )
-            raise FetchFailedError(
-                f"Failed to fetch URL: HTTP {e.response.status_code}"
-            )
-        except httpx.TimeoutException:
-            raise FetchFailedError(f"Request timeout: {url}")
-        except Exception as e:
-            raise FetchFailedError(f"Error fetching URL: {str(e)}")
+                known[i] = (key, format)
+        cached = await self.cache.get_many([key for key, _ in known.values()])
 
-    def _get_cache_key(self, content: str) -> str:
-        """Generate cache key from content hash."""
-        from .content_parser import ContentParser
+        pending = [i for i in range(len(items)) if i not in known]
+        for (i, (key, format)), result in zip(known.items(), cached):
+            if result is None:
+                pending.append(i)
+                continue
+            await self.hot_keys.record(f"{format}:{key.rsplit(':', 1)[1]}")
+            yield tagged(i, result)
 
-        parser = ContentParser()
-        return f"audit:{parser._hash_content(content)}"
+        semaphore = asyncio.Semaphore(
+            min(
+                concurrency or settings.BATCH_AUDIT_CONCURRENCY,
+                self.scoring_executor.capacity,
+            )
+        )
 
-    def _get_from_cache(self, cache_key: str) -> Optional[Dict]:
-        """Get cached audit result."""
-        if not self.redis_client:
-            return None
+        async def run(i: int) -> Dict:
+            item = items[i]
+            async with semaphore:
+                try:
+                    _, result = await self.audit_with_hash(
+                        url=item.get("url"),
+                        content=item.get("content"),
+                        format=item.get("format") or "markdown",
+                        user_id=user_id,
+                        incremental=item.get("incremental", False),
+                        cache_lookup=i not in known,
+                        batch=True,
+                    )
+                    return tagged(i, result)
+                except Exception as e:
+                    return tagged(i, error_body(e))
 
+        tasks = [asyncio.ensure_future(run(i)) for i in sorted(pending)]
         try:
-            cached = self.redis_client.get(cache_key)
-            if cached:
-                return json.loads(cached)
-        except Exception:
-            pass
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The client went away; stop auditing for it
+            for task in tasks:
+                task.cancel()
 
-        return None
+    def _get_cache_key(
+        self, content_hash: str, format: str, incremental: bool = False
+    ) -> str:
+        """
+        Generate cache key from content hash, format and scorer version.
 
-    def _save_to_cache(self, cache_key: str, result: Dict):
-        """Save audit result to cache."""
-        if not self.redis_client:
-            return
+        Incremental results are cached apart from full audits: they may
+        differ slightly (see IncrementalScorer).
+        """
+        if incremental:
+            format = f"{format}-incremental"
+        return f"{audit_key_prefix()}:{format}:{content_hash}"
 
-        try:
-            ttl = settings.REDIS_CACHE_TTL
-            self.redis_client.setex(
-                cache_key,
-                ttl,
-                json.dumps(result),
-            )
-        except Exception:
-            pass
 
-    def _save_audit(
-        self,
-        db: Session,
-        user_id: str,
-        content: str,
-        url: Optional[str],
-        result: Dict,
-    ):
-        """Save audit result to database."""
-        from .content_parser import ContentParser
+def _hash_content(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
-        parser = ContentParser()
-        content_hash = parser._hash_content(content)
 
-        audit = AuditModel(
-            user_id=user_id,
-            content_hash=content_hash,
-            url=url,
-            score=result["score"],
-            grade=result["grade"],
-            gaps=result["gaps"],
-            fixes=result.get("fixes", []),
-            benchmark=result["benchmark"],
-            expires_at=datetime.utcnow() + timedelta(hours=24),
-        )
+def error_body(error: Exception) -> Dict:
+    """Error response body for an exception raised by an audit."""
+    if isinstance(error, AIEOError) and isinstance(error.detail, dict):
+        return error.detail
+    if isinstance(error, ValueError):
+        return {"error": {"code": "INVALID_REQUEST", "message": str(error)}}
+    logger.error(f"Audit failed: {error}", exc_info=error)
+    return {
+        "error": {
+            "code": "INTERNAL_ERROR",
+            "message": "An internal error occurred",
+        }
+    }
+
 
-        db.add(audit)
-        db.commit()
+def audit_row(
+    user_id: Optional[str], content_hash: str, url: Optional[str], result: Dict
+) -> Dict:
+    """Column values of the audits row for an audit result."""
+    return {
+        # Task arguments carry the ID as a string
+        "user_id": uuid.UUID(str(user_id)) if user_id else None,
+        "content_hash": content_hash,
+        "url": url,
+        "score": result["score"],
+        "grade": result["grade"],
+        "gaps": result["gaps"],
+        "fixes": result.get("fixes", []),
+        "benchmark": result["benchmark"],
+        "expires_at": datetime.utcnow() + timedelta(hours=24),
+    }
@@ -0,0 +1,158 @@
+"""Write-behind persistence of audit results."""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.audit import Audit as AuditModel
+
+logger = logging.getLogger("aieo")
+
+# Queued by stop(): everything before it is written, then the writer exits
+_STOP = object()
+
+
+class AuditWriter:
+    """
+    Save audit rows from a background task, in batches.
+
+    submit() only queues a row, so an audit response never waits on a
+    database commit. The writer task inserts queued rows with one
+    executemany INSERT per batch of up to batch_size rows, as soon as a
+    batch is full or flush_interval seconds after its first row. The queue
+    holds at most max_queue rows; when the database falls that far behind,
+    submit() waits for room rather than dropping audits. stop() writes
+    whatever is still queued.
+
+    A failed batch is tried again up to retries times, with exponential
+    backoff from retry_delay seconds; if it still fails, its rows are
+    inserted one at a time, so one bad row only loses itself.
+    """
+
+    def __init__(
+        self,
+        max_queue: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        retries: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+        session_factory=None,
+    ):
+        self.max_queue = max_queue or settings.AUDIT_WRITE_QUEUE_SIZE
+        self.batch_size = batch_size or settings.AUDIT_WRITE_BATCH_SIZE
+        self.flush_interval = (
+            settings.AUDIT_WRITE_FLUSH_INTERVAL
+            if flush_interval is None
+            else flush_interval
+        )
+        self.retries = settings.AUDIT_WRITE_RETRIES if retries is None else retries
+        self.retry_delay = (
+            settings.AUDIT_WRITE_RETRY_DELAY if retry_delay is None else retry_delay
+        )
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.written = 0
+        self.failed = 0
+        # Created on start, in the event loop that runs the writer
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def pending(self) -> int:
+        """Rows queued and not yet written."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the writer task (on startup, or on the first submit)."""
+        self._channels()
+
+    async def submit(self, row: Dict):
+        """Queue an audits row to be inserted."""
+        queue, batch_full = self._channels()
+        await queue.put(row)
+        if queue.qsize() >= self.batch_size:
+            batch_full.set()
+
+    async def stop(self):
+        """Write the queued rows and stop the writer (on shutdown)."""
+        if self._task is None or self._queue is None or self._batch_full is None:
+            return
+        self._stopping = True
+        self._batch_full.set()
+        await self._queue.put(_STOP)
+        try:
+            await self._task
+        finally:
+            self._task = self._queue = self._batch_full = None
+            self._stopping = False
+
+    def _channels(self) -> Tuple[asyncio.Queue, asyncio.Event]:
+        if self._task is None or self._queue is None or self._batch_full is None:
+            self._queue = asyncio.Queue(self.max_queue)
+            self._batch_full = asyncio.Event()
+            self._task = asyncio.create_task(self._run(self._queue, self._batch_full))
+        return self._queue, self._batch_full
+
+    async def _run(self, queue: asyncio.Queue, batch_full: asyncio.Event):
+        while True:
+            first = await queue.get()
+            if first is _STOP:
+                return
+            # Give the batch until the flush interval to fill up
+            if not self._stopping and queue.qsize() + 1 < self.batch_size:
+                try:
+                    await asyncio.wait_for(batch_full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            batch_full.clear()
+
+            batch, stopping = [first], False
+            while len(batch) < self.batch_size and not queue.empty():
+                row = queue.get_nowait()
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._insert(batch)
+            if stopping:
+                return
+
+    async def _insert(self, rows: List[Dict]):
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                await self._execute(rows)
+                self.written += len(rows)
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.warning(
+                        f"Failed to save {len(rows)} audits, saving one at a time: {e}"
+                    )
+                    break
+                logger.warning(f"Failed to save {len(rows)} audits, retrying: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        for row in rows:
+            try:
+                await self._execute([row])
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to save audit {row.get('content_hash')}: {e}")
+
+    async def _execute(self, rows: List[Dict]):
+        async with self.session_factory() as db:
+            await db.execute(insert(AuditModel), rows)
+            await db.commit()
+
+
+# Shared by the audits of the API process, on its event loop; Celery tasks
+# give their audit service a writer of their own
+audit_writer = AuditWriter()
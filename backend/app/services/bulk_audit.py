@@ -0,0 +1,384 @@
+"""Bulk crawl-and-audit pipeline for whole sites."""
+
+import asyncio
+import logging
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from lxml import etree
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.errors import ContentTooLargeError, ScoringUnavailableError
+from ..core.validation import validate_url
+from ..models.audit import Audit as AuditModel
+from .audit_service import AuditService, audit_row
+from .http_fetcher import HostLimiter
+
+logger = logging.getLogger("aieo")
+
+# Largest (uncompressed) sitemap allowed by the sitemap protocol
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+# Sitemaps are parsed without DTDs, entities or network access, and within
+# libxml2's default limits on text size and depth
+_SITEMAP_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+
+def parse_sitemap(xml: bytes) -> Tuple[List[str], List[str]]:
+    """
+    Read a sitemap or sitemap index.
+
+    Gzipped sitemaps are decompressed up to SITEMAP_MAX_BYTES only.
+
+    Returns:
+        Tuple of page URLs and nested sitemap URLs
+    """
+    if xml[:2] == b"\x1f\x8b":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        xml = decompressor.decompress(xml, SITEMAP_MAX_BYTES + 1)
+        if len(xml) > SITEMAP_MAX_BYTES:
+            raise ContentTooLargeError(
+                f"Sitemap exceeds {SITEMAP_MAX_BYTES} bytes uncompressed"
+            )
+    root = etree.fromstring(xml, _SITEMAP_PARSER)
+    pages: List[str] = []
+    sitemaps: List[str] = []
+    for loc in root.iter("{*}loc"):
+        url = (loc.text or "").strip()
+        if not url:
+            continue
+        parent = etree.QName(loc.getparent()).localname
+        (sitemaps if parent == "sitemap" else pages).append(url)
+    return pages, sitemaps
+
+
+def unique_urls(urls: Iterable[str], limit: int) -> List[str]:
+    """Distinct URLs in input order, at most limit of them."""
+    seen: Dict[str, None] = {}
+    for url in urls:
+        url = url.strip()
+        if url and url not in seen:
+            seen[url] = None
+            if len(seen) >= limit:
+                break
+    return list(seen)
+
+
+async def load_sitemap(service: AuditService, url: str, limit: int) -> List[str]:
+    """
+    Collect page URLs from a sitemap, following sitemap indexes.
+
+    Args:
+        service: Audit service whose HTTP client fetches the sitemaps
+        url: Sitemap URL
+        limit: Maximum number of page URLs
+
+    Returns:
+        Distinct page URLs in sitemap order
+    """
+    pages: List[str] = []
+    pending, seen = [url], set()
+    while pending and len(pages) < limit:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        found, nested = parse_sitemap(await fetch_sitemap(service, sitemap_url))
+        pages.extend(found)
+        for nested_url in nested:
+            # Nested sitemaps come from the site, not from the API request
+            try:
+                validate_url(nested_url)
+            except ValueError as e:
+                logger.warning(f"Skipping nested sitemap: {e}")
+                continue
+            pending.append(nested_url)
+    return unique_urls(pages, limit)
+
+
+async def fetch_sitemap(service: AuditService, url: str) -> bytes:
+    """Download a sitemap, aborting past SITEMAP_MAX_BYTES."""
+    chunks = []
+    received = 0
+    async with service.fetcher.client.stream("GET", url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > SITEMAP_MAX_BYTES:
+                raise ContentTooLargeError(
+                    f"Sitemap exceeds {SITEMAP_MAX_BYTES} bytes: {url}"
+                )
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class DomainThrottle:
+    """Space out the start of requests to each domain (politeness delay)."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next_start: Dict[str, float] = {}
+
+    async def wait(self, host: str):
+        """Wait until a request to the host may start."""
+        if self.delay <= 0:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, 0.0))
+        self._next_start[host] = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class BulkAuditJob:
+    """
+    Progress of a bulk audit, kept in Redis so it can be reported and resumed.
+
+    The job hash bulk:{job_id} holds the counters, the status and the
+    owner the job was queued for; the set bulk:{job_id}:done holds the URLs
+    whose audits were saved, which a resumed run skips. Without Redis,
+    progress is only kept in process.
+    """
+
+    def __init__(self, job_id: str, redis_client=None):
+        self.job_id = job_id
+        self.redis = redis_client
+        self.key = f"bulk:{job_id}"
+        self.done_key = f"bulk:{job_id}:done"
+        self.state: Dict = {"job_id": job_id, "status": "pending"}
+
+    async def claim(self, owner: str) -> bool:
+        """
+        Reserve the job for an owner when it is queued.
+
+        Returns:
+            Whether the job is the owner's: new, or queued by them before
+        """
+        if self.redis is None:
+            return True
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.hsetnx(self.key, "owner", owner)
+        pipeline.hsetnx(self.key, "status", "queued")
+        pipeline.expire(self.key, settings.BULK_JOB_TTL)
+        pipeline.hget(self.key, "owner")
+        stored = (await pipeline.execute())[-1]
+        return stored is not None and stored.decode("utf-8") == owner
+
+    async def owned_by(self, owner: str) -> bool:
+        """Whether the job was queued by an owner (never without Redis)."""
+        if self.redis is None:
+            return False
+        stored = await self.redis.hget(self.key, "owner")
+        return stored is not None and stored.decode("utf-8") == owner
+
+    async def completed_urls(self) -> set:
+        """URLs already audited and saved by earlier runs."""
+        if self.redis is None:
+            return set()
+        return {url.decode("utf-8") for url in await self.redis.smembers(self.done_key)}
+
+    async def start(self, total: int, completed: int):
+        """Record the start of a run."""
+        self.state.update(
+            status="running",
+            total=total,
+            completed=completed,
+            failed=0,
+            updated_at=time.time(),
+        )
+        await self._save(self.state)
+
+    async def record(self, saved: List[str], failed: int = 0):
+        """Record audits saved to the database and URLs that failed."""
+        self.state["completed"] += len(saved)
+        self.state["failed"] += failed
+        self.state["updated_at"] = time.time()
+        if self.redis is None:
+            return
+        pipeline = self.redis.pipeline(transaction=False)
+        if saved:
+            pipeline.sadd(self.done_key, *saved)
+        pipeline.hset(
+            self.key,
+            mapping={
+                "completed": self.state["completed"],
+                "failed": self.state["failed"],
+                "updated_at": self.state["updated_at"],
+            },
+        )
+        pipeline.expire(self.done_key, settings.BULK_JOB_TTL)
+        pipeline.expire(self.key, settings.BULK_JOB_TTL)
+        await pipeline.execute()
+
+    async def finish(self, status: str = "completed"):
+        """Record the end of a run."""
+        self.state.update(status=status, updated_at=time.time())
+        await self._save({"status": status, "updated_at": self.state["updated_at"]})
+
+    async def progress(self) -> Dict:
+        """Current progress, as stored in Redis when available."""
+        if self.redis is None:
+            return dict(self.state)
+        stored = await self.redis.hgetall(self.key)
+        if not stored:
+            return {"job_id": self.job_id, "status": "unknown"}
+        progress = {"job_id": self.job_id}
+        for field, value in stored.items():
+            field, value = field.decode("utf-8"), value.decode("utf-8")
+            if field == "owner":
+                continue
+            if field in ("total", "completed", "failed"):
+                value = int(value)
+            elif field == "updated_at":
+                value = float(value)
+            progress[field] = value
+        return progress
+
+    async def _save(self, fields: Dict):
+        if self.redis is None:
+            return
+        mapping = {key: value for key, value in fields.items() if key != "job_id"}
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.hset(self.key, mapping=mapping)
+        pipeline.expire(self.key, settings.BULK_JOB_TTL)
+        await pipeline.execute()
+
+
+class AuditBatchWriter:
+    """Insert audit rows in batches, one multi-row INSERT per batch."""
+
+    def __init__(self, db: Session, batch_size: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.rows: List[Dict] = []
+        self.urls: List[str] = []
+
+    def add(self, url: str, row: Dict) -> bool:
+        """Queue a row; returns whether a batch is ready to flush."""
+        self.rows.append(row)
+        self.urls.append(url)
+        return len(self.rows) >= self.batch_size
+
+    async def flush(self) -> List[str]:
+        """Insert the queued rows and return the URLs they belong to."""
+        if not self.rows:
+            return []
+        rows, urls = self.rows, self.urls
+        self.rows, self.urls = [], []
+        # The session is blocking; keep the event loop free while it runs
+        await asyncio.to_thread(self._insert, rows)
+        return urls
+
+    def _insert(self, rows: List[Dict]):
+        try:
+            self.db.execute(insert(AuditModel), rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+
+async def run_bulk_audit(
+    service: AuditService,
+    db: Session,
+    job_id: str,
+    urls: Optional[List[str]] = None,
+    sitemap_url: Optional[str] = None,
+    user_id: Optional[str] = None,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Audit many pages and save the results to the audits table.
+
+    Pages are fetched concurrently (BULK_CONCURRENCY at a time, at most
+    BULK_PER_DOMAIN_CONCURRENCY per domain, with BULK_DOMAIN_DELAY seconds
+    between request starts to a domain), scored on the service's scoring
+    pool and inserted BULK_INSERT_BATCH_SIZE rows at a time. Running the
+    same job_id again skips pages already saved.
+
+    Args:
+        service: Audit service used to fetch and score pages
+        db: Database session for the inserts
+        job_id: Job identifier, for progress and resuming
+        urls: Page URLs to audit
+        sitemap_url: Sitemap (or sitemap index) listing the pages instead
+        user_id: Optional owner of the audits
+        on_progress: Called with the progress after every saved batch
+
+    Returns:
+        Final progress dictionary
+    """
+    job = BulkAuditJob(job_id, service.redis_client)
+    if sitemap_url:
+        urls = await load_sitemap(service, sitemap_url, settings.BULK_MAX_URLS)
+    urls = unique_urls(urls or [], settings.BULK_MAX_URLS)
+
+    completed = await job.completed_urls()
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in urls:
+        if url not in completed:
+            queue.put_nowait(url)
+    await job.start(total=len(urls), completed=len(urls) - queue.qsize())
+
+    writer = AuditBatchWriter(db, settings.BULK_INSERT_BATCH_SIZE)
+    domains = HostLimiter(settings.BULK_PER_DOMAIN_CONCURRENCY)
+    throttle = DomainThrottle(settings.BULK_DOMAIN_DELAY)
+    flush_lock = asyncio.Lock()
+    failed = 0
+
+    async def save(force: bool = False):
+        nonlocal failed
+        async with flush_lock:
+            if force or len(writer.rows) >= writer.batch_size:
+                saved = await writer.flush()
+                await job.record(saved, failed)
+                failed = 0
+                if on_progress:
+                    on_progress(dict(job.state))
+
+    async def audit_page(url: str) -> Tuple[str, Dict]:
+        attempt = 0
+        while True:
+            try:
+                return await service.audit_with_hash(url=url, batch=True)
+            except ScoringUnavailableError:
+                # The scoring pool is shared with the API; back off and retry
+                if attempt == settings.BULK_SCORING_RETRIES:
+                    raise
+                await asyncio.sleep(0.1 * 2**attempt)
+                attempt += 1
+
+    async def worker():
+        nonlocal failed
+        while not queue.empty():
+            url = queue.get_nowait()
+            host = urlsplit(url).netloc
+            try:
+                async with domains.slot(host):
+                    await throttle.wait(host)
+                    content_hash, result = await audit_page(url)
+            except Exception as e:
+                logger.warning(f"Bulk audit {job_id} failed for {url}: {e}")
+                failed += 1
+                continue
+            if writer.add(url, audit_row(user_id, content_hash, url, result)):
+                await save()
+
+    concurrency = min(settings.BULK_CONCURRENCY, len(urls)) or 1
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+        await save(force=True)
+    except BaseException:
+        # Unsaved pages are audited again when the job is resumed
+        for task in workers:
+            task.cancel()
+        await job.finish("interrupted")
+        raise
+    await job.finish()
+    logger.info(f"Bulk audit {job_id} finished: {job.state}")
+    return dict(job.state)
@@ -0,0 +1,203 @@
+"""Popularity tracking, warm-up and invalidation of cached audit results."""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..core.redis_pool import get_redis
+
+logger = logging.getLogger("aieo")
+
+# Sorted set of "{format}:{content_hash}" members scored by request count
+HOT_KEY = "audit:hot"
+# Where the URL or content of an audited document is kept for re-scoring
+SOURCE_PREFIX = "audit:source:"
+# Cache key prefix of the scorer that last started
+SCORER_KEY = "audit:scorer"
+# Versioned result keys, and the unversioned keys used before them
+_RESULT_KEY = re.compile(r"audit:(?:v[^:]+:[0-9a-f]+:[a-z]+:)?[0-9a-f]{64}")
+
+
+class HotKeyTracker:
+    """
+    Count audit requests per document and flush them to Redis in batches.
+
+    Counts are kept in process and added to the HOT_KEY sorted set at most
+    once per flush interval, in one pipelined round trip, so cache hits
+    served from memory stay off the network. The set is trimmed to the
+    max_keys most requested documents. Uses the shared Redis pool unless a
+    client is given.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        flush_interval: Optional[int] = None,
+        max_keys: Optional[int] = None,
+    ):
+        self._redis = redis_client
+        self.flush_interval = (
+            settings.CACHE_HOT_FLUSH_INTERVAL
+            if flush_interval is None
+            else flush_interval
+        )
+        self.max_keys = max_keys or settings.CACHE_HOT_MAX_KEYS
+        self._counts: Counter = Counter()
+        self._last_flush = time.monotonic()
+
+    @property
+    def redis(self):
+        """Redis client the counts are flushed to."""
+        return self._redis if self._redis is not None else get_redis()
+
+    async def record(self, member: str):
+        """Count a request for a document, flushing when the interval passed."""
+        if self.redis is None:
+            return
+        self._counts[member] += 1
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            await self.flush()
+
+    async def flush(self):
+        """Add the pending counts to Redis."""
+        self._last_flush = time.monotonic()
+        redis = self.redis
+        if redis is None or not self._counts:
+            return
+        counts, self._counts = self._counts, Counter()
+        try:
+            pipeline = redis.pipeline(transaction=False)
+            for member, count in counts.items():
+                pipeline.zincrby(HOT_KEY, count, member)
+            pipeline.zremrangebyrank(HOT_KEY, 0, -self.max_keys - 1)
+            await pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Failed to record hot audits: {e}")
+
+
+async def save_source(
+    redis_client,
+    member: str,
+    url: Optional[str] = None,
+    content: Optional[str] = None,
+):
+    """
+    Keep what is needed to re-score a document: its URL, or its content.
+
+    Content over CACHE_WARMUP_MAX_SOURCE_BYTES (UTF-8 encoded) is not kept,
+    so such documents are not warmed.
+    """
+    if redis_client is None:
+        return
+    if url:
+        source = {"url": url}
+    elif (
+        content
+        and len(content.encode("utf-8")) <= settings.CACHE_WARMUP_MAX_SOURCE_BYTES
+    ):
+        source = {"content": content}
+    else:
+        return
+    try:
+        await redis_client.setex(
+            SOURCE_PREFIX + member, settings.REDIS_CACHE_TTL, json.dumps(source)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to save audit source: {e}")
+
+
+async def scorer_changed(redis_client, prefix: str) -> bool:
+    """
+    Record the running scorer's key prefix, and tell whether it changed.
+
+    Only the first process to start after an upgrade sees the change. No
+    recorded prefix counts as a change: the previous deploy may have
+    cached results under other keys without recording its scorer.
+    """
+    previous = await redis_client.getset(SCORER_KEY, prefix)
+    return previous is None or previous.decode("utf-8") != prefix
+
+
+async def warm_audit_cache(
+    service, limit: Optional[int] = None, concurrency: int = 4
+) -> Dict:
+    """
+    Re-score the most requested documents under the current cache keys.
+
+    Args:
+        service: AuditService whose cache is warmed
+        limit: Number of documents (default CACHE_WARMUP_TOP_N)
+        concurrency: Documents audited at a time
+
+    Returns:
+        Counts of warmed, already cached, skipped and failed documents
+    """
+    redis_client = service.redis_client
+    counts = {"warmed": 0, "cached": 0, "skipped": 0, "failed": 0}
+    if redis_client is None:
+        return counts
+
+    limit = limit or settings.CACHE_WARMUP_TOP_N
+    members = [
+        member.decode("utf-8")
+        for member in await redis_client.zrevrange(HOT_KEY, 0, limit - 1)
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm(member: str):
+        format, content_hash = member.split(":", 1)
+        if await redis_client.exists(service._get_cache_key(content_hash, format)):
+            counts["cached"] += 1
+            return
+        source = await redis_client.get(SOURCE_PREFIX + member)
+        if not source:
+            counts["skipped"] += 1
+            return
+        source = json.loads(source)
+        async with semaphore:
+            try:
+                await service.audit(
+                    url=source.get("url"), content=source.get("content"), format=format
+                )
+                counts["warmed"] += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm audit {member}: {e}")
+                counts["failed"] += 1
+
+    await asyncio.gather(*(warm(member) for member in members))
+    logger.info(f"Audit cache warm-up: {counts}")
+    return counts
+
+
+async def invalidate_stale_results(
+    redis_client, prefix: str, batch_size: int = 500
+) -> int:
+    """
+    Delete cached audit results not keyed by the current scorer.
+
+    Args:
+        redis_client: Redis client
+        prefix: Cache key prefix of the current scorer
+        batch_size: Keys scanned and deleted per round trip
+
+    Returns:
+        Number of deleted keys
+    """
+    deleted = 0
+    stale = []
+    async for key in redis_client.scan_iter(match="audit:*", count=batch_size):
+        key = key.decode("utf-8")
+        if _RESULT_KEY.fullmatch(key) and not key.startswith(prefix + ":"):
+            stale.append(key)
+        if len(stale) >= batch_size:
+            deleted += await redis_client.unlink(*stale)
+            stale = []
+    if stale:
+        deleted += await redis_client.unlink(*stale)
+    logger.info(f"Deleted {deleted} stale audit results")
+    return deleted
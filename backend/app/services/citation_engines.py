@@ -0,0 +1,307 @@
+"""Adapters that ask AI engines a prompt and report the URLs they cite."""
+
+import asyncio
+import hashlib
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from ..core.config import settings
+from .citation_extraction import CitationIndex, normalize_url
+from .probe_scheduler import EngineRateLimitedError, ProbeError
+
+
+@dataclass
+class EngineAnswer:
+    """An engine's answer to a prompt."""
+
+    text: str
+    # Sources the engine cited, in citation order
+    cited_urls: List[str] = field(default_factory=list)
+
+
+class EngineAdapter:
+    """
+    Base class of citation engine adapters.
+
+    Subclasses implement ask(); probe() turns the answer into a citation of
+    the probed URL. Errors are raised as ProbeError (EngineRateLimitedError
+    for rate limiting) so the probe scheduler can retry them.
+    """
+
+    name = ""
+
+    async def ask(self, prompt: str) -> EngineAnswer:
+        """Ask the engine a prompt."""
+        raise NotImplementedError
+
+    async def probe(
+        self, prompt: str, url: str, index: Optional[CitationIndex] = None
+    ) -> Optional[Dict]:
+        """
+        Ask a prompt and check whether the answer cites the URL.
+
+        Args:
+            prompt: Prompt to ask
+            url: URL to look for in the answer
+            index: Tracked URLs of the probe round, url included (default:
+                an index of url alone)
+
+        Returns:
+            Citation dictionary, or None when the URL is not cited
+        """
+        return self.match(await self.ask(prompt), prompt, url, index)
+
+    def match(
+        self,
+        answer: EngineAnswer,
+        prompt: str,
+        url: str,
+        index: Optional[CitationIndex] = None,
+    ) -> Optional[Dict]:
+        """Citation of the URL in an answer, if any."""
+        if index is None:
+            index = CitationIndex([url])
+        normalized = normalize_url(url)
+        for match in index.extract(answer.text, answer.cited_urls):
+            # The index may track other pages cited by the same answer
+            if match.kind != "url" or normalize_url(match.tracked) != normalized:
+                continue
+            return {
+                "url": url,
+                "engine": self.name,
+                "prompt": prompt,
+                "citation_text": match.citation_text,
+                "position": match.position,
+                "confidence": 1.0,
+            }
+        return None
+
+    async def close(self):
+        """Release connections (on shutdown)."""
+
+
+class HTTPEngineAdapter(EngineAdapter):
+    """Adapter calling an engine's HTTP API over a pooled client."""
+
+    base_url = ""
+
+    def __init__(self, api_key: Optional[str], transport=None):
+        self.api_key = api_key
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The adapter's client, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers(),
+                timeout=settings.CITATION_PROBE_TIMEOUT,
+                transport=self.transport,
+            )
+        return self._client
+
+    def headers(self) -> Dict[str, str]:
+        """Authentication headers."""
+        return {}
+
+    async def post(self, path: str, body: Dict) -> Dict:
+        """POST a request, mapping failures to probe errors."""
+        if not self.api_key:
+            raise ProbeError(f"No API key configured for {self.name}", retryable=False)
+        try:
+            response = await self.client.post(path, json=body)
+        except httpx.TimeoutException:
+            raise ProbeError(f"{self.name} request timed out")
+        except httpx.HTTPError as e:
+            raise ProbeError(f"{self.name} request failed: {e}")
+
+        if response.status_code == 429:
+            raise EngineRateLimitedError(
+                f"{self.name} rate limit exceeded",
+                _retry_after(response.headers.get("Retry-After")),
+            )
+        if response.status_code >= 400:
+            # Server errors are transient; client errors will not go away
+            raise ProbeError(
+                f"{self.name} returned HTTP {response.status_code}",
+                retryable=response.status_code >= 500,
+            )
+        return response.json()
+
+    async def close(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+
+class GrokAdapter(HTTPEngineAdapter):
+    """Grok, through the xAI chat completions API with live search."""
+
+    name = "grok"
+
+    def __init__(self, api_key: Optional[str] = None, transport=None):
+        super().__init__(api_key or settings.XAI_API_KEY, transport)
+        self.base_url = settings.XAI_BASE_URL
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    async def ask(self, prompt: str) -> EngineAnswer:
+        data = await self.post(
+            "/chat/completions",
+            {
+                "model": settings.GROK_PROBE_MODEL,
+                "messages": [{"role": "user", "content": prompt}],
+                "search_parameters": {"mode": "on", "return_citations": True},
+            },
+        )
+        return EngineAnswer(
+            text=data["choices"][0]["message"]["content"] or "",
+            cited_urls=list(data.get("citations") or []),
+        )
+
+
+class ClaudeAdapter(HTTPEngineAdapter):
+    """Claude, through the Anthropic Messages API with web search."""
+
+    name = "claude"
+
+    def __init__(self, api_key: Optional[str] = None, transport=None):
+        super().__init__(api_key or settings.ANTHROPIC_API_KEY, transport)
+        self.base_url = settings.ANTHROPIC_BASE_URL
+
+    def headers(self) -> Dict[str, str]:
+        return {"x-api-key": self.api_key or "", "anthropic-version": "2023-06-01"}
+
+    async def ask(self, prompt: str) -> EngineAnswer:
+        data = await self.post(
+            "/v1/messages",
+            {
+                "model": settings.CLAUDE_PROBE_MODEL,
+                "max_tokens": 1024,
+                "messages": [{"role": "user", "content": prompt}],
+                "tools": [
+                    {"type": "web_search_20250305", "name": "web_search", "max_uses": 3}
+                ],
+            },
+        )
+        texts, cited_urls = [], []
+        for block in data.get("content", []):
+            if block.get("type") != "text":
+                continue
+            texts.append(block.get("text", ""))
+            for citation in block.get("citations") or []:
+                if citation.get("url") and citation["url"] not in cited_urls:
+                    cited_urls.append(citation["url"])
+        return EngineAnswer(text="".join(texts), cited_urls=cited_urls)
+
+
+class MockEngine(EngineAdapter):
+    """
+    Synthetic engine for load tests, answering without any network access.
+
+    The probed URL is cited for a citation_rate share of prompts, chosen by
+    a hash of (engine, prompt, url) so repeated runs agree. Latency follows
+    a log-normal distribution around latency_ms (latency_sigma 0 makes it
+    fixed), and error_rate of the probes fail as rate limited.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        citation_rate: Optional[float] = None,
+        latency_ms: Optional[float] = None,
+        latency_sigma: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        self.name = name
+        self.citation_rate = (
+            settings.CITATION_MOCK_CITATION_RATE
+            if citation_rate is None
+            else citation_rate
+        )
+        self.latency_ms = (
+            settings.CITATION_MOCK_LATENCY_MS if latency_ms is None else latency_ms
+        )
+        self.latency_sigma = (
+            settings.CITATION_MOCK_LATENCY_SIGMA
+            if latency_sigma is None
+            else latency_sigma
+        )
+        self.error_rate = (
+            settings.CITATION_MOCK_ERROR_RATE if error_rate is None else error_rate
+        )
+        self.random = random.Random(seed)
+        self.requests = 0
+
+    def latency(self) -> float:
+        """Seconds the next answer takes."""
+        if self.latency_ms <= 0:
+            return 0.0
+        seconds = self.latency_ms / 1000
+        if self.latency_sigma <= 0:
+            return seconds
+        return self.random.lognormvariate(math.log(seconds), self.latency_sigma)
+
+    def cites(self, prompt: str, url: str) -> bool:
+        """Whether answers to the prompt cite the URL."""
+        digest = hashlib.sha1(f"{self.name}:{prompt}:{url}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2**32 < self.citation_rate
+
+    async def answer(self, prompt: str, url: Optional[str] = None) -> EngineAnswer:
+        """Synthetic answer, citing the URL when cites() says so."""
+        self.requests += 1
+        await asyncio.sleep(self.latency())
+        if self.random.random() < self.error_rate:
+            raise EngineRateLimitedError(f"{self.name} rate limit exceeded", 0.1)
+        sources = [f"https://source{i}.example.org/{self.name}" for i in range(3)]
+        if url and self.cites(prompt, url):
+            sources.insert(self.random.randrange(len(sources) + 1), url)
+        text = f"Answer to '{prompt}'. " + " ".join(
+            f"According to {source}, this matters [{i}]."
+            for i, source in enumerate(sources, start=1)
+        )
+        return EngineAnswer(text=text, cited_urls=sources)
+
+    async def ask(self, prompt: str) -> EngineAnswer:
+        return await self.answer(prompt)
+
+    async def probe(
+        self, prompt: str, url: str, index: Optional[CitationIndex] = None
+    ) -> Optional[Dict]:
+        return self.match(await self.answer(prompt, url), prompt, url, index)
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds of a Retry-After header; HTTP dates are ignored."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# Adapter factories by engine name; each reads its API key from settings
+ENGINE_ADAPTERS: Dict[str, Callable[[], EngineAdapter]] = {
+    "grok": GrokAdapter,
+    "claude": ClaudeAdapter,
+}
+
+
+def create_engine(name: str) -> EngineAdapter:
+    """
+    Adapter for an engine of CITATION_DETECTION_ENGINES.
+
+    Every engine is a MockEngine when CITATION_MOCK_ENGINES is set.
+    """
+    if settings.CITATION_MOCK_ENGINES:
+        return MockEngine(name)
+    if name not in ENGINE_ADAPTERS:
+        raise ValueError(f"Unknown citation engine: {name}")
+    return ENGINE_ADAPTERS[name]()
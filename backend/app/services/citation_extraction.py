@@ -0,0 +1,257 @@
+"""Find tracked URLs and domains cited in engine answers."""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from ..core.config import settings
+
+# Query parameters that only track the visit and never change the page
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_hsenc",
+    "_hsmi",
+    "ref",
+    "ref_src",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+# URLs with or without a scheme, and bare domains, as they appear in text.
+# Brackets, quotes and angle brackets end a URL, so markdown and HTML links
+# yield the URL alone; the lookbehind skips e-mail addresses and subwords.
+_URL_TOKEN = re.compile(
+    r"(?<![\w@.-])"
+    r"(?:https?://)?"
+    r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}"
+    r"(?::\d{1,5})?"
+    r"(?:[/?#][^\s<>\"'()\[\]{}]*)?",
+    re.IGNORECASE,
+)
+# Sentence punctuation glued to the end of a URL in prose
+_TRAILING = ".,;:!?*_~"
+
+
+def normalize_domain(domain: str) -> str:
+    """Lowercase host without a leading www."""
+    domain = domain.strip().lower().rstrip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for matching.
+
+    Scheme, www, default ports, fragments, trailing slashes and tracking
+    parameters are dropped, the host is lowercased and the remaining query
+    parameters are sorted, so every spelling of a page maps to one key.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url.lower()
+    host = normalize_domain(parts.hostname or "")
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    normalized = host + parts.path.rstrip("/")
+    if query:
+        normalized += "?" + urlencode(sorted(query))
+    return normalized
+
+
+@dataclass
+class CitationMatch:
+    """A tracked URL or domain cited in an answer."""
+
+    # Tracked URL (or domain) as registered in the index
+    tracked: str
+    # "url" for the page itself, "domain" for another page of a tracked domain
+    kind: str
+    # The URL as the answer cited it
+    cited_url: str
+    # 1-based rank among the distinct sources the answer cites
+    position: int
+    # Character offset in the answer text; None when only listed as a source
+    offset: Optional[int]
+    # Answer text around the citation
+    citation_text: str
+
+
+class CitationIndex:
+    """
+    Index of tracked URLs and domains, matched against answers in one pass.
+
+    Tracked URLs are kept by normalized form and domains by host, in hash
+    maps. An answer is scanned once for URL-like tokens, and each token
+    costs one URL lookup plus one lookup per host label, so matching time
+    depends on the answer length only, not on how many URLs are tracked.
+    """
+
+    def __init__(self, urls: Iterable[str] = (), domains: Iterable[str] = ()):
+        self.urls: Dict[str, str] = {}
+        self.domains: Dict[str, str] = {}
+        for url in urls:
+            self.add_url(url)
+        for domain in domains:
+            self.add_domain(domain)
+
+    def __len__(self) -> int:
+        return len(self.urls) + len(self.domains)
+
+    def add_url(self, url: str):
+        """Track a page."""
+        self.urls.setdefault(normalize_url(url), url)
+
+    def add_domain(self, domain: str):
+        """Track every page of a domain and its subdomains."""
+        self.domains.setdefault(normalize_domain(domain), domain)
+
+    def lookup(self, cited_url: str) -> Optional[Tuple[str, str]]:
+        """Tracked URL or domain a cited URL belongs to, with the match kind."""
+        normalized = normalize_url(cited_url)
+        tracked = self.urls.get(normalized)
+        if tracked is not None:
+            return tracked, "url"
+        if self.domains:
+            host = normalized.split("/", 1)[0].split("?", 1)[0].split(":", 1)[0]
+            labels = host.split(".")
+            for i in range(len(labels) - 1):
+                tracked = self.domains.get(".".join(labels[i:]))
+                if tracked is not None:
+                    return tracked, "domain"
+        return None
+
+    def extractor(self, cited_urls: Iterable[str] = ()) -> "CitationExtractor":
+        """Extractor for an answer streamed in chunks."""
+        return CitationExtractor(self, cited_urls)
+
+    def extract(self, text: str, cited_urls: Iterable[str] = ()) -> List[CitationMatch]:
+        """
+        Tracked URLs and domains cited in an answer.
+
+        Args:
+            text: Answer text
+            cited_urls: Sources the engine listed, in its order
+
+        Returns:
+            One match per cited source that is tracked, by position
+        """
+        extractor = self.extractor(cited_urls)
+        extractor.feed(text)
+        return extractor.close()
+
+
+class CitationExtractor:
+    """
+    Incremental citation matching over an answer arriving in chunks.
+
+    Text is scanned up to the last whitespace of what has arrived, so a
+    URL split across chunks is matched once it is complete; surrounding
+    text is cut when the answer ends.
+    """
+
+    def __init__(self, index: CitationIndex, cited_urls: Iterable[str] = ()):
+        self.index = index
+        self.context = settings.CITATION_CONTEXT_CHARS
+        self._pieces: List[str] = []
+        self._scanned = 0
+        self._tail = ""
+        # normalized source -> [position, cited URL, offset or None, length]
+        self._sources: Dict[str, list] = {}
+        for url in cited_urls:
+            self._add_source(url, None)
+
+    def _add_source(self, cited_url: str, offset: Optional[int]):
+        normalized = normalize_url(cited_url)
+        source = self._sources.get(normalized)
+        if source is None:
+            self._sources[normalized] = [
+                len(self._sources) + 1,
+                cited_url,
+                offset,
+                len(cited_url),
+            ]
+        elif source[2] is None and offset is not None:
+            # A listed source also mentioned in the text
+            source[2], source[3] = offset, len(cited_url)
+
+    def _scan(self, text: str, start: int):
+        for token in _URL_TOKEN.finditer(text):
+            url = token.group().rstrip(_TRAILING)
+            self._add_source(url, start + token.start())
+
+    def feed(self, chunk: str):
+        """Add the next part of the answer."""
+        self._tail += chunk
+        cut = max(self._tail.rfind(" "), self._tail.rfind("\n"))
+        if cut < 0:
+            return
+        complete, self._tail = self._tail[:cut], self._tail[cut:]
+        self._scan(complete, self._scanned)
+        self._pieces.append(complete)
+        self._scanned += len(complete)
+
+    def close(self) -> List[CitationMatch]:
+        """Finish the answer and return the tracked sources it cites."""
+        self._scan(self._tail, self._scanned)
+        self._pieces.append(self._tail)
+        text = "".join(self._pieces)
+
+        matches = []
+        for position, cited_url, offset, length in self._sources.values():
+            found = self.index.lookup(cited_url)
+            if found is None:
+                continue
+            matches.append(
+                CitationMatch(
+                    tracked=found[0],
+                    kind=found[1],
+                    cited_url=cited_url,
+                    position=position,
+                    offset=offset,
+                    citation_text=self._surrounding(text, offset, length),
+                )
+            )
+        return matches
+
+    def _surrounding(self, text: str, offset: Optional[int], length: int) -> str:
+        """Text around a citation, trimmed to whole words."""
+        if offset is None:
+            # Listed as a source only: the opening of the answer
+            if len(text) <= 2 * self.context:
+                return text.strip()
+            return _trim_words(text[: 2 * self.context], left=False).strip()
+        start = max(offset - self.context, 0)
+        end = offset + length + self.context
+        snippet = text[start:end]
+        if start > 0:
+            snippet = _trim_words(snippet, left=True)
+        if end < len(text):
+            snippet = _trim_words(snippet, left=False)
+        return snippet.strip()
+
+
+def _trim_words(snippet: str, left: bool) -> str:
+    """Drop the partial word at one end of a snippet."""
+    if left:
+        cut = snippet.find(" ")
+        return snippet[cut + 1 :] if cut >= 0 else snippet
+    cut = snippet.rfind(" ")
+    return snippet[:cut] if cut >= 0 else snippet
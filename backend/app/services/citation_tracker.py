@@ -1,18 +1,63 @@
 """Citation tracking service."""
 
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import base64
+import binascii
+import hashlib
+import logging
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from sqlalchemy import (
+    Integer,
+    column,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    table,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from qdrant_client import QdrantClient
 
 from ..core.config import settings
-from ..models.citation import Citation
+from ..models.audit import Audit
+from ..models.citation import Citation, CitationDedupeKey
+from .citation_engines import EngineAdapter, create_engine
+from .citation_extraction import CitationIndex
+from .probe_scheduler import ProbeError, ProbeReport, ProbeScheduler
+
+logger = logging.getLogger("aieo")
+
+# TimescaleDB continuous aggregate of citations per day, URL and engine
+DAILY_VIEW = "citations_daily"
+
+# INSERT constructs supporting ON CONFLICT DO NOTHING, by dialect
+_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
 
 
 class CitationTracker:
     """Service for tracking citations across AI engines."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        scheduler: Optional[ProbeScheduler] = None,
+        engines: Optional[Dict[str, EngineAdapter]] = None,
+    ):
+        self.scheduler = scheduler or ProbeScheduler(self._probe_engine)
+        # Adapters by engine name, created on first use unless given
+        self.engines: Dict[str, EngineAdapter] = dict(engines or {})
+        # URLs probed by this tracker, matched against every answer at once
+        self.index = CitationIndex()
+        # Whether the citations_daily aggregate exists, checked on first use
+        self._has_daily_view: Optional[bool] = None
         self.qdrant_client = (
             QdrantClient(
                 url=settings.QDRANT_URL,
@@ -39,131 +84,425 @@ class CitationTracker:
         Returns:
             List of detected citations
         """
-        if not engines:
-            engines = settings.CITATION_DETECTION_ENGINES
+        return (await self.probe(url, prompts, engines)).citations
+
+    async def probe(
+        self,
+        url: str,
+        prompts: List[str],
+        engines: List[str] = None,
+    ) -> ProbeReport:
+        """
+        Probe AI engines concurrently, reporting citations and failed probes.
 
-        citations = []
+        Probes run within each engine's concurrency and rate limits, with
+        retries; see ProbeScheduler. Answers of every engine are matched
+        against one index of the URLs this tracker probes.
 
-        for engine in engines:
-            for prompt in prompts:
-                try:
-                    citation = await self._probe_engine(engine, prompt, url)
-                    if citation:
-                        citations.append(citation)
-                except Exception as e:
-                    # Log error but continue
-                    print(f"Error probing {engine}: {e}")
+        Args:
+            url: URL to check citations for
+            prompts: List of prompts to test
+            engines: List of engines to probe (default: from config)
 
-        return citations
+        Returns:
+            Citations found and errors of the probes that failed
+        """
+        if not engines:
+            engines = settings.CITATION_DETECTION_ENGINES
+
+        self.index.add_url(url)
+        report = ProbeReport.from_results(
+            await self.scheduler.run(url, prompts, engines)
+        )
+        if report.errors:
+            logger.warning(
+                f"{len(report.errors)} of {report.probes} citation probes "
+                f"for {url} failed"
+            )
+        return report
 
     async def _probe_engine(self, engine: str, prompt: str, url: str) -> Optional[Dict]:
         """
         Probe a single engine with a prompt.
 
-        Note: Actual implementation requires:
-        1. API access to each engine (or web scraping with ToS compliance)
-        2. Response parsing to detect citations
-        3. URL matching logic
+        Returns:
+            Citation of the URL, or None when the answer does not cite it
+        """
+        if engine not in self.engines:
+            try:
+                self.engines[engine] = create_engine(engine)
+            except ValueError as e:
+                raise ProbeError(str(e), retryable=False)
+        return await self.engines[engine].probe(prompt, url, self.index)
+
+    async def close(self):
+        """Close the engine adapters' connections."""
+        for adapter in self.engines.values():
+            await adapter.close()
 
-        For MVP, this is a placeholder that would be implemented based on:
-        - Engine API availability
-        - Legal/ToS compliance
-        - Partnership agreements
+    def store_citations(
+        self, db: Session, citations: List[Dict], batch_size: Optional[int] = None
+    ) -> Dict:
         """
-        # Placeholder implementation
-        # In production, this would:
-        # 1. Send prompt to engine API (if available)
-        # 2. Parse response for citations
-        # 3. Check if URL is cited
-        # 4. Extract citation text and position
-
-        # Example structure for when implemented:
-        # try:
-        #     response = await engine_client.query(prompt)
-        #     citations = parse_citations(response, url)
-        #     return citations[0] if citations else None
-        # except Exception as e:
-        #     logger.error(f"Error probing {engine}: {e}")
-        #     return None
-
-        return None
-
-    def store_citations(self, db: Session, citations: List[Dict]):
-        """Store citations in database."""
-        for citation_data in citations:
-            citation = Citation(
-                url=citation_data["url"],
-                domain=self._extract_domain(citation_data["url"]),
-                engine=citation_data["engine"],
-                prompt=citation_data["prompt"],
-                prompt_category=citation_data.get("prompt_category"),
-                citation_text=citation_data["citation_text"],
-                position=citation_data.get("position"),
-                confidence=citation_data.get("confidence", 1.0),
-                detected_at=datetime.utcnow(),
-                verified=False,
-            )
-            db.add(citation)
+        Store citations in database, in multi-row INSERT batches.
 
+        Citations of the same URL, engine and prompt detected within one
+        CITATION_DEDUPE_BUCKET window are stored once, whether the earlier
+        one is in this call or already in the table. Each batch first claims
+        the dedupe keys of its rows (INSERT ... ON CONFLICT DO NOTHING into
+        citation_dedupe_keys), then inserts only the rows whose key it
+        claimed, in the same transaction, so that several workers storing
+        the same citations at once insert them once.
+
+        Args:
+            db: Database session
+            citations: Citation dictionaries (detected_at defaults to now)
+            batch_size: Rows per INSERT (default CITATION_INSERT_BATCH_SIZE)
+
+        Returns:
+            Counts of inserted and duplicate rows, and the insert rate
+        """
+        batch_size = batch_size or settings.CITATION_INSERT_BATCH_SIZE
+        start = time.perf_counter()
+        now = datetime.utcnow()
+        claim = claim_dedupe_keys(db.get_bind().dialect.name)
+        seen = set()
+        inserted = duplicates = 0
+
+        for offset in range(0, len(citations), batch_size):
+            batch = {}
+            for citation_data in citations[offset : offset + batch_size]:
+                row = citation_row(citation_data, now)
+                key = dedupe_key(row)
+                if key in seen:
+                    duplicates += 1
+                else:
+                    seen.add(key)
+                    batch[key] = row
+            if not batch:
+                continue
+            try:
+                claimed = db.execute(
+                    claim,
+                    [
+                        {"dedupe_bucket": bucket, "key_hash": key_hash}
+                        for bucket, key_hash in batch
+                    ],
+                ).all()
+                rows = [batch[tuple(key)] for key in claimed]
+                if rows:
+                    db.execute(insert(Citation), rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            inserted += len(rows)
+            duplicates += len(batch) - len(rows)
+
+        # Keys are kept CITATION_DEDUPE_KEY_DAYS: a detection stored later
+        # than that is not checked against earlier ones
+        expired = detected_bucket(
+            now - timedelta(days=settings.CITATION_DEDUPE_KEY_DAYS)
+        )
+        db.execute(
+            delete(CitationDedupeKey).where(CitationDedupeKey.dedupe_bucket < expired)
+        )
         db.commit()
 
-    def get_citations(
+        elapsed = time.perf_counter() - start
+        report = {
+            "inserted": inserted,
+            "duplicates": duplicates,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(inserted / elapsed) if elapsed else 0,
+        }
+        logger.info(f"Stored citations: {report}")
+        return report
+
+    async def get_citations(
         self,
-        db: Session,
+        db: AsyncSession,
         url: Optional[str] = None,
         domain: Optional[str] = None,
         engine: Optional[str] = None,
         days: int = 30,
     ) -> List[Citation]:
         """Get citations from database."""
-        query = db.query(Citation)
+        citations = await db.scalars(
+            select(Citation)
+            .where(*self._citation_filters(url, domain, engine, days))
+            .order_by(Citation.detected_at.desc())
+        )
+        return list(citations)
+
+    async def get_citations_page(
+        self,
+        db: AsyncSession,
+        url: Optional[str] = None,
+        domain: Optional[str] = None,
+        engine: Optional[str] = None,
+        days: int = 30,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Citation], Optional[str]]:
+        """
+        Get one page of citations, newest first.
+
+        Pages are keyset-paginated on (detected_at, id): the cursor holds
+        the last row of the previous page and becomes a WHERE predicate, so
+        every page costs the same however deep it is.
+
+        Args:
+            db: Database session
+            url: Filter by URL
+            domain: Filter by domain
+            engine: Filter by engine
+            days: Days of history
+            limit: Citations per page
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Citations of the page, and the cursor of the next page (None on
+            the last page)
 
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        filters = self._citation_filters(url, domain, engine, days)
+        if cursor:
+            detected_at, citation_id = decode_cursor(cursor)
+            filters.append(
+                tuple_(Citation.detected_at, Citation.id) < (detected_at, citation_id)
+            )
+        # One extra row tells whether another page follows
+        citations = list(
+            await db.scalars(
+                select(Citation)
+                .where(*filters)
+                .order_by(Citation.detected_at.desc(), Citation.id.desc())
+                .limit(limit + 1)
+            )
+        )
+        if len(citations) <= limit:
+            return citations, None
+        citations = citations[:limit]
+        last = citations[-1]
+        return citations, encode_cursor(last.detected_at, last.id)
+
+    async def count_citations(
+        self,
+        db: AsyncSession,
+        url: Optional[str] = None,
+        domain: Optional[str] = None,
+        engine: Optional[str] = None,
+        days: int = 30,
+    ) -> int:
+        """Number of citations matching the filters."""
+        return await db.scalar(
+            select(func.count())
+            .select_from(Citation)
+            .where(*self._citation_filters(url, domain, engine, days))
+        )
+
+    def _citation_filters(
+        self,
+        url: Optional[str],
+        domain: Optional[str],
+        engine: Optional[str],
+        days: int,
+    ) -> List:
+        filters = [Citation.detected_at >= datetime.utcnow() - timedelta(days=days)]
         if url:
-            query = query.filter(Citation.url == url)
+            filters.append(Citation.url == url)
         if domain:
-            query = query.filter(Citation.domain == domain)
+            filters.append(Citation.domain == domain)
         if engine:
-            query = query.filter(Citation.engine == engine)
-
-        # Filter by date
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(Citation.detected_at >= cutoff_date)
-
-        return query.order_by(Citation.detected_at.desc()).all()
-
-    def get_dashboard_data(self, db: Session, user_id: Optional[str] = None) -> Dict:
-        """Get dashboard aggregation data."""
-        # Get citations from last 30 days
-        citations = self.get_citations(db, days=30)
-
-        # Aggregate by engine
-        by_engine = {}
-        for citation in citations:
-            engine = citation.engine
-            by_engine[engine] = by_engine.get(engine, 0) + 1
-
-        # Top cited pages
-        url_counts = {}
-        for citation in citations:
-            url = citation.url
-            url_counts[url] = url_counts.get(url, 0) + 1
-
-        top_cited = [
-            {"url": url, "count": count}
-            for url, count in sorted(
-                url_counts.items(), key=lambda x: x[1], reverse=True
-            )[:10]
-        ]
+            filters.append(Citation.engine == engine)
+        return filters
+
+    async def get_dashboard_data(
+        self, db: AsyncSession, user_id: Optional[str] = None, days: int = 30
+    ) -> Dict:
+        """
+        Get dashboard aggregation data.
+
+        Counts are aggregated in SQL: from the citations_daily continuous
+        aggregate when TimescaleDB provides it (a row per day, URL and
+        engine, so the cost does not depend on citation volume), otherwise
+        with GROUP BY over the citations table.
+
+        Args:
+            db: Database session
+            user_id: Only count citations of URLs the user has audited
+            days: Days of history, including today
+
+        Returns:
+            Daily citation counts, totals by engine and top cited pages
+        """
+        source = await self._dashboard_source(db)
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        filters = [source.time >= today - timedelta(days=days - 1)]
+        if user_id:
+            filters.append(
+                source.url.in_(
+                    select(Audit.url)
+                    .where(
+                        Audit.user_id == uuid.UUID(str(user_id)),
+                        Audit.url.isnot(None),
+                    )
+                    .distinct()
+                )
+            )
+
+        # Daily counts per engine give both the time series and the totals
+        citation_rate: Dict[str, Dict] = {}
+        by_engine: Dict[str, int] = {}
+        daily = await db.execute(
+            select(source.day, source.engine, source.count)
+            .where(*filters)
+            .group_by(source.day, source.engine)
+            .order_by(source.day)
+        )
+        for day, engine, count in daily:
+            date = day if isinstance(day, str) else day.strftime("%Y-%m-%d")
+            point = citation_rate.setdefault(
+                date, {"date": date, "citations": 0, "by_engine": {}}
+            )
+            point["citations"] += count
+            point["by_engine"][engine] = count
+            by_engine[engine] = by_engine.get(engine, 0) + count
+
+        count = source.count.label("count")
+        top_cited = await db.execute(
+            select(source.url, count)
+            .where(*filters)
+            .group_by(source.url)
+            .order_by(count.desc(), source.url)
+            .limit(10)
+        )
 
         return {
-            "citation_rate": [],  # Placeholder for time series
+            "citation_rate": list(citation_rate.values()),
             "by_engine": by_engine,
-            "top_cited_pages": top_cited,
+            "top_cited_pages": [
+                {"url": url, "count": count} for url, count in top_cited
+            ],
         }
 
-    def _extract_domain(self, url: str) -> str:
-        """Extract domain from URL."""
-        from urllib.parse import urlparse
+    async def _dashboard_source(self, db: AsyncSession) -> "DashboardSource":
+        """Columns the dashboard aggregates, on the daily view when present."""
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            day = func.date(Citation.detected_at)
+            return DashboardSource(
+                day, Citation.url, Citation.engine, func.count(), Citation.detected_at
+            )
+
+        if self._has_daily_view is None:
+            self._has_daily_view = await db.run_sync(
+                lambda session: inspect(session.connection()).has_table(DAILY_VIEW)
+            )
+        if self._has_daily_view:
+            view = table(
+                DAILY_VIEW,
+                column("day"),
+                column("url"),
+                column("engine"),
+                column("citations"),
+            )
+            return DashboardSource(
+                view.c.day,
+                view.c.url,
+                view.c.engine,
+                func.sum(view.c.citations).cast(Integer),
+                view.c.day,
+            )
+        day = func.date_trunc("day", Citation.detected_at)
+        return DashboardSource(
+            day, Citation.url, Citation.engine, func.count(), Citation.detected_at
+        )
+
+
+@lru_cache(maxsize=65536)
+def extract_domain(url: str) -> str:
+    """Extract domain from URL."""
+    return urlsplit(url).netloc or url
+
+
+def encode_cursor(detected_at: datetime, citation_id: uuid.UUID) -> str:
+    """Opaque page cursor pointing after a citation."""
+    raw = f"{detected_at.isoformat()}|{citation_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Position a cursor points after; raises ValueError if it is invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        detected_at, citation_id = raw.decode("utf-8").split("|")
+        return datetime.fromisoformat(detected_at), uuid.UUID(citation_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Invalid pagination cursor")
+
+
+class DashboardSource(NamedTuple):
+    """Columns of daily citation counts: raw rows or the daily aggregate."""
+
+    day: Any
+    url: Any
+    engine: Any
+    # Citations of a group
+    count: Any
+    # Time column the history window filters on
+    time: Any
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def detected_bucket(detected_at: datetime) -> int:
+    """Index of the CITATION_DEDUPE_BUCKET window a detection falls in."""
+    if detected_at.tzinfo is not None:
+        detected_at = detected_at.astimezone(timezone.utc).replace(tzinfo=None)
+    seconds = (detected_at - _EPOCH).total_seconds()
+    return int(seconds // settings.CITATION_DEDUPE_BUCKET)
+
+
+def dedupe_key(row: Dict) -> Tuple[int, str]:
+    """Citations with the same key are stored once: window and key hash."""
+    key = "\x00".join((row["url"], row["engine"], row["prompt"]))
+    return (
+        detected_bucket(row["detected_at"]),
+        hashlib.sha256(key.encode("utf-8")).hexdigest(),
+    )
+
+
+def claim_dedupe_keys(dialect: str):
+    """
+    INSERT of dedupe keys that skips keys already claimed.
+
+    Returns the keys it inserted: citations with those keys are new.
+    """
+    if dialect not in _CONFLICT_INSERTS:
+        raise ValueError(f"Citation storage is not supported on {dialect}")
+    return (
+        _CONFLICT_INSERTS[dialect](CitationDedupeKey)
+        .on_conflict_do_nothing(index_elements=["dedupe_bucket", "key_hash"])
+        .returning(CitationDedupeKey.dedupe_bucket, CitationDedupeKey.key_hash)
+    )
+
 
-        parsed = urlparse(url)
-        return parsed.netloc or url
+def citation_row(citation_data: Dict, detected_at: datetime) -> Dict:
+    """Column values of the citations row for a detected citation."""
+    return {
+        "url": citation_data["url"],
+        "domain": extract_domain(citation_data["url"]),
+        "engine": citation_data["engine"],
+        "prompt": citation_data["prompt"],
+        "prompt_category": citation_data.get("prompt_category"),
+        "citation_text": citation_data["citation_text"],
+        "position": citation_data.get("position"),
+        "confidence": citation_data.get("confidence", 1.0),
+        "detected_at": citation_data.get("detected_at") or detected_at,
+        "verified": False,
+    }
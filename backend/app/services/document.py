@@ -0,0 +1,74 @@
+"""Parsed document model shared by the scoring passes."""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field, fields
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+_SENTENCE_PATTERN = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+
+
+@dataclass(eq=False)
+class ParsedDocument:
+    """
+    Structured view of a parsed document.
+
+    Built once by ContentParser. Derived views (lowercased text, tokens, word
+    frequencies, sentence spans) are computed on first access and cached, so
+    every scorer shares the same work.
+    """
+
+    text: str
+    headers: List[Dict]
+    tables: List[Dict]
+    lists: List[Dict]
+    links: List[Dict]
+    word_count: int
+    char_count: int
+    content_hash: str
+    pattern_counts: Optional[Dict[str, Dict[str, int]]] = field(
+        default=None, repr=False
+    )
+    entities: Optional[List[str]] = field(default=None, repr=False)
+
+    @cached_property
+    def lower_text(self) -> str:
+        """Lowercased document text."""
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Whitespace-delimited tokens of the lowercased text."""
+        return self.lower_text.split()
+
+    @cached_property
+    def word_frequencies(self) -> Counter:
+        """Occurrence count of each lowercased token."""
+        return Counter(self.tokens)
+
+    @cached_property
+    def sentences(self) -> List[Tuple[int, int]]:
+        """Character (start, end) spans of sentences in the text."""
+        return [match.span() for match in _SENTENCE_PATTERN.finditer(self.text)]
+
+    def __getitem__(self, key: str):
+        """Dict-style access to parsed fields, for callers of the old format."""
+        if key not in _PARSED_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _PARSED_FIELDS
+
+    def to_dict(self) -> Dict:
+        """Return parsed fields as a plain dictionary."""
+        return {name: getattr(self, name) for name in _PARSED_FIELDS}
+
+
+# Fields produced by the parser (cached scoring data is not part of the output)
+_PARSED_FIELDS = tuple(
+    f.name
+    for f in fields(ParsedDocument)
+    if f.name not in ("pattern_counts", "entities")
+)
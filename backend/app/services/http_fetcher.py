@@ -0,0 +1,194 @@
+"""Shared HTTP client for fetching pages to audit."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..core.cache import TwoTierCache
+from ..core.config import settings
+from ..core.errors import AIEOError, ContentTooLargeError, FetchFailedError
+from .document import ParsedDocument
+from .scoring_executor import ScoringExecutor, scoring_executor
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+USER_AGENT = "AIEO-Bot/1.0 (Content Analysis Tool)"
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching a page."""
+
+    url: str
+    content_hash: str
+    # None when the page was not modified since the last fetch
+    document: Optional[ParsedDocument] = None
+    not_modified: bool = False
+
+
+class HostLimiter:
+    """Limit concurrent requests per host; idle hosts are forgotten."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # host -> [semaphore, requests holding or waiting for it]
+        self._hosts: Dict[str, List] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        """Hold one of the host's connection slots."""
+        entry = self._hosts.setdefault(host, [asyncio.Semaphore(self.limit), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._hosts[host]
+
+
+class HTTPFetcher:
+    """
+    Fetch and parse pages over a long-lived, pooled HTTP client.
+
+    Connections (and HTTP/2 sessions, when h2 is installed) are kept alive
+    across audits, so repeated fetches from one site skip DNS, TCP and TLS
+    setup. Concurrent requests per host are capped. ETag and Last-Modified
+    of every page are kept in a metadata store (the two-tier cache), and
+    re-fetches send conditional requests: an unchanged page answers 304 and
+    is neither downloaded nor parsed. Pages are parsed on the scoring
+    executor, off the event loop.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        executor: Optional[ScoringExecutor] = None,
+    ):
+        self.transport = transport
+        self.executor = executor or scoring_executor
+        self.host_limiter = HostLimiter(settings.FETCH_PER_HOST_CONNECTIONS)
+        self.metadata = TwoTierCache("fetch_metadata", ttl=settings.FETCH_METADATA_TTL)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=settings.FETCH_HTTP2 and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.FETCH_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.FETCH_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.FETCH_KEEPALIVE_EXPIRY,
+                ),
+                timeout=settings.FETCH_TIMEOUT,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self):
+        """Close pooled connections (on shutdown)."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    async def fetch(self, url: str, conditional: bool = True) -> FetchResult:
+        """
+        Fetch and parse a page.
+
+        The download is aborted as soon as it exceeds MAX_CONTENT_SIZE_BYTES,
+        so peak memory stays bounded regardless of the page size. The body is
+        then parsed by a scoring worker, so large pages do not hold up other
+        requests.
+
+        Args:
+            url: Page URL
+            conditional: Revalidate with the stored ETag / Last-Modified
+
+        Returns:
+            Parsed page, or not_modified with the hash of the stored version
+        """
+        max_bytes = settings.MAX_CONTENT_SIZE_BYTES
+        too_large = ContentTooLargeError(
+            f"Fetched content exceeds maximum size limit ({max_bytes} bytes)"
+        )
+        metadata_key = f"fetch:{url}"
+        metadata = await self.metadata.get(metadata_key) if conditional else None
+        headers = {}
+        if metadata:
+            if metadata.get("etag"):
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                headers["If-Modified-Since"] = metadata["last_modified"]
+
+        try:
+            async with self.host_limiter.slot(urlsplit(url).netloc):
+                async with self.client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and metadata:
+                        return FetchResult(
+                            url=url,
+                            content_hash=metadata["content_hash"],
+                            not_modified=True,
+                        )
+                    response.raise_for_status()
+
+                    # Reject early when the server announces an oversized body
+                    content_length = response.headers.get("Content-Length")
+                    if content_length and content_length.isdigit():
+                        if int(content_length) > max_bytes:
+                            raise too_large
+
+                    chunks = []
+                    received = 0
+                    async for chunk in response.aiter_bytes():
+                        received += len(chunk)
+                        if received > max_bytes:
+                            raise too_large
+                        chunks.append(chunk)
+                    encoding = response.encoding or "utf-8"
+                    validators = {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+        except AIEOError:
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise FetchFailedError(f"URL not found: {url}")
+            elif e.response.status_code == 403:
+                raise FetchFailedError(
+                    f"Access forbidden: {url} (may require authentication)"
+                )
+            raise FetchFailedError(
+                f"Failed to fetch URL: HTTP {e.response.status_code}"
+            )
+        except httpx.TimeoutException:
+            raise FetchFailedError(f"Request timeout: {url}")
+        except Exception as e:
+            raise FetchFailedError(f"Error fetching URL: {str(e)}")
+
+        document = await self.executor.parse_html(b"".join(chunks), encoding)
+        if validators["etag"] or validators["last_modified"]:
+            await self.metadata.set(
+                metadata_key, {**validators, "content_hash": document.content_hash}
+            )
+        return FetchResult(
+            url=url, content_hash=document.content_hash, document=document
+        )
+
+
+# Shared by all audits in the process; closed by the app lifespan
+http_fetcher = HTTPFetcher()
@@ -0,0 +1,181 @@
+"""Incremental re-scoring of edited documents, section by section."""
+
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from ..core.config import settings
+from .document import ParsedDocument
+from .scoring_engine import ScoringEngine
+
+_BLOCK_PARSER: Optional[Any]
+try:
+    from markdown_it import MarkdownIt
+
+    # Block structure only: inline parsing is not needed to find headers
+    _BLOCK_PARSER = (
+        MarkdownIt("commonmark", {"html": True})
+        .enable("table")
+        .disable(["inline", "text_join"], ignoreInvalid=True)
+    )
+except ImportError:
+    _BLOCK_PARSER = None
+
+# Line breaks as normalized by both markdown-it and Python-Markdown
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def split_sections(content: str) -> List[str]:
+    """
+    Split markdown into header-delimited sections.
+
+    A new section starts at top-level ATX headers of the markdown-it block
+    token stream, so "#" lines inside code blocks or raw HTML never start
+    one. Only headers with "#" in the first column and a blank line before
+    them count: Python-Markdown parses blank-line separated blocks, and
+    within a block the context carries on (a table, for one, takes a
+    following "# Header" line as a row). Python-Markdown also keeps raw
+    HTML open across blank lines, unlike CommonMark, so no section starts
+    after a raw HTML block. Sections are contiguous slices, so joining them
+    gives the original content back. Without markdown-it-py the whole
+    content is one section.
+    """
+    if _BLOCK_PARSER is None:
+        return [content]
+
+    line_starts = [0] + [match.end() for match in _LINE_BREAK.finditer(content)]
+    starts = []
+    for token in _BLOCK_PARSER.parse(content):
+        if token.level != 0:
+            continue
+        if token.type == "html_block":
+            break
+        if (
+            token.type == "heading_open"
+            and token.markup.startswith("#")
+            and token.map is not None
+        ):
+            line = token.map[0]
+            start = line_starts[line]
+            if (
+                line > 0
+                and content.startswith("#", start)
+                and _is_blank(content[line_starts[line - 1] : start])
+            ):
+                starts.append(start)
+
+    bounds = [0] + starts + [len(content)]
+    return [content[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _is_blank(line: str) -> bool:
+    # Python-Markdown blanks lines of spaces and tabs before splitting blocks
+    return not line.strip(" \t\r\n")
+
+
+class IncrementalScorer:
+    """
+    Re-score edited markdown, re-processing only the sections that changed.
+
+    Each section is parsed once and cached by its hash, together with its
+    counts of section-local patterns (which sum exactly across sections) and,
+    for chunkable extractors such as spaCy, its entities. A document is
+    re-assembled from its sections; the remaining patterns (and heuristic
+    entities) are matched on the assembled text, and the result is scored
+    through ScoringEngine.score_document.
+
+    Results equal a full audit, except that reference-style link definitions
+    only resolve within their own section and spaCy sees each section
+    separately; audits therefore cache incremental results under their own
+    key. HTML is scored in full.
+    """
+
+    def __init__(self, engine: ScoringEngine, cache_size: Optional[int] = None):
+        self.engine = engine
+        self.cache_size = cache_size or settings.INCREMENTAL_SECTION_CACHE_SIZE
+        self._sections: "OrderedDict[str, ParsedDocument]" = OrderedDict()
+
+    def score(self, content: str, format: str = "markdown") -> Dict:
+        """
+        Score content, reusing cached results of unchanged sections.
+
+        Returns:
+            Dictionary with score, grade, gaps, and pattern scores
+        """
+        if format != "markdown":
+            return self.engine.score(content, format)
+        return self.engine.score_document(self.parse(content))
+
+    def parse(self, content: str) -> ParsedDocument:
+        """Assemble the parsed document from cached and re-parsed sections."""
+        keys = []
+        parsed: Dict[str, ParsedDocument] = {}
+        for section in split_sections(content):
+            key = hashlib.sha256(section.encode("utf-8")).hexdigest()
+            keys.append(key)
+            if key in self._sections:
+                self._sections.move_to_end(key)
+                parsed[key] = self._sections[key]
+            elif key not in parsed:
+                document = self.engine.parser.parse(section)
+                # Sections only keep counts of section-local patterns
+                document.pattern_counts = self.engine.matcher.count(
+                    document.text, lower_text=document.lower_text, local=True
+                )
+                parsed[key] = document
+                self._store(key, document)
+
+        extractor = self.engine.entity_extractor
+        pending = [
+            document for document in parsed.values() if document.entities is None
+        ]
+        if extractor.chunkable and pending:
+            # Entities of all new sections in one batched pass
+            extracted = extractor.extract_many(document.text for document in pending)
+            for document, entities in zip(pending, extracted):
+                document.entities = entities
+
+        return self._combine(content, [parsed[key] for key in keys])
+
+    def _store(self, key: str, document: ParsedDocument):
+        self._sections[key] = document
+        while len(self._sections) > self.cache_size:
+            self._sections.popitem(last=False)
+
+    def _combine(self, content: str, sections: List[ParsedDocument]) -> ParsedDocument:
+        # Headers are ordered by level, then document order (a stable sort
+        # of the per-section lists, which are already in that order)
+        headers = sorted(
+            (header for section in sections for header in section.headers),
+            key=lambda header: header["level"],
+        )
+        document = ParsedDocument(
+            text=" ".join(section.text for section in sections if section.text),
+            headers=[
+                {**header, "position": position}
+                for position, header in enumerate(headers)
+            ],
+            tables=[table for section in sections for table in section.tables],
+            lists=[lst for section in sections for lst in section.lists],
+            links=[link for section in sections for link in section.links],
+            word_count=sum(section.word_count for section in sections),
+            char_count=sum(section.char_count for section in sections),
+            content_hash=self.engine.parser._hash_content(content),
+        )
+
+        pattern_counts = self.engine.matcher.count(
+            document.text, lower_text=document.lower_text, local=False
+        )
+        for section in sections:
+            for group, counts in (section.pattern_counts or {}).items():
+                totals = pattern_counts[group]
+                for pattern, count in counts.items():
+                    totals[pattern] = totals.get(pattern, 0) + count
+        document.pattern_counts = pattern_counts
+
+        if self.engine.entity_extractor.chunkable:
+            document.entities = [
+                entity for section in sections for entity in section.entities or []
+            ]
+        return document
@@ -1,7 +1,7 @@
 """Optimization service for applying AIEO patterns."""
 
-from typing import Dict, List
-from .scoring_engine import ScoringEngine
+from typing import Dict, List, Optional
+from .scoring_executor import ScoringExecutor, scoring_executor
 from .ai_service import AIService
 from ..core.validation import validate_content_size, sanitize_content
 
@@ -9,8 +9,8 @@ from ..core.validation import validate_content_size, sanitize_content
 class OptimizeService:
     """Service for optimizing content."""
 
-    def __init__(self):
-        self.scoring_engine = ScoringEngine()
+    def __init__(self, executor: Optional[ScoringExecutor] = None):
+        self.scoring_executor = executor or scoring_executor
         self.ai_service = AIService()
 
     async def optimize(
@@ -35,7 +35,7 @@ class OptimizeService:
         validate_content_size(content)
 
         # Score original content
-        original_score = self.scoring_engine.score(content)
+        original_score = await self.scoring_executor.score(content)
         score_before = original_score["score"]
 
         # Get gaps
@@ -49,7 +49,7 @@ class OptimizeService:
         )
 
         # Score optimized content
-        optimized_score = self.scoring_engine.score(optimized_content)
+        optimized_score = await self.scoring_executor.score(optimized_content)
         score_after = optimized_score["score"]
         uplift = score_after - score_before
 
@@ -0,0 +1,343 @@
+"""Pluggable markdown/HTML parsing backends for ContentParser."""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+from bs4 import BeautifulSoup, Tag
+from bs4.element import CData, NavigableString
+from lxml import etree, html as lxml_html
+import markdown
+
+try:
+    from markdown_it import MarkdownIt
+
+    MARKDOWN_IT_AVAILABLE = True
+except ImportError:
+    MARKDOWN_IT_AVAILABLE = False
+
+HEADER_LEVELS = {f"h{i}": i for i in range(1, 7)}
+LIST_TAGS = ("ul", "ol")
+
+# String types BeautifulSoup.get_text() includes (no comments, doctypes, etc.)
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+# Tags whose strings BeautifulSoup stores as special (non-text) string types
+NON_TEXT_CONTAINERS = frozenset(("script", "style", "template", "rt", "rp"))
+
+MARKDOWN_EXTENSIONS = ["tables", "fenced_code", "nl2br"]
+
+# lxml reports comments and processing instructions as separate events
+WALK_EVENTS = ("start", "end", "comment", "pi")
+
+
+class ParserBackend:
+    """
+    Base class for parsing backends.
+
+    A backend renders markdown to HTML and extracts text, headers, tables,
+    lists and links from HTML. Every backend must produce the same output
+    for the same well-formed document; malformed markup may be repaired
+    differently by each HTML parser.
+    """
+
+    name = "base"
+
+    @property
+    def resolved_name(self) -> str:
+        """Name of the backend whose output this one produces."""
+        return self.name
+
+    def render_markdown(self, content: str) -> str:
+        """Render markdown content to HTML."""
+        raise NotImplementedError
+
+    def extract(self, html: str) -> Dict:
+        """
+        Extract structured components from HTML.
+
+        Returns:
+            Dictionary with text, headers, tables, lists and links
+        """
+        raise NotImplementedError
+
+
+class SoupBackend(ParserBackend):
+    """Python-Markdown and BeautifulSoup's pure-Python html.parser."""
+
+    name = "standard"
+
+    def render_markdown(self, content: str) -> str:
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        return md.convert(content)
+
+    def extract(self, html: str) -> Dict:
+        soup = BeautifulSoup(html, "html.parser")
+        strings: List[str] = []
+        headers_by_level: Dict[int, List[str]] = {}
+        tables = []
+        lists = []
+        links = []
+
+        for node in soup.descendants:
+            if not isinstance(node, Tag):
+                if type(node) in TEXT_STRING_TYPES:
+                    stripped = node.strip()
+                    if stripped:
+                        strings.append(stripped)
+                continue
+
+            name = node.name
+            if name in HEADER_LEVELS:
+                headers_by_level.setdefault(HEADER_LEVELS[name], []).append(
+                    node.get_text(strip=True)
+                )
+            elif name == "table":
+                rows = [
+                    [td.get_text(strip=True) for td in _soup_tags(tr, ("td", "th"))]
+                    for tr in _soup_tags(node, ("tr",))
+                ]
+                table = build_table(rows)
+                if table:
+                    tables.append(table)
+            elif name in LIST_TAGS:
+                items = [li.get_text(strip=True) for li in _soup_tags(node, ("li",))]
+                lst = build_list(name, items)
+                if lst:
+                    lists.append(lst)
+            elif name == "a" and node.get("href") is not None:
+                links.append({"text": node.get_text(strip=True), "url": node["href"]})
+
+        return {
+            "text": " ".join(strings),
+            "headers": build_headers(headers_by_level),
+            "tables": tables,
+            "lists": lists,
+            "links": links,
+        }
+
+
+class LxmlBackend(ParserBackend):
+    """
+    Python-Markdown and lxml's C HTML parser.
+
+    Text is gathered with the same rules as BeautifulSoup.get_text(): strings
+    are stripped, empty strings, comments and strings inside script, style,
+    template, rt and rp are skipped. Malformed markup is repaired the way
+    browsers do, which html.parser does not always do: in
+    <ul><li>a<li>b</ul>, lxml closes the first item before the second,
+    html.parser nests the second inside the first.
+    """
+
+    name = "fast"
+
+    def __init__(self):
+        self.html_parser = lxml_html.HTMLParser(encoding="utf-8")
+
+    def render_markdown(self, content: str) -> str:
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        return md.convert(content)
+
+    def extract(self, html: str) -> Dict:
+        strings: List[str] = []
+        headers_by_level: Dict[int, List[str]] = {}
+        tables: List[Dict] = []
+        lists: List[Dict] = []
+        links: List[Dict] = []
+
+        root = self._parse_html(html)
+        if root is None:
+            return {
+                "text": "",
+                "headers": [],
+                "tables": tables,
+                "lists": lists,
+                "links": links,
+            }
+
+        # Depth of enclosing non-text containers, so tails are handled too
+        hidden = 0
+        for event, el in etree.iterwalk(root, events=WALK_EVENTS):
+            tag = el.tag
+            if event in ("comment", "pi"):
+                # Only the tail of a comment or processing instruction is text
+                if not hidden:
+                    _append_stripped(strings, el.tail)
+                continue
+
+            if event == "start":
+                if tag in NON_TEXT_CONTAINERS:
+                    hidden += 1
+                if not hidden:
+                    _append_stripped(strings, el.text)
+
+                if tag in HEADER_LEVELS:
+                    headers_by_level.setdefault(HEADER_LEVELS[tag], []).append(
+                        _element_text(el, hidden)
+                    )
+                elif tag == "table":
+                    rows = [
+                        [
+                            _element_text(td, hidden)
+                            for td in _lxml_tags(tr, ("td", "th"))
+                        ]
+                        for tr in _lxml_tags(el, ("tr",))
+                    ]
+                    table = build_table(rows)
+                    if table:
+                        tables.append(table)
+                elif tag in LIST_TAGS:
+                    items = [
+                        _element_text(li, hidden) for li in _lxml_tags(el, ("li",))
+                    ]
+                    lst = build_list(tag, items)
+                    if lst:
+                        lists.append(lst)
+                elif tag == "a" and el.get("href") is not None:
+                    links.append(
+                        {"text": _element_text(el, hidden), "url": el.get("href")}
+                    )
+            else:
+                if tag in NON_TEXT_CONTAINERS:
+                    hidden -= 1
+                if not hidden:
+                    _append_stripped(strings, el.tail)
+
+        return {
+            "text": " ".join(strings),
+            "headers": build_headers(headers_by_level),
+            "tables": tables,
+            "lists": lists,
+            "links": links,
+        }
+
+    def _parse_html(self, html: str):
+        """Parse HTML into an lxml tree, or None if there is no document."""
+        if not html.strip():
+            return None
+        try:
+            return lxml_html.document_fromstring(
+                html.encode("utf-8"), parser=self.html_parser
+            )
+        except etree.ParserError:
+            # Input without any elements or text (e.g. only a comment)
+            return None
+
+
+class CommonMarkBackend(LxmlBackend):
+    """
+    markdown-it (CommonMark) tokenizer and lxml.
+
+    Fastest backend. HTML input gives the same output as the fast backend,
+    but markdown follows CommonMark rather than Python-Markdown, so a few
+    constructs differ (e.g. a list directly followed by a list with another
+    marker is split into two lists). Falls back to Python-Markdown when
+    markdown-it-py is not installed.
+    """
+
+    name = "commonmark"
+
+    def __init__(self):
+        super().__init__()
+        self.md = None
+        if MARKDOWN_IT_AVAILABLE:
+            # Hard line breaks and GFM tables match the nl2br/tables extensions
+            self.md = MarkdownIt("commonmark", {"breaks": True, "html": True})
+            self.md.enable("table")
+
+    @property
+    def resolved_name(self) -> str:
+        # Without markdown-it-py this is the fast backend
+        return self.name if self.md is not None else LxmlBackend.name
+
+    def render_markdown(self, content: str) -> str:
+        if self.md is None:
+            return super().render_markdown(content)
+        return self.md.render(content)
+
+
+PARSER_BACKENDS = {
+    SoupBackend.name: SoupBackend,
+    LxmlBackend.name: LxmlBackend,
+    CommonMarkBackend.name: CommonMarkBackend,
+}
+
+
+def get_parser_backend(name: str) -> ParserBackend:
+    """Create the parsing backend registered under name."""
+    try:
+        return PARSER_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown parser backend: {name} (expected one of {sorted(PARSER_BACKENDS)})"
+        )
+
+
+def build_headers(headers_by_level: Dict[int, List[str]]) -> List[Dict]:
+    """Build header entries ordered by level, then document order."""
+    headers: List[Dict] = []
+    for level in sorted(headers_by_level):
+        for text in headers_by_level[level]:
+            headers.append({"level": level, "text": text, "position": len(headers)})
+    return headers
+
+
+def build_table(rows: List[List[str]]) -> Optional[Dict]:
+    """Build a table entry from rows of cells, or None if it has no cells."""
+    rows = [cells for cells in rows if cells]
+    if not rows:
+        return None
+    return {
+        "rows": rows,
+        "column_count": max(len(row) for row in rows),
+        "row_count": len(rows),
+    }
+
+
+def build_list(tag: str, items: List[str]) -> Optional[Dict]:
+    """Build a list entry, or None if it has no items."""
+    if not items:
+        return None
+    return {
+        "type": "ordered" if tag == "ol" else "unordered",
+        "items": items,
+        "item_count": len(items),
+    }
+
+
+def _soup_tags(root: Tag, names: Iterable[str]) -> Iterator[Tag]:
+    """Yield descendant tags with the given names, in document order."""
+    for node in root.descendants:
+        if isinstance(node, Tag) and node.name in names:
+            yield node
+
+
+def _lxml_tags(root, names: Iterable[str]) -> Iterator:
+    """Yield descendant elements with the given names, in document order."""
+    for el in root.iterdescendants():
+        if el.tag in names:
+            yield el
+
+
+def _append_stripped(strings: List[str], value: Optional[str]):
+    """Append a stripped string if it is not empty."""
+    if value:
+        stripped = value.strip()
+        if stripped:
+            strings.append(stripped)
+
+
+def _element_text(root, hidden: int) -> str:
+    """Equivalent of Tag.get_text(strip=True) for an lxml element."""
+    strings: List[str] = []
+    for event, el in etree.iterwalk(root, events=WALK_EVENTS):
+        if event == "start":
+            if el.tag in NON_TEXT_CONTAINERS:
+                hidden += 1
+            if not hidden:
+                _append_stripped(strings, el.text)
+            continue
+
+        if event == "end" and el.tag in NON_TEXT_CONTAINERS:
+            hidden -= 1
+        # The root's tail lies outside the element
+        if el is not root and not hidden:
+            _append_stripped(strings, el.tail)
+    return "".join(strings)
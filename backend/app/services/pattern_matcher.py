@@ -0,0 +1,215 @@
+"""Precompiled pattern matcher for the scoring engine."""
+
+import re
+import string
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+# Text views a pattern group can be matched against:
+#   raw    - the text as extracted by the parser (case-sensitive)
+#   lower  - ``text.lower()`` (case-sensitive match on lowercased text)
+#   folded - case-folded equivalent of matching the raw text with re.IGNORECASE
+RAW = "raw"
+LOWER = "lower"
+FOLDED = "folded"
+
+# Pattern groups used by the scorers, keyed by group name: (view, patterns).
+# Patterns are kept verbatim from the original per-scorer regexes so counts
+# stay identical.
+PATTERN_GROUPS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "citation_hooks": (
+        LOWER,
+        (
+            r"according to",
+            r"research (from|by|at)",
+            r"study (found|shows|indicates)",
+            r"\[.*\]\(.*\)",  # Markdown links
+            r"source:",
+            r"references?:",
+        ),
+    ),
+    "questions": (RAW, (r"\?[^?]*\?",)),
+    "nested_questions": (
+        FOLDED,
+        (
+            r"(what|how|why|when|where|which).*\?.*(but|however|additionally|furthermore|moreover)",
+        ),
+    ),
+    "temporal_anchors": (
+        FOLDED,
+        (
+            r"\d{4}",  # Years
+            r"(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}",
+            r"as of",
+            r"updated",
+            r"version\s+\d+",
+            r"v\d+\.\d+",
+        ),
+    ),
+    "comparison_keywords": (
+        LOWER,
+        (
+            "vs",
+            "versus",
+            "compare",
+            "comparison",
+            "difference",
+            "better",
+            "worse",
+        ),
+    ),
+    "definitions": (
+        FOLDED,
+        (
+            r"is defined as",
+            r"means",
+            r"refers to",
+            r"is a",
+            r"is an",
+            r"\*\*.*\*\*.*is",  # Bold term followed by "is"
+        ),
+    ),
+    "steps": (
+        FOLDED,
+        (
+            r"step\s+\d+",
+            r"step\s+[a-z]",
+            r"first.*second.*third",
+            r"\d+\.\s+",  # Numbered list items
+        ),
+    ),
+    "faq_sections": (
+        FOLDED,
+        (
+            r"frequently asked questions",
+            r"faq",
+            r"common questions",
+        ),
+    ),
+    "importance_phrases": (
+        FOLDED,
+        (
+            r"this is important because",
+            r"this is critical because",
+            r"this matters because",
+            r"significantly",
+            r"crucially",
+            r"essential",
+        ),
+    ),
+}
+
+# Maps every character that re.IGNORECASE treats as equal to an ASCII letter
+# onto that letter. Translation is one-to-one, so positions are preserved.
+_FOLD_TABLE = {ord(c): c.lower() for c in string.ascii_uppercase}
+_FOLD_TABLE.update(
+    {
+        0x130: "i",  # LATIN CAPITAL LETTER I WITH DOT ABOVE
+        0x131: "i",  # LATIN SMALL LETTER DOTLESS I
+        0x17F: "s",  # LATIN SMALL LETTER LONG S
+        0x212A: "k",  # KELVIN SIGN
+    }
+)
+
+_REGEX_METACHARACTERS = re.compile(r"[\\.^$*+?{}\[\]|()]")
+
+# Pattern syntax that can match whitespace or depends on surrounding text:
+# whitespace, ".", negated classes, \s \W \D, anchors and lookarounds
+_NON_LOCAL_SYNTAX = re.compile(r"\s|\\[sWDAZbB]|(?<!\\)[.^$]|\[\^|\(\?<?[=!]")
+
+
+def is_section_local(pattern: str) -> bool:
+    """
+    Whether a pattern's matches never span whitespace or depend on the text
+    around them.
+
+    For such patterns, counts over texts joined with whitespace equal the sum
+    of the counts over each text. The check is conservative.
+    """
+    if _NON_LOCAL_SYNTAX.search(pattern):
+        return False
+    # Empty matches occur at every position, including the joining whitespace
+    return re.fullmatch(pattern, "") is None
+
+
+def fold_case(text: str) -> str:
+    """Case-fold text the way re.IGNORECASE compares ASCII letters."""
+    if text.isascii():
+        return text.lower()
+    return text.translate(_FOLD_TABLE)
+
+
+class PatternMatcher:
+    """
+    Count scoring patterns over a text with patterns compiled once.
+
+    Each text view is built in a single pass, then literal phrases are counted
+    with ``str.count`` and the remaining patterns run as precompiled
+    case-sensitive regexes over the view. Counts equal ``len(re.findall(...))``
+    for every pattern.
+    """
+
+    def __init__(
+        self, groups: Optional[Mapping[str, Tuple[str, Iterable[str]]]] = None
+    ):
+        if groups is None:
+            groups = PATTERN_GROUPS
+        self._groups = {}
+        for name, (view, patterns) in groups.items():
+            compiled = []
+            for pattern in patterns:
+                regex = None
+                if _REGEX_METACHARACTERS.search(pattern):
+                    regex = re.compile(pattern)
+                compiled.append((pattern, regex, is_section_local(pattern)))
+            self._groups[name] = (view, compiled)
+
+    def count(
+        self,
+        text: str,
+        lower_text: Optional[str] = None,
+        local: Optional[bool] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Count pattern matches in text.
+
+        Args:
+            text: Plain text extracted by the content parser
+            lower_text: Already lowercased text, if the caller has it
+            local: Only count section-local (True) or other (False) patterns
+
+        Returns:
+            Dictionary of group name to per-pattern match counts
+        """
+        views = {RAW: text}
+        if lower_text is not None:
+            views[LOWER] = lower_text
+        counts = {}
+        for name, (view, compiled) in self._groups.items():
+            if local is not None:
+                compiled = [entry for entry in compiled if entry[2] == local]
+
+            group_counts: Dict[str, int] = {}
+            if compiled:
+                if view not in views:
+                    views[view] = self._build_view(text, view, views)
+                view_text = views[view]
+                for pattern, regex, _ in compiled:
+                    if regex is None:
+                        group_counts[pattern] = view_text.count(pattern)
+                    else:
+                        group_counts[pattern] = sum(
+                            1 for _ in regex.finditer(view_text)
+                        )
+            counts[name] = group_counts
+
+        return counts
+
+    def _build_view(self, text: str, view: str, views: Dict[str, str]) -> str:
+        """Build a text view, reusing the lowercased text for ASCII input."""
+        if view == LOWER:
+            return text.lower()
+        if view == FOLDED:
+            if text.isascii() and LOWER in views:
+                return views[LOWER]
+            return fold_case(text)
+        raise ValueError(f"Unknown text view: {view}")
@@ -0,0 +1,238 @@
+"""Concurrent, rate-limited scheduling of citation probes."""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger("aieo")
+
+# probe(engine, prompt, url) -> citation, or None when the URL is not cited
+ProbeFunc = Callable[[str, str, str], Awaitable[Optional[Dict]]]
+
+
+class ProbeError(Exception):
+    """A probe failed; retryable failures are attempted again."""
+
+    code = "PROBE_FAILED"
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ProbeTimeoutError(ProbeError):
+    """The engine did not answer within the probe timeout."""
+
+    code = "TIMEOUT"
+
+
+class EngineRateLimitedError(ProbeError):
+    """The engine rejected a probe for exceeding its rate limit."""
+
+    code = "RATE_LIMITED"
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, retryable=True)
+        self.retry_after = retry_after
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of probing one engine with one prompt."""
+
+    engine: str
+    prompt: str
+    citation: Optional[Dict] = None
+    # {"code", "message"} when every attempt failed
+    error: Optional[Dict] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class EngineLimits:
+    """Concurrency cap and token-bucket rate limit of one engine."""
+
+    concurrency: int
+    rate: float  # Probes per second; 0 disables the limit
+    burst: int
+
+
+class TokenBucket:
+    """Token bucket handing out rate tokens per second, up to burst at once."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait for a token and take it."""
+        if self.rate <= 0:
+            return
+        # Waiters queue on the lock, so tokens go out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def engine_limits(engine: str) -> EngineLimits:
+    """Limits of an engine: CITATION_PROBE_ENGINE_LIMITS over the defaults."""
+    overrides = settings.CITATION_PROBE_ENGINE_LIMITS.get(engine, {})
+    return EngineLimits(
+        concurrency=overrides.get(
+            "concurrency", settings.CITATION_PROBE_ENGINE_CONCURRENCY
+        ),
+        rate=overrides.get("rate", settings.CITATION_PROBE_RATE),
+        burst=overrides.get("burst", settings.CITATION_PROBE_BURST),
+    )
+
+
+class ProbeScheduler:
+    """
+    Run engine x prompt probes concurrently within per-engine limits.
+
+    At most `concurrency` probes run at once overall, and at most each
+    engine's own cap against that engine; probe starts are spaced by the
+    engine's token bucket. A probe that times out, is rate limited or fails
+    with a retryable error is retried with jittered exponential backoff
+    (honouring the engine's Retry-After). Failures are returned as results
+    carrying an error, never raised.
+    """
+
+    def __init__(
+        self,
+        probe: ProbeFunc,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        limits: Optional[Dict[str, EngineLimits]] = None,
+    ):
+        self.probe = probe
+        self.concurrency = concurrency or settings.CITATION_PROBE_CONCURRENCY
+        self.timeout = timeout or settings.CITATION_PROBE_TIMEOUT
+        self.retries = settings.CITATION_PROBE_RETRIES if retries is None else retries
+        self.backoff = settings.CITATION_PROBE_BACKOFF if backoff is None else backoff
+        self.limits = limits or {}
+        self._engines: Dict[str, tuple] = {}
+        self._loop = None
+
+    def _engine(self, engine: str) -> tuple:
+        """Semaphore and token bucket of an engine, created on first use."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Locks belong to a loop; each asyncio.run (Celery task) starts over
+            self._loop, self._engines = loop, {}
+        if engine not in self._engines:
+            limits = self.limits.get(engine) or engine_limits(engine)
+            self._engines[engine] = (
+                asyncio.Semaphore(limits.concurrency),
+                TokenBucket(limits.rate, limits.burst),
+            )
+        return self._engines[engine]
+
+    def _delay(self, attempt: int, error: Exception) -> float:
+        # Full jitter spreads out retries of probes that failed together
+        delay = random.uniform(0, self.backoff * 2**attempt)
+        retry_after = getattr(error, "retry_after", None)
+        return max(delay, retry_after) if retry_after else delay
+
+    async def _run_one(
+        self, overall: asyncio.Semaphore, engine: str, prompt: str, url: str
+    ) -> ProbeResult:
+        semaphore, bucket = self._engine(engine)
+        result = ProbeResult(engine=engine, prompt=prompt)
+        start = time.monotonic()
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            try:
+                # Waiting on one engine's limits leaves others free to run
+                async with semaphore:
+                    await bucket.acquire()
+                    async with overall:
+                        result.citation = await asyncio.wait_for(
+                            self.probe(engine, prompt, url), self.timeout
+                        )
+                result.error = None
+                break
+            except asyncio.TimeoutError:
+                error = ProbeTimeoutError(f"Probe timed out after {self.timeout}s")
+            except ProbeError as e:
+                error = e
+            except Exception as e:
+                error = ProbeError(str(e) or type(e).__name__, retryable=False)
+            result.error = {"code": error.code, "message": str(error)}
+            if not error.retryable or attempt == self.retries:
+                break
+            # Back off without holding a slot
+            await asyncio.sleep(self._delay(attempt, error))
+        result.elapsed = time.monotonic() - start
+        if result.error:
+            logger.warning(
+                f"Probe of {engine} failed after {result.attempts} attempts: "
+                f"{result.error['message']}"
+            )
+        return result
+
+    async def run(
+        self, url: str, prompts: List[str], engines: List[str]
+    ) -> List[ProbeResult]:
+        """
+        Probe every engine with every prompt.
+
+        Returns:
+            One result per (engine, prompt), in engine then prompt order
+        """
+        overall = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.ensure_future(self._run_one(overall, engine, prompt, url))
+            for engine in engines
+            for prompt in prompts
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+@dataclass
+class ProbeReport:
+    """Citations found by a probing run, and the probes that failed."""
+
+    citations: List[Dict] = field(default_factory=list)
+    errors: List[Dict] = field(default_factory=list)
+    probes: int = 0
+
+    @classmethod
+    def from_results(cls, results: List[ProbeResult]) -> "ProbeReport":
+        report = cls(probes=len(results))
+        for result in results:
+            if result.citation:
+                report.citations.append(result.citation)
+            elif result.error:
+                report.errors.append(
+                    {
+                        "engine": result.engine,
+                        "prompt": result.prompt,
+                        "attempts": result.attempts,
+                        **result.error,
+                    }
+                )
+        return report
@@ -1,31 +1,50 @@
 """Scoring engine for AIEO patterns."""
 
-from typing import Dict, List
-import re
-
-try:
-    import spacy
-
-    SPACY_AVAILABLE = True
-except ImportError:
-    SPACY_AVAILABLE = False
+import hashlib
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional
 
+from ..core.config import settings
 from .content_parser import ContentParser
+from .document import ParsedDocument
+from .entity_extractor import (
+    EntityExtractor,
+    entity_detector_signature,
+    get_entity_extractor,
+)
+from .parser_backends import get_parser_backend
+from .pattern_matcher import PATTERN_GROUPS, PatternMatcher
+
+# Bump whenever scores change for the same content (pattern scorers, weights,
+# grades, gaps or entity detection). Cached audit results are keyed by it.
+SCORER_VERSION = "1"
+
+
+@lru_cache(maxsize=1)
+def scorer_fingerprint() -> str:
+    """Short hash of the scorer version, patterns, parser and entity detector."""
+    config = {
+        "version": SCORER_VERSION,
+        "patterns": PATTERN_GROUPS,
+        # Backends may parse malformed markup differently
+        "parser": get_parser_backend(settings.CONTENT_PARSER_BACKEND).resolved_name,
+        # The detector actually used, not the configured "auto"
+        "entities": entity_detector_signature(),
+    }
+    serialized = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(serialized).hexdigest()[:12]
 
 
 class ScoringEngine:
     """Score content against AIEO patterns."""
 
-    def __init__(self):
+    def __init__(self, entity_extractor: Optional[EntityExtractor] = None):
         self.parser = ContentParser()
-        # Load spaCy model for NER (will need to download: python -m spacy download en_core_web_sm)
-        self.nlp = None
-        if SPACY_AVAILABLE:
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-            except (OSError, IOError):
-                # Fallback if model not installed
-                self.nlp = None
+        self.matcher = PatternMatcher()
+        # spaCy NER (python -m spacy download en_core_web_sm) or the heuristic
+        # detector, selected by ENTITY_DETECTOR
+        self.entity_extractor = entity_extractor or get_entity_extractor()
 
     def score(self, content: str, format: str = "markdown") -> Dict:
         """
@@ -36,7 +55,29 @@ class ScoringEngine:
         """
         # Parse content
         parsed = self.parser.parse(content, format)
+        return self.score_document(parsed)
+
+    def score_documents(self, documents: List[ParsedDocument]) -> List[Dict]:
+        """
+        Score several parsed documents, running NER on all of them at once.
 
+        Returns:
+            Scoring results in input order
+        """
+        pending = [doc for doc in documents if doc.entities is None]
+        if pending:
+            extracted = self.entity_extractor.extract_many(doc.text for doc in pending)
+            for doc, entities in zip(pending, extracted):
+                doc.entities = entities
+        return [self.score_document(doc) for doc in documents]
+
+    def score_document(self, parsed: ParsedDocument) -> Dict:
+        """
+        Score an already parsed document.
+
+        Returns:
+            Dictionary with score, grade, gaps, and pattern scores
+        """
         # Score each pattern
         pattern_scores = {}
         pattern_scores["structured_data"] = self._score_structured_data(parsed)
@@ -72,19 +113,19 @@ class ScoringEngine:
             "pattern_scores": pattern_scores,
             "gaps": gaps,
             "anti_pattern_penalties": anti_pattern_penalties,
-            "word_count": parsed["word_count"],
+            "word_count": parsed.word_count,
         }
 
-    def _score_structured_data(self, parsed: Dict) -> Dict:
+    def _score_structured_data(self, parsed: ParsedDocument) -> Dict:
         """Pattern 1: Structured Data (tables, lists, headers)."""
-        word_count = parsed["word_count"]
+        word_count = parsed.word_count
         if word_count == 0:
             return {"score": 0, "max": 20, "detected": False}
 
         # Count structured elements per 500 words
-        tables = len(parsed["tables"])
-        lists = len(parsed["lists"])
-        headers = len(parsed["headers"])
+        tables = len(parsed.tables)
+        lists = len(parsed.lists)
+        headers = len(parsed.headers)
 
         elements_per_500 = ((tables + lists + headers) / word_count) * 500
 
@@ -100,15 +141,14 @@ class ScoringEngine:
             "headers": headers,
         }
 
-    def _score_entity_density(self, parsed: Dict) -> Dict:
+    def _score_entity_density(self, parsed: ParsedDocument) -> Dict:
         """Pattern 2: Entity Density (named entities per 100 words)."""
-        word_count = parsed["word_count"]
-        if word_count == 0 or self.nlp is None:
+        word_count = parsed.word_count
+        if word_count == 0 or not self.entity_extractor.available:
             return {"score": 0, "max": 15, "detected": False}
 
         # Extract entities using spaCy
-        doc = self.nlp(parsed["text"])
-        entities = [ent.text for ent in doc.ents]
+        entities = self._entities(parsed)
         entity_count = len(set(entities))  # Unique entities
 
         # Entities per 100 words
@@ -125,26 +165,12 @@ class ScoringEngine:
             "entities_per_100": round(entities_per_100, 1),
         }
 
-    def _score_citation_hooks(self, parsed: Dict) -> Dict:
+    def _score_citation_hooks(self, parsed: ParsedDocument) -> Dict:
         """Pattern 3: Citation Hooks (explicit source attributions)."""
-        text = parsed["text"].lower()
-
-        # Citation patterns
-        citation_patterns = [
-            r"according to",
-            r"research (from|by|at)",
-            r"study (found|shows|indicates)",
-            r"\[.*\]\(.*\)",  # Markdown links
-            r"source:",
-            r"references?:",
-        ]
-
-        citation_count = sum(
-            len(re.findall(pattern, text)) for pattern in citation_patterns
-        )
+        citation_count = sum(self._pattern_counts(parsed)["citation_hooks"].values())
 
         # Score: 10 points max, target 2+ citations per 1000 words
-        word_count = parsed["word_count"]
+        word_count = parsed.word_count
         citations_per_1000 = (
             (citation_count / word_count) * 1000 if word_count > 0 else 0
         )
@@ -157,48 +183,32 @@ class ScoringEngine:
             "citation_count": citation_count,
         }
 
-    def _score_recursive_depth(self, parsed: Dict) -> Dict:
+    def _score_recursive_depth(self, parsed: ParsedDocument) -> Dict:
         """Pattern 4: Recursive Depth (nested Q&A, follow-up questions)."""
-        text = parsed["text"]
+        counts = self._pattern_counts(parsed)
 
         # Detect questions
-        question_pattern = r"\?[^?]*\?"
-        questions = re.findall(question_pattern, text)
+        question_count = sum(counts["questions"].values())
 
         # Detect nested structures (questions within answers)
-        nested_pattern = r"(what|how|why|when|where|which).*\?.*(but|however|additionally|furthermore|moreover)"
-        nested_count = len(re.findall(nested_pattern, text, re.IGNORECASE))
+        nested_count = sum(counts["nested_questions"].values())
 
         # Score: 15 points max
-        question_score = min(7.5, len(questions) * 1.5)
+        question_score = min(7.5, question_count * 1.5)
         nested_score = min(7.5, nested_count * 2.5)
         score = question_score + nested_score
 
         return {
             "score": round(score, 1),
             "max": 15,
-            "detected": len(questions) > 0 or nested_count > 0,
-            "question_count": len(questions),
+            "detected": question_count > 0 or nested_count > 0,
+            "question_count": question_count,
             "nested_count": nested_count,
         }
 
-    def _score_temporal_anchoring(self, parsed: Dict) -> Dict:
+    def _score_temporal_anchoring(self, parsed: ParsedDocument) -> Dict:
         """Pattern 5: Temporal Anchoring (dates, versions, freshness)."""
-        text = parsed["text"]
-
-        # Date patterns
-        date_patterns = [
-            r"\d{4}",  # Years
-            r"(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}",
-            r"as of",
-            r"updated",
-            r"version\s+\d+",
-            r"v\d+\.\d+",
-        ]
-
-        date_count = sum(
-            len(re.findall(pattern, text, re.IGNORECASE)) for pattern in date_patterns
-        )
+        date_count = sum(self._pattern_counts(parsed)["temporal_anchors"].values())
 
         # Score: 10 points max
         score = min(10, date_count * 2)
@@ -210,23 +220,13 @@ class ScoringEngine:
             "date_count": date_count,
         }
 
-    def _score_comparison_tables(self, parsed: Dict) -> Dict:
+    def _score_comparison_tables(self, parsed: ParsedDocument) -> Dict:
         """Pattern 6: Comparison Tables."""
-        tables = parsed["tables"]
-        text = parsed["text"].lower()
+        tables = parsed.tables
 
         # Check for comparison keywords
-        comparison_keywords = [
-            "vs",
-            "versus",
-            "compare",
-            "comparison",
-            "difference",
-            "better",
-            "worse",
-        ]
         has_comparison_keywords = any(
-            keyword in text for keyword in comparison_keywords
+            self._pattern_counts(parsed)["comparison_keywords"].values()
         )
 
         # Score: 15 points max
@@ -242,24 +242,9 @@ class ScoringEngine:
             "has_comparison_keywords": has_comparison_keywords,
         }
 
-    def _score_definitional_precision(self, parsed: Dict) -> Dict:
+    def _score_definitional_precision(self, parsed: ParsedDocument) -> Dict:
         """Pattern 7: Definitional Precision (explicit definitions)."""
-        text = parsed["text"]
-
-        # Definition patterns
-        definition_patterns = [
-            r"is defined as",
-            r"means",
-            r"refers to",
-            r"is a",
-            r"is an",
-            r"\*\*.*\*\*.*is",  # Bold term followed by "is"
-        ]
-
-        definition_count = sum(
-            len(re.findall(pattern, text, re.IGNORECASE))
-            for pattern in definition_patterns
-        )
+        definition_count = sum(self._pattern_counts(parsed)["definitions"].values())
 
         # Score: 10 points max
         score = min(10, definition_count * 2)
@@ -271,22 +256,12 @@ class ScoringEngine:
             "definition_count": definition_count,
         }
 
-    def _score_procedural_clarity(self, parsed: Dict) -> Dict:
+    def _score_procedural_clarity(self, parsed: ParsedDocument) -> Dict:
         """Pattern 8: Step-by-Step Procedures."""
-        text = parsed["text"]
-        lists = parsed["lists"]
+        lists = parsed.lists
 
         # Step patterns
-        step_patterns = [
-            r"step\s+\d+",
-            r"step\s+[a-z]",
-            r"first.*second.*third",
-            r"\d+\.\s+",  # Numbered list items
-        ]
-
-        step_count = sum(
-            len(re.findall(pattern, text, re.IGNORECASE)) for pattern in step_patterns
-        )
+        step_count = sum(self._pattern_counts(parsed)["steps"].values())
 
         # Ordered lists also count
         ordered_lists = [lst for lst in lists if lst["type"] == "ordered"]
@@ -305,21 +280,12 @@ class ScoringEngine:
             "ordered_list_count": len(ordered_lists),
         }
 
-    def _score_faq_injection(self, parsed: Dict) -> Dict:
+    def _score_faq_injection(self, parsed: ParsedDocument) -> Dict:
         """Pattern 9: FAQ Injection."""
-        text = parsed["text"]
-        headers = parsed["headers"]
+        headers = parsed.headers
 
         # FAQ section detection
-        faq_patterns = [
-            r"frequently asked questions",
-            r"faq",
-            r"common questions",
-        ]
-
-        has_faq_section = any(
-            re.search(pattern, text, re.IGNORECASE) for pattern in faq_patterns
-        )
+        has_faq_section = any(self._pattern_counts(parsed)["faq_sections"].values())
 
         # Questions in headers
         question_headers = [h for h in headers if "?" in h["text"]]
@@ -337,23 +303,11 @@ class ScoringEngine:
             "question_header_count": len(question_headers),
         }
 
-    def _score_meta_context(self, parsed: Dict) -> Dict:
+    def _score_meta_context(self, parsed: ParsedDocument) -> Dict:
         """Pattern 10: Meta-Context (importance explanations)."""
-        text = parsed["text"]
-
         # Importance phrases
-        importance_patterns = [
-            r"this is important because",
-            r"this is critical because",
-            r"this matters because",
-            r"significantly",
-            r"crucially",
-            r"essential",
-        ]
-
         importance_count = sum(
-            len(re.findall(pattern, text, re.IGNORECASE))
-            for pattern in importance_patterns
+            self._pattern_counts(parsed)["importance_phrases"].values()
         )
 
         # Score: 10 points max (but this is low priority)
@@ -366,7 +320,23 @@ class ScoringEngine:
             "importance_count": importance_count,
         }
 
-    def _calculate_total_score(self, pattern_scores: Dict, parsed: Dict) -> float:
+    def _pattern_counts(self, parsed: ParsedDocument) -> Dict[str, Dict[str, int]]:
+        """Get per-pattern match counts, scanning the text once per document."""
+        if parsed.pattern_counts is None:
+            parsed.pattern_counts = self.matcher.count(
+                parsed.text, lower_text=parsed.lower_text
+            )
+        return parsed.pattern_counts
+
+    def _entities(self, parsed: ParsedDocument) -> List[str]:
+        """Get named entities, running NER once per document."""
+        if parsed.entities is None:
+            parsed.entities = self.entity_extractor.extract(parsed.text)
+        return parsed.entities
+
+    def _calculate_total_score(
+        self, pattern_scores: Dict, parsed: ParsedDocument
+    ) -> float:
         """Calculate total score from pattern scores."""
         # Weights from PRD Section 8
         weights = {
@@ -411,7 +381,7 @@ class ScoringEngine:
             return "F"
 
     def _generate_gaps(
-        self, pattern_scores: Dict, parsed: Dict, total_score: float
+        self, pattern_scores: Dict, parsed: ParsedDocument, total_score: float
     ) -> List[Dict]:
         """Generate gap analysis."""
         gaps = []
@@ -489,16 +459,15 @@ class ScoringEngine:
 
         return gaps
 
-    def _detect_anti_patterns(self, parsed: Dict) -> int:
+    def _detect_anti_patterns(self, parsed: ParsedDocument) -> int:
         """Detect anti-patterns and return penalty points."""
         penalties = 0
-        text = parsed["text"].lower()
-        word_count = parsed["word_count"]
+        word_count = parsed.word_count
 
         # Over-optimization: Too many patterns in small space
         if word_count > 0:
             pattern_density = (
-                (len(parsed["tables"]) + len(parsed["lists"]) + len(parsed["headers"]))
+                (len(parsed.tables) + len(parsed.lists) + len(parsed.headers))
                 / word_count
                 * 1000
             )
@@ -506,25 +475,17 @@ class ScoringEngine:
                 penalties += 20
 
         # Keyword stuffing: Repeated phrases
-        words = text.split()
+        words = parsed.tokens
         if len(words) > 0:
-            word_freq = {}
-            for word in words:
-                if len(word) > 4:  # Only check longer words
-                    word_freq[word] = word_freq.get(word, 0) + 1
-
-            # Check for excessive repetition
-            for word, count in word_freq.items():
-                if count > len(words) * 0.05:  # Word appears >5% of the time
+            # Check for excessive repetition of longer words
+            for word, count in parsed.word_frequencies.items():
+                if len(word) > 4 and count > len(words) * 0.05:
+                    # Word appears >5% of the time
                     penalties += 15
                     break
 
         # Missing structure in long content
-        if (
-            word_count > 1000
-            and len(parsed["tables"]) == 0
-            and len(parsed["lists"]) == 0
-        ):
+        if word_count > 1000 and len(parsed.tables) == 0 and len(parsed.lists) == 0:
             penalties += 15
 
         return penalties
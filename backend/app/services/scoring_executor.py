@@ -0,0 +1,308 @@
+"""Process-pool executor for CPU-bound content scoring."""
+
+import asyncio
+import codecs
+import logging
+import multiprocessing
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Set, Union
+
+from ..core.config import settings
+from ..core.errors import ScoringUnavailableError
+from .document import ParsedDocument
+from .entity_extractor import SpacyEntityExtractor
+from .incremental_scoring import IncrementalScorer
+from .parser_backends import LxmlBackend
+from .scoring_engine import ScoringEngine
+from .streaming_parser import StreamingHTMLParser
+
+logger = logging.getLogger("aieo")
+
+# Bytes of a fetched page fed to the HTML parser at a time
+PARSE_FEED_BYTES = 64 * 1024
+
+# Scoring engine of the current worker process (loaded once per worker)
+_engine: Optional[ScoringEngine] = None
+# Section cache of the current worker process, for incremental scoring
+_incremental: Optional[IncrementalScorer] = None
+
+
+def _init_worker():
+    """Preload spaCy and the parsers when a worker process starts."""
+    global _engine
+    _engine = _create_engine()
+
+
+def _get_engine() -> ScoringEngine:
+    global _engine
+    if _engine is None:
+        _engine = _create_engine()
+    return _engine
+
+
+def _create_engine() -> ScoringEngine:
+    engine = ScoringEngine()
+    if isinstance(engine.entity_extractor, SpacyEntityExtractor):
+        # Pool workers are daemonic and cannot start spaCy's own processes
+        engine.entity_extractor.n_process = 1
+    return engine
+
+
+def _score(content: str, format: str, incremental: bool = False) -> Dict:
+    global _incremental
+    if not incremental:
+        return _get_engine().score(content, format)
+    if _incremental is None:
+        _incremental = IncrementalScorer(_get_engine())
+    return _incremental.score(content, format)
+
+
+def _score_document(document: ParsedDocument) -> Dict:
+    return _get_engine().score_document(document)
+
+
+def _score_batch(items: List) -> List:
+    """Score parsed documents and (content, format) pairs, NER over all at once."""
+    engine = _get_engine()
+    documents: List[Union[ParsedDocument, Exception]] = []
+    for item in items:
+        if isinstance(item, ParsedDocument):
+            documents.append(item)
+            continue
+        try:
+            documents.append(engine.parser.parse(*item))
+        except Exception as e:
+            documents.append(e)
+    scored = iter(
+        engine.score_documents([d for d in documents if not isinstance(d, Exception)])
+    )
+    return [d if isinstance(d, Exception) else next(scored) for d in documents]
+
+
+def _parse_html(body: bytes, encoding: str) -> ParsedDocument:
+    content_parser = _get_engine().parser
+    if not isinstance(content_parser.backend, LxmlBackend):
+        # html.parser repairs malformed markup differently from lxml, so
+        # only the lxml backends stream
+        return content_parser.parse(body.decode(encoding, errors="replace"), "html")
+
+    parser = StreamingHTMLParser()
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for start in range(0, len(body), PARSE_FEED_BYTES):
+        parser.feed(decoder.decode(body[start : start + PARSE_FEED_BYTES]))
+    parser.feed(decoder.decode(b"", final=True))
+    return parser.close()
+
+
+def _warm_up() -> bool:
+    return _get_engine().entity_extractor.available
+
+
+class ScoringExecutor:
+    """
+    Run scoring in worker processes so it never blocks the event loop.
+
+    At most pool_size jobs run at once and up to queue_depth more wait for a
+    worker. Further jobs are rejected with ScoringUnavailableError (HTTP 503)
+    instead of queueing without bound. A pool size of 0 scores in a thread of
+    the current process, which keeps the event loop free but shares the GIL.
+    """
+
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        max_tasks_per_child: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_window: Optional[float] = None,
+        mp_context=None,
+    ):
+        self.pool_size = settings.SCORING_POOL_SIZE if pool_size is None else pool_size
+        self.max_tasks_per_child = (
+            settings.SCORING_MAX_TASKS_PER_CHILD
+            if max_tasks_per_child is None
+            else max_tasks_per_child
+        )
+        self.queue_depth = (
+            settings.SCORING_QUEUE_DEPTH if queue_depth is None else queue_depth
+        )
+        self.batch_size = batch_size or settings.SCORING_BATCH_SIZE
+        self.batch_window = (
+            settings.SCORING_BATCH_WINDOW if batch_window is None else batch_window
+        )
+        # Multiprocessing context the pool starts its workers with
+        self.mp_context = mp_context or multiprocessing.get_context("spawn")
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        # Documents waiting for the next batch job, with their futures
+        self._batch: List[tuple] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_jobs: Set[asyncio.Task] = set()
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of jobs running or waiting at once."""
+        return max(self.pool_size, 1) + self.queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs currently running or waiting."""
+        return self._in_flight
+
+    async def start(self):
+        """Create the pool and load the scoring engine in every worker."""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        # Concurrent warm-up jobs make the pool spawn all of its workers now
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, _warm_up)
+                for _ in range(max(self.pool_size, 1))
+            )
+        )
+        logger.info(f"Scoring executor started with {self.pool_size} workers")
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the pool; it is recreated on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    async def score(
+        self, content: str, format: str = "markdown", incremental: bool = False
+    ) -> Dict:
+        """
+        Score raw content in a worker.
+
+        Args:
+            content: Raw content string
+            format: Content format ('markdown' or 'html')
+            incremental: Reuse the worker's cached sections of earlier versions
+
+        Returns:
+            Scoring result, as returned by ScoringEngine.score
+        """
+        return await self._submit(_score, content, format, incremental)
+
+    async def score_document(self, document: ParsedDocument) -> Dict:
+        """
+        Score an already parsed document in a worker.
+
+        Returns:
+            Scoring result, as returned by ScoringEngine.score_document
+        """
+        return await self._submit(_score_document, document)
+
+    async def score_batched(
+        self,
+        content: Optional[str] = None,
+        format: str = "markdown",
+        document: Optional[ParsedDocument] = None,
+    ) -> Dict:
+        """
+        Score raw content or a parsed document together with other documents.
+
+        The document waits up to batch_window seconds for others, then all
+        of them are scored by one worker job.
+
+        Returns:
+            Scoring result, as returned by ScoringEngine.score_document
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append(
+            (document if document is not None else (content, format), future)
+        )
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = loop.call_later(self.batch_window, self._flush_batch)
+        return await future
+
+    def _flush_batch(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            job = asyncio.ensure_future(self._score_batch(batch))
+            self._batch_jobs.add(job)
+            job.add_done_callback(self._batch_jobs.discard)
+
+    async def _score_batch(self, batch: List[tuple]):
+        try:
+            results = await self._submit(_score_batch, [item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            # The caller may have gone away meanwhile
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def parse_html(self, body: bytes, encoding: str = "utf-8") -> ParsedDocument:
+        """
+        Parse a fetched HTML page in a worker.
+
+        With the lxml backends (fast, commonmark) the page is fed to
+        StreamingHTMLParser in chunks; otherwise it is parsed in full with
+        the configured backend.
+
+        Args:
+            body: Raw page bytes
+            encoding: Character encoding of the page
+
+        Returns:
+            ParsedDocument, as returned by ContentParser.parse
+        """
+        return await self._submit(_parse_html, body, encoding)
+
+    async def _submit(self, fn, *args):
+        if self._in_flight >= self.capacity:
+            raise ScoringUnavailableError(
+                "Scoring capacity exceeded, please retry shortly"
+            )
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool
+            logger.error("Scoring worker died, restarting the pool")
+            self.shutdown(wait=False)
+            raise ScoringUnavailableError("Scoring worker failed, please retry")
+        finally:
+            self._in_flight -= 1
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.pool_size > 0:
+                options: Dict[str, Any] = {}
+                if (
+                    self.max_tasks_per_child
+                    and sys.version_info >= (3, 11)
+                    and self.mp_context.get_start_method() != "fork"
+                ):
+                    # Workers are replaced after max_tasks_per_child jobs
+                    # (Python 3.11+), which requires spawned processes
+                    options["max_tasks_per_child"] = self.max_tasks_per_child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.pool_size,
+                    mp_context=self.mp_context,
+                    initializer=_init_worker,
+                    **options,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="scoring"
+                )
+        return self._executor
+
+
+scoring_executor = ScoringExecutor()
@@ -0,0 +1,205 @@
+"""Incremental HTML parser for streamed page content."""
+
+import hashlib
+import re
+from typing import Dict, List, Optional
+from lxml import etree
+from html2text.utils import pad_tables_in_text
+
+from .content_parser import create_html_converter
+from .document import ParsedDocument
+from .parser_backends import (
+    HEADER_LEVELS,
+    LIST_TAGS,
+    NON_TEXT_CONTAINERS,
+    build_headers,
+    build_list,
+    build_table,
+)
+
+# Same tokens as str.split(): \s and str.isspace() share one definition
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+class _ExtractionTarget:
+    """
+    lxml parser target that extracts document components from SAX events.
+
+    No tree is built: only the extracted strings and the elements that are
+    still open are kept. Output matches the tree-based parser backends.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.headers_by_level: Dict[int, List[List[str]]] = {}
+        self.tables: List[List[List[List[str]]]] = []
+        self.lists: List[Dict] = []
+        self.links: List[Dict] = []
+
+        self._pending: List[str] = []
+        self._hidden = 0
+        self._stack: List[tuple] = []
+        # Text buffers of open headers, cells, list items and links
+        self._captures: List[List[str]] = []
+        self._open_tables: List[list] = []
+        self._open_rows: List[list] = []
+        self._open_lists: List[list] = []
+
+    def start(self, tag: str, attrib: Dict):
+        self._flush()
+        if tag in NON_TEXT_CONTAINERS:
+            self._hidden += 1
+
+        capture: Optional[List[str]] = None
+        if tag in HEADER_LEVELS:
+            capture = []
+            self.headers_by_level.setdefault(HEADER_LEVELS[tag], []).append(capture)
+        elif tag == "table":
+            rows: List[List[List[str]]] = []
+            self.tables.append(rows)
+            self._open_tables.append(rows)
+        elif tag == "tr":
+            # A row belongs to every enclosing table, like find_all("tr")
+            row: List[List[str]] = []
+            for rows in self._open_tables:
+                rows.append(row)
+            self._open_rows.append(row)
+        elif tag in ("td", "th"):
+            capture = []
+            for row in self._open_rows:
+                row.append(capture)
+        elif tag in LIST_TAGS:
+            items: List[List[str]] = []
+            self.lists.append({"tag": tag, "items": items})
+            self._open_lists.append(items)
+        elif tag == "li":
+            capture = []
+            for items in self._open_lists:
+                items.append(capture)
+        elif tag == "a" and attrib.get("href") is not None:
+            capture = []
+            self.links.append({"text": capture, "url": attrib.get("href")})
+
+        if capture is not None:
+            self._captures.append(capture)
+        self._stack.append((tag, capture is not None))
+
+    def end(self, tag: str):
+        self._flush()
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        # libxml2 balances events, but unwind defensively to the matching tag
+        while self._stack:
+            open_tag, has_capture = self._stack.pop()
+            self._close_element(open_tag, has_capture)
+            if open_tag == tag:
+                break
+
+    def data(self, data: str):
+        self._pending.append(data)
+
+    def comment(self, text: str):
+        self._flush()
+
+    def pi(self, target: str, data: Optional[str] = None):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        while self._stack:
+            self._close_element(*self._stack.pop())
+
+    def _close_element(self, tag: str, has_capture: bool):
+        if has_capture:
+            self._captures.pop()
+        if tag == "table":
+            self._open_tables.pop()
+        elif tag == "tr":
+            self._open_rows.pop()
+        elif tag in LIST_TAGS:
+            self._open_lists.pop()
+        if tag in NON_TEXT_CONTAINERS:
+            self._hidden -= 1
+
+    def _flush(self):
+        """Emit the text run collected since the last tag or comment."""
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if text and not self._hidden:
+            self.strings.append(text)
+            for capture in self._captures:
+                capture.append(text)
+
+
+class StreamingHTMLParser:
+    """
+    Parse an HTML document fed in chunks, with memory bounded by its text.
+
+    Produces the same ParsedDocument as ContentParser("fast").parse(content,
+    "html") without holding the raw HTML or a document tree; the markdown
+    html2text builds for word counts is still held in full. Malformed markup
+    is repaired as lxml does, which differs from the standard backend (e.g.
+    an unclosed <li> ends at the next <li>).
+    """
+
+    def __init__(self):
+        self._target = _ExtractionTarget()
+        self._parser = etree.HTMLParser(target=self._target)
+        self._html_converter = create_html_converter()
+        self._html_converter.start = True
+        self._hash = hashlib.sha256()
+        self._fed = False
+
+    def feed(self, chunk: str):
+        """Feed the next chunk of decoded HTML."""
+        if not chunk:
+            return
+        self._fed = True
+        self._hash.update(chunk.encode("utf-8"))
+        self._parser.feed(chunk)
+        self._html_converter.feed(chunk)
+
+    def close(self) -> ParsedDocument:
+        """Finish parsing and return the parsed document."""
+        if self._fed:
+            self._parser.close()
+        else:
+            self._target.close()
+
+        # Same steps as HTML2Text.handle(), applied to the fed chunks
+        converter = self._html_converter
+        converter.feed("")
+        markdown_content = converter.optwrap(converter.finish())
+        if converter.pad_tables:
+            markdown_content = pad_tables_in_text(markdown_content)
+
+        target = self._target
+        tables = [
+            build_table([["".join(cell) for cell in row] for row in rows])
+            for rows in target.tables
+        ]
+        lists = [
+            build_list(lst["tag"], ["".join(item) for item in lst["items"]])
+            for lst in target.lists
+        ]
+        return ParsedDocument(
+            text=" ".join(target.strings),
+            headers=build_headers(
+                {
+                    level: ["".join(capture) for capture in captures]
+                    for level, captures in target.headers_by_level.items()
+                }
+            ),
+            tables=[table for table in tables if table is not None],
+            lists=[lst for lst in lists if lst is not None],
+            links=[
+                {"text": "".join(link["text"]), "url": link["url"]}
+                for link in target.links
+            ],
+            # Counted without building the token list of a multi-MB text
+            word_count=sum(1 for _ in _WORD_PATTERN.finditer(markdown_content)),
+            char_count=len(markdown_content),
+            content_hash=self._hash.hexdigest(),
+        )
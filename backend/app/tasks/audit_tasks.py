@@ -0,0 +1,118 @@
+"""Celery tasks for bulk audits."""
+
+import asyncio
+import multiprocessing
+from typing import Callable, Dict, List, Optional
+
+import billiard
+
+from .citation_tasks import celery_app
+from ..core.database import SessionLocal, unpooled_async_sessionmaker
+from ..core.redis_pool import close_redis, init_redis
+from ..services.audit_service import AuditService
+from ..services.audit_writer import AuditWriter
+from ..services.bulk_audit import run_bulk_audit
+from ..services.http_fetcher import HTTPFetcher
+from ..services.scoring_executor import ScoringExecutor
+
+
+def task_scoring_executor() -> ScoringExecutor:
+    """
+    Scoring executor for a Celery task, with SCORING_POOL_SIZE processes.
+
+    Prefork workers are daemonic, and multiprocessing refuses to start
+    children from them; their pool is started through billiard (Celery's
+    multiprocessing fork), which allows it. The pool can only fork workers
+    through billiard, so they are not replaced after
+    SCORING_MAX_TASKS_PER_CHILD jobs.
+    """
+    if multiprocessing.current_process().daemon:
+        return ScoringExecutor(mp_context=billiard.get_context("fork"))
+    return ScoringExecutor()
+
+
+def task_audit_service() -> AuditService:
+    """
+    Audit service for one run of a Celery task.
+
+    Its scoring pool, HTTP client and audit writer belong to the run's event
+    loop (the shared ones are bound to the API's); release them with
+    close_task_audit_service().
+    """
+    executor = task_scoring_executor()
+    return AuditService(
+        executor=executor,
+        fetcher=HTTPFetcher(executor=executor),
+        writer=AuditWriter(session_factory=unpooled_async_sessionmaker()),
+    )
+
+
+async def close_task_audit_service(service: AuditService):
+    """Write the service's queued audits and close its pool and client."""
+    try:
+        await service.audit_writer.stop()
+    finally:
+        service.scoring_executor.shutdown()
+        await service.fetcher.close()
+
+
+@celery_app.task(bind=True, name="bulk_audit_site")
+def bulk_audit_site(
+    self,
+    job_id: Optional[str] = None,
+    urls: Optional[List[str]] = None,
+    sitemap_url: Optional[str] = None,
+    user_id: Optional[str] = None,
+):
+    """
+    Audit every page of a site and save the results (async task).
+
+    Progress is published as the PROGRESS task state and kept in Redis;
+    running the task again with the same job_id resumes the job.
+
+    Args:
+        job_id: Job identifier (default: the task id)
+        urls: Page URLs to audit
+        sitemap_url: Sitemap listing the pages instead
+        user_id: Optional owner of the audits
+    """
+    job_id = job_id or self.request.id
+
+    def report(progress: Dict):
+        # No task state to update when called directly (e.g. from batch tasks)
+        if self.request.id:
+            self.update_state(state="PROGRESS", meta=progress)
+
+    try:
+        progress = asyncio.run(_bulk_audit(job_id, urls, sitemap_url, user_id, report))
+        return {"status": "success", **progress}
+    except Exception as e:
+        return {"status": "error", "job_id": job_id, "error": str(e)}
+
+
+async def _bulk_audit(
+    job_id: str,
+    urls: Optional[List[str]],
+    sitemap_url: Optional[str],
+    user_id: Optional[str],
+    on_progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    await init_redis()
+    # Pooled connections must not outlive this event loop
+    service = task_audit_service()
+    db = SessionLocal()
+    try:
+        await service.scoring_executor.start()
+        return await run_bulk_audit(
+            service,
+            db,
+            job_id,
+            urls=urls,
+            sitemap_url=sitemap_url,
+            user_id=user_id,
+            on_progress=on_progress,
+        )
+    finally:
+        db.close()
+        await close_task_audit_service(service)
+        await close_redis()
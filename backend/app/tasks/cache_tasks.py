@@ -0,0 +1,62 @@
+"""Celery tasks for the audit result cache."""
+
+import asyncio
+
+from .audit_tasks import close_task_audit_service, task_audit_service
+from .citation_tasks import celery_app
+from ..core.redis_pool import close_redis, get_redis, init_redis
+from ..services.audit_service import audit_key_prefix
+from ..services.cache_warmup import (
+    invalidate_stale_results,
+    scorer_changed,
+    warm_audit_cache,
+)
+
+
+@celery_app.task(name="warm_audit_cache")
+def warm_audit_cache_task(limit: int = None):
+    """
+    Re-score the hottest audits with the current scorer, then delete stale
+    results (async task).
+
+    Args:
+        limit: Number of documents to re-score (default CACHE_WARMUP_TOP_N)
+    """
+    try:
+        counts = asyncio.run(_warm_and_invalidate(limit))
+        return {"status": "success", **counts}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+async def _warm_and_invalidate(limit: int = None) -> dict:
+    await init_redis()
+    # Pooled connections must not outlive this event loop
+    service = task_audit_service()
+    try:
+        counts = await warm_audit_cache(service, limit)
+        if service.redis_client is not None:
+            counts["deleted"] = await invalidate_stale_results(
+                service.redis_client, audit_key_prefix()
+            )
+        return counts
+    finally:
+        await close_task_audit_service(service)
+        await close_redis()
+
+
+async def schedule_warmup_after_upgrade() -> bool:
+    """
+    Queue the warm-up task if the scorer changed since the last start.
+
+    Returns:
+        Whether the task was queued
+    """
+    redis_client = get_redis()
+    if redis_client is None:
+        return False
+    if not await scorer_changed(redis_client, audit_key_prefix()):
+        return False
+    # Publishing to the broker is blocking I/O
+    await asyncio.to_thread(warm_audit_cache_task.delay)
+    return True
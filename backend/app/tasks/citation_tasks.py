@@ -10,6 +10,7 @@ celery_app = Celery(
     "aieo",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.audit_tasks", "app.tasks.cache_tasks"],
 )
 
 
@@ -31,35 +32,37 @@ def probe_engines_for_citations(
     try:
         import asyncio
 
-        citations = asyncio.run(tracker.probe_engines(url, prompts, engines))
-        tracker.store_citations(db, citations)
-        return {"status": "success", "citations_found": len(citations)}
+        async def probe():
+            try:
+                return await tracker.probe(url, prompts, engines)
+            finally:
+                await tracker.close()
+
+        report = asyncio.run(probe())
+        stored = tracker.store_citations(db, report.citations)
+        return {
+            "status": "success",
+            "citations_found": len(report.citations),
+            "citations_stored": stored["inserted"],
+            "probes": report.probes,
+            "errors": report.errors,
+        }
     except Exception as e:
         return {"status": "error", "error": str(e)}
     finally:
         db.close()
 
 
-@celery_app.task(name="batch_audit_content")
-def batch_audit_content(urls: list[str]):
+@celery_app.task(bind=True, name="batch_audit_content")
+def batch_audit_content(self, urls: list[str]):
     """
     Batch audit multiple URLs (async task).
 
+    Runs the bulk audit pipeline with the task id as job id.
+
     Args:
         urls: List of URLs to audit
     """
-    from ..services.audit_service import AuditService
-
-    service = AuditService()
-    results = []
-
-    for url in urls:
-        try:
-            result = service.audit(url=url)
-            results.append(
-                {"url": url, "status": "success", "score": result.get("score")}
-            )
-        except Exception as e:
-            results.append({"url": url, "status": "error", "error": str(e)})
+    from .audit_tasks import bulk_audit_site
 
-    return results
+    return bulk_audit_site.run(job_id=self.request.id, urls=urls)
@@ -0,0 +1,146 @@
+"""Shared test fixtures."""
+
+import fnmatch
+
+import pytest
+
+
+class FakeRedis:
+    """In-memory stand-in for the parts of the asyncio Redis client in use."""
+
+    def __init__(self):
+        self.data = {}
+        self.sorted_sets = {}
+        self.sets = {}
+        self.hashes = {}
+        self.reads = 0
+
+    @staticmethod
+    def _encode(value):
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    async def get(self, key):
+        self.reads += 1
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        self.reads += 1
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value):
+        self.data[key] = self._encode(value)
+
+    async def setex(self, key, ttl, value):
+        await self.set(key, value)
+
+    async def getset(self, key, value):
+        previous = self.data.get(key)
+        await self.set(key, value)
+        return previous
+
+    async def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    unlink = delete
+
+    async def incr(self, key):
+        value = int(self.data.get(key, b"0")) + 1
+        await self.set(key, value)
+        return value
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+    async def ping(self):
+        return True
+
+    async def scan_iter(self, match="*", count=None):
+        for key in list(self.data) + list(self.sorted_sets):
+            if fnmatch.fnmatchcase(key, match):
+                yield key.encode("utf-8")
+
+    async def sadd(self, key, *members):
+        values = self.sets.setdefault(key, set())
+        added = {self._encode(member) for member in members} - values
+        values.update(added)
+        return len(added)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def hset(self, key, mapping):
+        fields = self.hashes.setdefault(key, {})
+        fields.update(
+            {
+                self._encode(field): self._encode(value)
+                for field, value in mapping.items()
+            }
+        )
+        return len(mapping)
+
+    async def hsetnx(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        if self._encode(field) in fields:
+            return 0
+        fields[self._encode(field)] = self._encode(value)
+        return 1
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(self._encode(field))
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def zincrby(self, key, amount, member):
+        scores = self.sorted_sets.setdefault(key, {})
+        scores[member] = scores.get(member, 0) + amount
+        return scores[member]
+
+    def _ranked(self, key):
+        scores = self.sorted_sets.get(key, {})
+        return sorted(scores, key=lambda member: (scores[member], member))
+
+    async def zrevrange(self, key, start, end):
+        ranked = self._ranked(key)[::-1]
+        end = len(ranked) if end == -1 else end + 1
+        return [member.encode("utf-8") for member in ranked[start:end]]
+
+    async def zremrangebyrank(self, key, start, end):
+        ranked = self._ranked(key)
+        end = len(ranked) + end + 1 if end < 0 else end + 1
+        for member in ranked[start : max(end, start)]:
+            del self.sorted_sets[key][member]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        results = [
+            await command(*args, **kwargs) for command, args, kwargs in self.commands
+        ]
+        self.commands = []
+        return results
+
+
+@pytest.fixture
+def fake_redis():
+    """In-memory Redis client."""
+    return FakeRedis()
@@ -0,0 +1,269 @@
+"""Tests for write-behind audit persistence."""
+
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.cache import TwoTierCache
+from app.core.database import Base
+from app.models.audit import Audit
+from app.models.user import User
+from app.services.audit_service import AuditService, audit_row
+from app.services.audit_writer import AuditWriter, audit_writer
+from app.services.scoring_executor import ScoringExecutor
+from app.tasks import audit_tasks
+
+USER_ID = uuid.UUID("aaaaaaaa-0000-0000-0000-000000000001")
+RESULT = {"score": 50, "grade": "C", "gaps": [], "benchmark": {}}
+
+
+def row(i: int):
+    return audit_row(USER_ID, f"{i:064x}", f"https://example.com/{i}", RESULT)
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[User.__table__, Audit.__table__]
+        )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def inserts(engine):
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("INSERT"):
+            executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    return executed
+
+
+async def saved(engine) -> int:
+    async with async_sessionmaker(engine)() as db:
+        return await db.scalar(select(func.count()).select_from(Audit))
+
+
+class BlockedSession:
+    """Session whose writes wait until the gate opens."""
+
+    def __init__(self, gate: asyncio.Event):
+        self.gate = gate
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows):
+        await self.gate.wait()
+
+    async def commit(self):
+        pass
+
+
+class FlakySession:
+    """Session to a real database whose first few writes fail."""
+
+    def __init__(self, sessions, failures: list):
+        self.session = sessions()
+        self.failures = failures
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        return False
+
+    async def execute(self, statement, rows):
+        if self.failures:
+            raise self.failures.pop()
+        await self.session.execute(statement, rows)
+
+    async def commit(self):
+        await self.session.commit()
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_written_at_once(engine, inserts):
+    """Test a full batch is inserted without waiting for the interval."""
+    writer = AuditWriter(
+        batch_size=3, flush_interval=60, session_factory=async_sessionmaker(engine)
+    )
+    for i in range(3):
+        await writer.submit(row(i))
+    for _ in range(100):
+        if writer.written:
+            break
+        await asyncio.sleep(0.01)
+
+    assert writer.written == 3
+    assert len(inserts) == 1
+    assert await saved(engine) == 3
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_written_after_interval(engine):
+    """Test a lone audit is saved once the flush interval passes."""
+    writer = AuditWriter(
+        batch_size=100, flush_interval=0.05, session_factory=async_sessionmaker(engine)
+    )
+    await writer.submit(row(0))
+    assert writer.written == 0
+
+    await asyncio.sleep(0.2)
+    assert writer.written == 1
+    assert await saved(engine) == 1
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_the_queue(engine, inserts):
+    """Test shutdown saves every queued audit, in batches."""
+    writer = AuditWriter(
+        batch_size=4, flush_interval=60, session_factory=async_sessionmaker(engine)
+    )
+    for i in range(10):
+        await writer.submit(row(i))
+
+    await writer.stop()
+    assert await saved(engine) == 10
+    assert len(inserts) == 3
+    assert writer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_makes_submit_wait():
+    """Test audits are held back, not dropped, when writes fall behind."""
+    gate = asyncio.Event()
+    writer = AuditWriter(
+        max_queue=2,
+        batch_size=1,
+        flush_interval=0,
+        session_factory=lambda: BlockedSession(gate),
+    )
+    # The first row is being written; two more fill the queue
+    for i in range(3):
+        await writer.submit(row(i))
+        await asyncio.sleep(0)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(writer.submit(row(3)), 0.05)
+
+    gate.set()
+    await writer.stop()
+    assert writer.written == 3
+    assert writer.failed == 0
+
+
+@pytest.mark.asyncio
+async def test_audit_returns_before_it_is_saved(engine, fake_redis):
+    """Test an audit only queues its row; the writer saves it later."""
+    writer = AuditWriter(
+        batch_size=100, flush_interval=60, session_factory=async_sessionmaker(engine)
+    )
+    service = AuditService(
+        executor=ScoringExecutor(pool_size=0, queue_depth=4),
+        redis_client=fake_redis,
+        writer=writer,
+    )
+    service.cache = TwoTierCache("test-writer", redis_client=fake_redis)
+
+    result = await service.audit(content="# AIEO\n\nAnswers.", user_id=USER_ID)
+    assert writer.written == 0
+    assert await saved(engine) == 0
+
+    await writer.stop()
+    service.scoring_executor.shutdown()
+    async with async_sessionmaker(engine)() as db:
+        audit = await db.scalar(select(Audit))
+    assert audit.score == result["score"]
+    assert audit.user_id == USER_ID
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried(engine, inserts):
+    """Test a batch that fails on a transient error is written on retry."""
+    sessions = async_sessionmaker(engine)
+    failures = [ConnectionError("connection reset")] * 2
+    writer = AuditWriter(
+        batch_size=5,
+        flush_interval=60,
+        retry_delay=0,
+        session_factory=lambda: FlakySession(sessions, failures),
+    )
+    for i in range(5):
+        await writer.submit(row(i))
+    await writer.stop()
+
+    assert writer.written == 5
+    assert writer.failed == 0
+    assert len(inserts) == 1
+    assert await saved(engine) == 5
+
+
+@pytest.mark.asyncio
+async def test_bad_row_does_not_lose_its_batch(engine):
+    """Test rows of a batch that keeps failing are saved one at a time."""
+    writer = AuditWriter(
+        batch_size=5,
+        flush_interval=60,
+        retries=2,
+        retry_delay=0,
+        session_factory=async_sessionmaker(engine),
+    )
+    rows = [row(i) for i in range(5)]
+    rows[2]["score"] = None
+    for audit in rows:
+        await writer.submit(audit)
+    await writer.stop()
+
+    assert writer.written == 4
+    assert writer.failed == 1
+    assert await saved(engine) == 4
+
+
+def test_task_services_write_on_their_own_loop(monkeypatch):
+    """Test each Celery run writes its audits from its own event loop."""
+    written = []
+
+    class RecordingSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            pass
+
+        async def execute(self, statement, rows):
+            written.append((asyncio.get_running_loop(), len(rows)))
+
+        async def commit(self):
+            pass
+
+    monkeypatch.setattr(
+        audit_tasks, "unpooled_async_sessionmaker", lambda: RecordingSession
+    )
+
+    async def run():
+        service = audit_tasks.task_audit_service()
+        assert service.audit_writer is not audit_writer
+        await service.audit_writer.submit(row(0))
+        await audit_tasks.close_task_audit_service(service)
+        return asyncio.get_running_loop()
+
+    loops = [asyncio.run(run()) for _ in range(2)]
+
+    assert written == [(loop, 1) for loop in loops]
+    assert audit_writer.pending == 0 and audit_writer._task is None
@@ -0,0 +1,168 @@
+"""Tests for cached API key verification and batched usage tracking."""
+
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core import auth_cache, security
+from app.core.auth_cache import APIKeyCache, UsageCounter
+from app.core.database import Base
+from app.core.security import api_key_user_id, revoke_api_key, verify_api_key
+from app.models.api_key import APIKey
+from app.models.user import User
+
+KEY = "aieo-test-key-0001"
+USER_ID = uuid.UUID("aaaaaaaa-0000-0000-0000-000000000001")
+KEY_ID = uuid.UUID("aaaaaaaa-0000-0000-0000-0000000000a1")
+
+
+class PublishingRedis:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[User.__table__, APIKey.__table__]
+        )
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(engine):
+    session = async_sessionmaker(engine)()
+    session.add(User(id=USER_ID, email="owner@example.com"))
+    session.add(APIKey(id=KEY_ID, user_id=USER_ID, key_hash=APIKey.hash_key(KEY)))
+    await session.commit()
+    yield session
+    await session.close()
+
+
+@pytest.fixture
+def counter(engine, monkeypatch):
+    counter = UsageCounter(
+        flush_interval=3600, session_factory=async_sessionmaker(engine)
+    )
+    monkeypatch.setattr(security, "usage_counter", counter)
+    monkeypatch.setattr(security, "api_key_cache", APIKeyCache(max_items=10, ttl=60))
+    return counter
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+@pytest.mark.asyncio
+async def test_verified_keys_are_served_from_memory(db, counter, statements):
+    """Test only the first request of a key queries the database."""
+    for _ in range(5):
+        assert await verify_api_key(x_api_key=KEY, db=db) == KEY
+    assert await api_key_user_id(db, KEY) == str(USER_ID)
+
+    assert len(statements) == 1
+    assert statements[0].lstrip().startswith("SELECT")
+
+
+@pytest.mark.asyncio
+async def test_usage_is_written_in_one_batch(db, counter, statements):
+    """Test usage counts and last use reach api_keys on flush."""
+    for _ in range(3):
+        await verify_api_key(x_api_key=KEY, db=db)
+    assert not any(s.lstrip().startswith("UPDATE") for s in statements)
+
+    await counter.flush()
+    await counter.flush()
+    assert sum(s.lstrip().startswith("UPDATE") for s in statements) == 1
+
+    db.expire_all()
+    api_key = await db.get(APIKey, KEY_ID)
+    assert api_key.usage_count == 3
+    assert api_key.last_used_at is not None
+
+
+@pytest.mark.asyncio
+async def test_revoked_keys_are_refused_at_once(db, counter, monkeypatch):
+    """Test revocation drops the cached key and is announced on Redis."""
+    redis_client = PublishingRedis()
+    monkeypatch.setattr(auth_cache, "get_redis", lambda: redis_client)
+    await verify_api_key(x_api_key=KEY, db=db)
+
+    assert await revoke_api_key(db, KEY)
+    with pytest.raises(HTTPException) as error:
+        await verify_api_key(x_api_key=KEY, db=db)
+    assert error.value.status_code == 401
+    assert redis_client.published == [("auth:revoked", APIKey.hash_key(KEY))]
+
+
+@pytest.mark.asyncio
+async def test_unknown_keys_are_not_cached(db, counter, statements):
+    """Test a rejected key is looked up again, so new keys work at once."""
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await verify_api_key(x_api_key="aieo-unknown-key", db=db)
+    assert len(statements) == 2
+    assert len(security.api_key_cache.keys) == 0
+
+
+@pytest.mark.asyncio
+async def test_usage_is_flushed_in_the_background(db, engine, statements):
+    """Test usage is written every interval without waiting for requests."""
+    counter = UsageCounter(
+        flush_interval=0.05, session_factory=async_sessionmaker(engine)
+    )
+    counter.start()
+    counter.record(KEY_ID)
+    counter.record(KEY_ID)
+    assert not any(s.lstrip().startswith("UPDATE") for s in statements)
+
+    # No further requests: the background task writes the counts
+    await asyncio.sleep(0.2)
+    assert sum(s.lstrip().startswith("UPDATE") for s in statements) == 1
+
+    counter.record(KEY_ID)
+    await counter.stop()
+    assert sum(s.lstrip().startswith("UPDATE") for s in statements) == 2
+    db.expire_all()
+    assert (await db.get(APIKey, KEY_ID)).usage_count == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_usage_write_is_kept_for_the_next_flush(db, engine):
+    """Test counts survive a failed write and are added on the next flush."""
+    sessions = async_sessionmaker(engine)
+    failures = [ConnectionError("connection reset")]
+
+    def session_factory():
+        if failures:
+            raise failures.pop()
+        return sessions()
+
+    counter = UsageCounter(flush_interval=3600, session_factory=session_factory)
+    counter.record(KEY_ID)
+    counter.record(KEY_ID)
+    await counter.flush()
+
+    counter.record(KEY_ID)
+    await counter.flush()
+    db.expire_all()
+    assert (await db.get(APIKey, KEY_ID)).usage_count == 3
@@ -0,0 +1,117 @@
+"""Tests for streaming batch audits."""
+
+import httpx
+import pytest
+
+from app.core.cache import TwoTierCache
+from app.services import scoring_executor as executor_module
+from app.services.audit_service import AuditService
+from app.services.http_fetcher import HTTPFetcher
+from app.services.scoring_executor import ScoringExecutor
+
+DOCUMENTS = [
+    "# What is AIEO?\n\nAIEO structures content for AI answers.",
+    "# Pricing\n\n| Plan | Price |\n|---|---|\n| Free | $0 |",
+    "# FAQ\n\n## How does it work?\n\nAccording to research, it works.",
+]
+
+
+def site(request: httpx.Request) -> httpx.Response:
+    """Mock site where only the home page exists."""
+    if request.url.path != "/":
+        return httpx.Response(404)
+    html = "<html><body><h1>Home</h1><p>Welcome.</p></body></html>"
+    return httpx.Response(200, content=html.encode("utf-8"))
+
+
+@pytest.fixture
+def service(fake_redis):
+    executor = ScoringExecutor(pool_size=0, queue_depth=4)
+    fetcher = HTTPFetcher(transport=httpx.MockTransport(site), executor=executor)
+    fetcher.metadata._redis = fake_redis
+    service = AuditService(executor=executor, redis_client=fake_redis, fetcher=fetcher)
+    service.cache = TwoTierCache("test-batch", redis_client=fake_redis)
+    yield service
+    service.scoring_executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_every_item(service):
+    """Test each item gets one line, tagged with its index and id."""
+    items = [{"id": f"doc-{i}", "content": doc} for i, doc in enumerate(DOCUMENTS)]
+    items += [{"url": "https://example.com/"}, {"url": "https://example.com/gone"}]
+
+    lines = [line async for line in service.audit_batch(items, concurrency=2)]
+    await service.fetcher.close()
+
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3, 4]
+    for i in range(3):
+        assert by_index[i]["id"] == f"doc-{i}"
+        assert "score" in by_index[i]
+    assert "score" in by_index[3] and "id" not in by_index[3]
+    assert by_index[4]["error"]["code"] == "FETCH_FAILED"
+
+
+@pytest.mark.asyncio
+async def test_batch_reads_cached_results_with_one_mget(service, fake_redis):
+    """Test cached items come first, read in a single round trip."""
+    first = await service.audit(content=DOCUMENTS[0])
+    second = await service.audit(content=DOCUMENTS[1])
+    service.cache.local.clear()
+    fake_redis.reads = 0
+
+    items = [{"content": doc} for doc in DOCUMENTS] + [{"format": "markdown"}]
+    lines = [line async for line in service.audit_batch(items)]
+
+    assert lines[:2] == [{"index": 0, **first}, {"index": 1, **second}]
+    # Only the MGET: the uncached document is not looked up again
+    assert fake_redis.reads == 1
+    assert "score" in lines[2] or "score" in lines[3]
+    (failed,) = [line for line in lines if "error" in line]
+    assert failed["index"] == 3
+    assert failed["error"]["code"] == "INVALID_REQUEST"
+
+
+@pytest.mark.asyncio
+async def test_batch_scores_documents_together(service, monkeypatch):
+    """Test uncached documents of a batch go through one NER pass."""
+    extractor = executor_module._get_engine().entity_extractor
+    calls = []
+    extract_many = extractor.extract_many
+
+    def spy(texts):
+        texts = list(texts)
+        calls.append(len(texts))
+        return extract_many(texts)
+
+    monkeypatch.setattr(extractor, "extract_many", spy)
+    service.scoring_executor.batch_window = 0.1
+
+    items = [{"content": doc} for doc in DOCUMENTS]
+    lines = [line async for line in service.audit_batch(items)]
+
+    assert calls == [3]
+    assert all("score" in line for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_incremental_results_are_cached_apart(service, fake_redis):
+    """Test incremental and full audits of the same content never share a key."""
+    await service.audit(content=DOCUMENTS[1], incremental=True)
+    service.cache.local.clear()
+    fake_redis.reads = 0
+
+    lines = [line async for line in service.audit_batch([{"content": DOCUMENTS[1]}])]
+    # The incremental result is not served: the full audit is scored anew
+    assert fake_redis.reads == 1
+    assert "score" in lines[0]
+    assert service._get_cache_key("abc", "markdown") != service._get_cache_key(
+        "abc", "markdown", incremental=True
+    )
+
+    fake_redis.reads = 0
+    items = [{"content": DOCUMENTS[1], "incremental": True}]
+    (cached,) = [line async for line in service.audit_batch(items)]
+    assert cached["score"] == lines[0]["score"]
+    assert fake_redis.reads == 1
@@ -0,0 +1,252 @@
+"""Tests for the bulk crawl-and-audit pipeline."""
+
+import asyncio
+import gzip
+import multiprocessing
+import os
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import audit
+from app.core.database import Base, get_async_db
+from app.models.api_key import APIKey
+from app.models.audit import Audit
+from app.models.user import User
+from app.services.audit_service import AuditService
+from app.core.errors import ContentTooLargeError
+from app.services import bulk_audit
+from app.services.bulk_audit import (
+    BulkAuditJob,
+    load_sitemap,
+    parse_sitemap,
+    run_bulk_audit,
+)
+from app.services.http_fetcher import HTTPFetcher
+from app.services.scoring_executor import ScoringExecutor
+from app.tasks.audit_tasks import task_scoring_executor
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/pages.xml</loc></sitemap>
+  <sitemap><loc>file:///etc/passwd</loc></sitemap>
+</sitemapindex>"""
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc></url>
+  <url><loc>https://example.com/b</loc><lastmod>2025-01-01</lastmod></url>
+  <url><loc>https://example.com/c</loc></url>
+  <url><loc>https://example.com/a</loc></url>
+</urlset>"""
+
+
+def site(request: httpx.Request) -> httpx.Response:
+    """Mock site with a sitemap index and three pages."""
+    path = request.url.path
+    if path == "/sitemap.xml":
+        return httpx.Response(200, content=SITEMAP_INDEX)
+    if path == "/pages.xml":
+        return httpx.Response(200, content=gzip.compress(SITEMAP))
+    if path == "/c":
+        return httpx.Response(500)
+    html = f"<html><body><h1>Page {path}</h1><p>Text of {path}.</p></body></html>"
+    return httpx.Response(200, content=html.encode("utf-8"))
+
+
+@pytest.fixture
+def db():
+    # One shared connection, as inserts run in a worker thread
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine, tables=[User.__table__, Audit.__table__])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def service(fake_redis):
+    executor = ScoringExecutor(pool_size=0, queue_depth=4)
+    fetcher = HTTPFetcher(transport=httpx.MockTransport(site), executor=executor)
+    fetcher.metadata._redis = fake_redis
+    yield AuditService(executor=executor, redis_client=fake_redis, fetcher=fetcher)
+    executor.shutdown()
+
+
+def test_parse_sitemap_and_index():
+    """Test page URLs and nested sitemaps are told apart."""
+    assert parse_sitemap(SITEMAP_INDEX) == (
+        [],
+        ["https://example.com/pages.xml", "file:///etc/passwd"],
+    )
+    pages, nested = parse_sitemap(gzip.compress(SITEMAP))
+    assert pages[:3] == [f"https://example.com/{page}" for page in "abc"]
+    assert nested == []
+
+
+def test_sitemap_decompression_is_bounded(monkeypatch):
+    """Test a gzip bomb is rejected past the size cap, not inflated."""
+    monkeypatch.setattr(bulk_audit, "SITEMAP_MAX_BYTES", 1024)
+    bomb = gzip.compress(b"<urlset>" + b" " * 100000 + b"</urlset>")
+
+    with pytest.raises(ContentTooLargeError):
+        parse_sitemap(bomb)
+    assert parse_sitemap(gzip.compress(SITEMAP))[0][0] == "https://example.com/a"
+
+
+@pytest.mark.asyncio
+async def test_sitemap_download_is_bounded(service, monkeypatch):
+    """Test oversized sitemaps are aborted and invalid nested URLs skipped."""
+    requested = []
+    service.fetcher.transport.handler = lambda request: (
+        requested.append(str(request.url)) or site(request)
+    )
+    urls = await load_sitemap(service, "https://example.com/sitemap.xml", 10)
+    assert urls == [f"https://example.com/{page}" for page in "abc"]
+    assert requested == [
+        "https://example.com/sitemap.xml",
+        "https://example.com/pages.xml",
+    ]
+
+    monkeypatch.setattr(bulk_audit, "SITEMAP_MAX_BYTES", 100)
+    with pytest.raises(ContentTooLargeError):
+        await load_sitemap(service, "https://example.com/sitemap.xml", 10)
+    await service.fetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_bulk_audit_from_sitemap(service, db, monkeypatch):
+    """Test pages are audited, saved in batches and progress is reported."""
+    monkeypatch.setattr("app.core.config.settings.BULK_INSERT_BATCH_SIZE", 1)
+    updates = []
+
+    progress = await run_bulk_audit(
+        service,
+        db,
+        "job-1",
+        sitemap_url="https://example.com/sitemap.xml",
+        on_progress=updates.append,
+    )
+    await service.fetcher.close()
+
+    assert progress["status"] == "completed"
+    assert (progress["total"], progress["completed"], progress["failed"]) == (3, 2, 1)
+    urls = set(db.scalars(select(Audit.url)))
+    assert urls == {"https://example.com/a", "https://example.com/b"}
+    assert updates[-1]["completed"] == 2
+
+    stored = await BulkAuditJob("job-1", service.redis_client).progress()
+    assert stored["status"] == "completed"
+    assert stored["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_audit_resumes(service, db, fake_redis):
+    """Test a resumed job skips the pages an earlier run saved."""
+    await fake_redis.sadd("bulk:job-2:done", "https://example.com/a")
+    urls = ["https://example.com/a", "https://example.com/b"]
+
+    progress = await run_bulk_audit(service, db, "job-2", urls=urls)
+    await service.fetcher.close()
+
+    assert progress["completed"] == 2
+    assert db.scalar(select(func.count()).select_from(Audit)) == 1
+    assert db.scalar(select(Audit.url)) == "https://example.com/b"
+
+
+def _worker_pid_from_daemon(queue):
+    """Score in a daemonic process, like a Celery prefork worker."""
+
+    async def worker_pid():
+        executor = task_scoring_executor()
+        try:
+            return await executor._submit(os.getpid)
+        finally:
+            executor.shutdown()
+
+    try:
+        queue.put(asyncio.run(worker_pid()))
+    except Exception as e:
+        queue.put(repr(e))
+
+
+def test_prefork_workers_score_on_a_process_pool():
+    """Test bulk audits in daemonic workers still get a process pool."""
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    worker = context.Process(target=_worker_pid_from_daemon, args=(queue,), daemon=True)
+    worker.start()
+    pid = queue.get(timeout=60)
+    worker.join(timeout=10)
+
+    assert isinstance(pid, int), pid
+    assert pid not in (os.getpid(), worker.pid)
+
+
+@pytest_asyncio.fixture
+async def bulk_api(fake_redis, monkeypatch):
+    """Bulk audit routes over an empty api_keys table, with queued tasks."""
+    db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with db_engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[User.__table__, APIKey.__table__]
+        )
+    sessions = async_sessionmaker(db_engine)
+
+    async def get_test_db():
+        async with sessions() as session:
+            yield session
+
+    queued = []
+
+    class Task:
+        @staticmethod
+        def apply_async(kwargs, task_id):
+            queued.append(task_id)
+
+    monkeypatch.setattr(audit, "get_redis", lambda: fake_redis)
+    monkeypatch.setattr(audit, "bulk_audit_site", Task)
+    app = FastAPI()
+    app.include_router(audit.router)
+    app.dependency_overrides[get_async_db] = get_test_db
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+    yield client, queued
+    await client.aclose()
+    await db_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_bulk_jobs_are_private_to_their_key(bulk_api):
+    """Test another key can neither read nor resume a job."""
+    client, queued = bulk_api
+    owner = {"X-API-Key": "owner-api-key-0001"}
+    other = {"X-API-Key": "other-api-key-0002"}
+    body = {"urls": ["https://example.com/a"]}
+
+    response = await client.post("/aieo/audit/bulk", json=body, headers=owner)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    response = await client.get(f"/aieo/audit/bulk/{job_id}", headers=owner)
+    assert response.json() == {"job_id": job_id, "status": "queued"}
+    response = await client.get(f"/aieo/audit/bulk/{job_id}", headers=other)
+    assert response.status_code == 404
+
+    resume = {**body, "job_id": job_id}
+    response = await client.post("/aieo/audit/bulk", json=resume, headers=other)
+    assert response.status_code == 404
+    response = await client.post("/aieo/audit/bulk", json=resume, headers=owner)
+    assert response.status_code == 202
+    assert queued == [job_id, job_id]
@@ -0,0 +1,130 @@
+"""Tests for the two-tier result cache."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core.cache import LocalCache, TwoTierCache
+
+
+def test_local_cache_evicts_by_count_and_size():
+    """Test least recently used entries are evicted at either limit."""
+    cache = LocalCache(max_items=3, max_bytes=100, ttl=60)
+    cache.set("a", 1, 10)
+    cache.set("b", 2, 10)
+    cache.set("c", 3, 10)
+    cache.get("a")
+    cache.set("d", 4, 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("e", 5, 85)
+    # "c" and "d" make room; "a" was used more recently
+    assert cache.get("c") is None
+    assert cache.get("d") is None
+    assert cache.get("a") == 1
+    assert cache.size_bytes == 95
+    assert cache.evictions == 3
+
+    # Entries larger than the whole budget are not kept
+    cache.set("f", 6, 101)
+    assert cache.get("f") is None
+
+
+def test_local_cache_expires_entries():
+    """Test entries are dropped after their TTL."""
+    cache = LocalCache(max_items=10, max_bytes=100, ttl=0)
+    cache.set("a", 1, 10)
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_hit_fills_local_tier(fake_redis):
+    """Test a Redis hit is served locally afterwards."""
+    fake_redis.data["audit:x"] = json.dumps({"score": 80}).encode("utf-8")
+    cache = TwoTierCache("test-fill", redis_client=fake_redis)
+
+    assert await cache.get("audit:x") == {"score": 80}
+    assert await cache.get("audit:x") == {"score": 80}
+    assert fake_redis.reads == 1
+    stats = cache.stats()
+    assert stats["redis_hits"] == 1
+    assert stats["local_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_many_reads_misses_in_one_round_trip(fake_redis):
+    """Test local hits are served locally and the rest with one MGET."""
+    fake_redis.data["audit:b"] = json.dumps({"score": 2}).encode("utf-8")
+    cache = TwoTierCache("test-many", redis_client=fake_redis)
+    cache.local.set("audit:a", {"score": 1}, 10)
+
+    values = await cache.get_many(["audit:a", "audit:b", "audit:c"])
+    assert values == [{"score": 1}, {"score": 2}, None]
+    assert fake_redis.reads == 1
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["redis_hits"], stats["misses"]) == (1, 1, 1)
+    assert cache.local.get("audit:b") == {"score": 2}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once(fake_redis):
+    """Test concurrent requests for one key share a single computation."""
+    cache = TwoTierCache("test-coalesce", redis_client=fake_redis)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"score": 75}
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("audit:y", compute) for _ in range(10))
+    )
+
+    assert calls == 1
+    assert all(result == {"score": 75} for result in results)
+    assert json.loads(fake_redis.data["audit:y"]) == {"score": 75}
+    assert cache.stats()["coalesced"] == 9
+
+    await cache.get_or_compute("audit:y", compute)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    """Test a failed computation is shared, then retried on the next call."""
+    cache = TwoTierCache("test-errors", local_enabled=True, redis_enabled=False)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("k", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeed():
+        return {"ok": True}
+
+    assert await cache.get_or_compute("k", succeed) == {"ok": True}
+
+
+@pytest.mark.asyncio
+async def test_tiers_can_be_disabled(fake_redis):
+    """Test disabled tiers are neither read nor written."""
+    cache = TwoTierCache(
+        "test-disabled",
+        redis_client=fake_redis,
+        local_enabled=False,
+        redis_enabled=False,
+    )
+    await cache.set("k", {"a": 1})
+
+    assert await cache.get("k") is None
+    assert fake_redis.data == {}
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,124 @@
+"""Tests for versioned audit cache keys and cache warm-up."""
+
+import pytest
+
+from app.core.cache import TwoTierCache
+from app.services import audit_service as audit_module
+from app.services.audit_service import AuditService, audit_key_prefix
+from app.services.cache_warmup import (
+    HOT_KEY,
+    SOURCE_PREFIX,
+    HotKeyTracker,
+    invalidate_stale_results,
+    save_source,
+    scorer_changed,
+    warm_audit_cache,
+)
+from app.services.scoring_executor import ScoringExecutor
+
+CONTENT = """# What is AIEO?
+
+AIEO is a method for structuring content. According to research, 45% of
+answers cite structured pages.
+"""
+
+
+@pytest.fixture
+def service(fake_redis):
+    """Audit service scoring in a thread, backed by the fake Redis."""
+    service = AuditService(
+        executor=ScoringExecutor(pool_size=0, queue_depth=4), redis_client=fake_redis
+    )
+    service.cache = TwoTierCache("test-audit", redis_client=fake_redis)
+    service.hot_keys = HotKeyTracker(fake_redis, flush_interval=0)
+    yield service
+    service.scoring_executor.shutdown()
+
+
+def test_cache_key_covers_format_and_scorer(monkeypatch):
+    """Test the same bytes get distinct keys per format and scorer."""
+    service = AuditService()
+    markdown_key = service._get_cache_key("ab" * 32, "markdown")
+    html_key = service._get_cache_key("ab" * 32, "html")
+
+    assert markdown_key != html_key
+    assert markdown_key.startswith(audit_key_prefix() + ":")
+
+    monkeypatch.setattr(audit_module, "SCORER_VERSION", "next")
+    assert service._get_cache_key("ab" * 32, "markdown") != markdown_key
+
+
+@pytest.mark.asyncio
+async def test_hot_key_tracker_flushes_in_batches(fake_redis):
+    """Test counts stay in process until the flush interval passes."""
+    tracker = HotKeyTracker(fake_redis, flush_interval=3600, max_keys=2)
+    for member in ["markdown:a", "markdown:a", "markdown:b", "html:c"]:
+        await tracker.record(member)
+    assert HOT_KEY not in fake_redis.sorted_sets
+
+    await tracker.flush()
+    # Trimmed to the two most requested documents
+    assert (await fake_redis.zrevrange(HOT_KEY, 0, -1))[0] == b"markdown:a"
+    assert len(fake_redis.sorted_sets[HOT_KEY]) == 2
+
+
+@pytest.mark.asyncio
+async def test_scorer_changed_only_after_upgrade(fake_redis):
+    """Test the first start and upgrades are changes, restarts are not."""
+    assert await scorer_changed(fake_redis, "audit:v1:aaa")
+    assert not await scorer_changed(fake_redis, "audit:v1:aaa")
+    assert await scorer_changed(fake_redis, "audit:v2:bbb")
+
+
+@pytest.mark.asyncio
+async def test_large_sources_are_not_kept(fake_redis, monkeypatch):
+    """Test pasted content over the byte cap is not copied to Redis."""
+    monkeypatch.setattr(audit_module.settings, "CACHE_WARMUP_MAX_SOURCE_BYTES", 8)
+    await save_source(fake_redis, "markdown:small", content="# Hi")
+    # 6 characters, but 12 bytes in UTF-8
+    await save_source(fake_redis, "markdown:large", content="éééééé")
+    await save_source(fake_redis, "html:page", url="https://example.com/")
+
+    assert await fake_redis.get(SOURCE_PREFIX + "markdown:small")
+    assert await fake_redis.get(SOURCE_PREFIX + "markdown:large") is None
+    assert await fake_redis.get(SOURCE_PREFIX + "html:page")
+
+
+@pytest.mark.asyncio
+async def test_invalidate_stale_results(fake_redis):
+    """Test only results of other scorers are deleted."""
+    content_hash = "ab" * 32
+    current = f"audit:v2:bbb:markdown:{content_hash}"
+    for key in [
+        current,
+        f"audit:v1:aaa:markdown:{content_hash}",
+        f"audit:{content_hash}",
+        f"audit:source:markdown:{content_hash}",
+    ]:
+        await fake_redis.set(key, "{}")
+
+    deleted = await invalidate_stale_results(fake_redis, "audit:v2:bbb", batch_size=1)
+    assert deleted == 2
+    assert set(fake_redis.data) == {
+        current,
+        f"audit:source:markdown:{content_hash}",
+    }
+
+
+@pytest.mark.asyncio
+async def test_warm_up_rescores_hot_documents(service, fake_redis, monkeypatch):
+    """Test hot documents are re-scored under the new scorer's keys."""
+    first = await service.audit(content=CONTENT)
+
+    monkeypatch.setattr(audit_module, "SCORER_VERSION", "next")
+    service.cache.local.clear()
+    counts = await warm_audit_cache(service, limit=10)
+
+    assert counts == {"warmed": 1, "cached": 0, "skipped": 0, "failed": 0}
+    (member,) = await fake_redis.zrevrange(HOT_KEY, 0, -1)
+    content_hash = member.decode("utf-8").split(":", 1)[1]
+    assert await fake_redis.exists(service._get_cache_key(content_hash, "markdown"))
+    assert await service.audit(content=CONTENT) == first
+
+    counts = await warm_audit_cache(service, limit=10)
+    assert counts["cached"] == 1
@@ -0,0 +1,201 @@
+"""Tests for the SQL-aggregated citation dashboard."""
+
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import audit, citations
+from app.core import security
+from app.core.auth_cache import APIKeyCache, UsageCounter
+from app.core.cache import TwoTierCache
+from app.core.database import Base, get_async_db
+from app.models.api_key import APIKey
+from app.models.audit import Audit
+from app.models.citation import Citation
+from app.models.user import User
+from app.services.audit_service import AuditService
+from app.services.audit_writer import AuditWriter
+from app.services.citation_tracker import CitationTracker
+from app.services.http_fetcher import HTTPFetcher
+from app.services.scoring_executor import ScoringExecutor
+
+TODAY = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+USER_ID = uuid.uuid4()
+KEY = "aieo-test-key-0001"
+
+
+def rows(url, engine, counts):
+    """Citations of a URL: counts[i] of them i days ago."""
+    for days_ago, count in enumerate(counts):
+        for i in range(count):
+            yield {
+                "url": url,
+                "domain": "example.com",
+                "engine": engine,
+                "prompt": f"prompt {i}",
+                "citation_text": "...",
+                "detected_at": TODAY - timedelta(days=days_ago, hours=-1),
+            }
+
+
+@pytest_asyncio.fixture
+async def db():
+    db_engine = create_async_engine("sqlite+aiosqlite://")
+    async with db_engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Audit.__table__, Citation.__table__],
+        )
+    session = async_sessionmaker(db_engine)()
+    session.add(User(id=USER_ID, email="owner@example.com"))
+    session.add(
+        Audit(
+            user_id=USER_ID,
+            content_hash="ab" * 32,
+            url="https://example.com/a",
+            score=70,
+            grade="B",
+            gaps=[],
+            fixes=[],
+            benchmark={},
+            expires_at=TODAY,
+        )
+    )
+    for url, engine, counts in [
+        ("https://example.com/a", "grok", [2, 1, 0, 4]),
+        ("https://example.com/a", "claude", [1]),
+        ("https://example.com/b", "grok", [3, 3]),
+    ]:
+        await session.execute(insert(Citation), list(rows(url, engine, counts)))
+    # Outside a 30-day window
+    await session.execute(
+        insert(Citation), list(rows("https://example.com/old", "grok", [0] * 40 + [5]))
+    )
+    await session.commit()
+    yield session
+    await session.close()
+    await db_engine.dispose()
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.QDRANT_URL", "")
+    return CitationTracker()
+
+
+@pytest.mark.asyncio
+async def test_dashboard_aggregates_in_sql(db, tracker):
+    """Test totals, the daily series and top pages over the window."""
+    data = await tracker.get_dashboard_data(db)
+
+    assert data["by_engine"] == {"grok": 13, "claude": 1}
+    assert data["top_cited_pages"] == [
+        {"url": "https://example.com/a", "count": 8},
+        {"url": "https://example.com/b", "count": 6},
+    ]
+    series = data["citation_rate"]
+    assert [point["citations"] for point in series] == [4, 4, 6]
+    assert series[-1] == {
+        "date": TODAY.strftime("%Y-%m-%d"),
+        "citations": 6,
+        "by_engine": {"claude": 1, "grok": 5},
+    }
+
+
+@pytest.mark.asyncio
+async def test_dashboard_window_and_user_scope(db, tracker):
+    """Test the days window and scoping to the user's audited pages."""
+    recent = await tracker.get_dashboard_data(db, days=2)
+    assert recent["by_engine"] == {"grok": 9, "claude": 1}
+
+    scoped = await tracker.get_dashboard_data(db, user_id=str(USER_ID))
+    assert scoped["by_engine"] == {"grok": 7, "claude": 1}
+    assert [page["url"] for page in scoped["top_cited_pages"]] == [
+        "https://example.com/a"
+    ]
+
+    other = await tracker.get_dashboard_data(db, user_id=str(uuid.uuid4()))
+    assert other == {"citation_rate": [], "by_engine": {}, "top_cited_pages": []}
+
+
+def page(request: httpx.Request) -> httpx.Response:
+    html = "<html><body><h1>Home</h1><p>Welcome.</p></body></html>"
+    return httpx.Response(200, content=html.encode("utf-8"))
+
+
+@pytest.mark.asyncio
+async def test_dashboard_counts_pages_audited_with_the_key(
+    tracker, fake_redis, monkeypatch
+):
+    """Test an audit made with a key scopes that key's dashboard."""
+    db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with db_engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[
+                User.__table__,
+                APIKey.__table__,
+                Audit.__table__,
+                Citation.__table__,
+            ],
+        )
+    sessions = async_sessionmaker(db_engine)
+    async with sessions() as session:
+        session.add(User(id=USER_ID, email="owner@example.com"))
+        session.add(APIKey(user_id=USER_ID, key_hash=APIKey.hash_key(KEY)))
+        for url in ["https://example.com/", "https://example.com/other"]:
+            await session.execute(insert(Citation), list(rows(url, "grok", [2])))
+        await session.commit()
+
+    async def get_test_db():
+        async with sessions() as session:
+            yield session
+
+    executor = ScoringExecutor(pool_size=0, queue_depth=4)
+    fetcher = HTTPFetcher(transport=httpx.MockTransport(page), executor=executor)
+    fetcher.metadata._redis = fake_redis
+    writer = AuditWriter(batch_size=100, flush_interval=60, session_factory=sessions)
+    service = AuditService(
+        executor=executor, redis_client=fake_redis, fetcher=fetcher, writer=writer
+    )
+    service.cache = TwoTierCache("test-dashboard", redis_client=fake_redis)
+    monkeypatch.setattr(audit, "audit_service", service)
+    monkeypatch.setattr(citations, "citation_tracker", tracker)
+    monkeypatch.setattr(security, "api_key_cache", APIKeyCache(max_items=10, ttl=60))
+    monkeypatch.setattr(
+        security, "usage_counter", UsageCounter(3600, session_factory=sessions)
+    )
+
+    app = FastAPI()
+    app.include_router(audit.router)
+    app.include_router(citations.router)
+    app.dependency_overrides[get_async_db] = get_test_db
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+        headers={"X-API-Key": KEY},
+    )
+    try:
+        response = await client.post(
+            "/aieo/audit", json={"url": "https://example.com/"}
+        )
+        assert response.status_code == 200
+        await writer.stop()
+
+        response = await client.get("/aieo/dashboard")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["by_engine"] == {"grok": 2}
+        assert data["top_cited_pages"] == [{"url": "https://example.com/", "count": 2}]
+    finally:
+        await client.aclose()
+        await fetcher.close()
+        executor.shutdown()
+        await db_engine.dispose()
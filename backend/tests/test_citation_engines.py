@@ -0,0 +1,177 @@
+"""Tests for citation engine adapters and the mock engine."""
+
+import json
+
+import httpx
+import pytest
+
+from app.services import citation_engines
+from app.services.citation_engines import (
+    ClaudeAdapter,
+    EngineAnswer,
+    GrokAdapter,
+    MockEngine,
+    create_engine,
+)
+from app.services.citation_extraction import CitationIndex
+from app.services.citation_tracker import CitationTracker
+from app.services.probe_scheduler import EngineRateLimitedError, ProbeError
+
+URL = "https://example.com/guide"
+
+
+def grok_api(request: httpx.Request) -> httpx.Response:
+    """Mock xAI API: rate limits one prompt, cites URL for another."""
+    prompt = json.loads(request.content)["messages"][0]["content"]
+    if prompt == "busy":
+        return httpx.Response(429, headers={"Retry-After": "2"})
+    if prompt == "bad":
+        return httpx.Response(400)
+    citations = ["https://other.example.org/", URL + "/"] if prompt == "cited" else []
+    return httpx.Response(
+        200,
+        json={
+            "choices": [{"message": {"content": f"Answer to {prompt}."}}],
+            "citations": citations,
+        },
+    )
+
+
+def claude_api(request: httpx.Request) -> httpx.Response:
+    """Mock Messages API answering with web search citations."""
+    assert request.headers["x-api-key"] == "test-key"
+    return httpx.Response(
+        200,
+        json={
+            "content": [
+                {"type": "server_tool_use", "name": "web_search"},
+                {"type": "text", "text": "AIEO structures content "},
+                {
+                    "type": "text",
+                    "text": "for AI answers.",
+                    "citations": [
+                        {"url": "https://other.example.org/a"},
+                        {"url": URL},
+                        {"url": URL},
+                    ],
+                },
+            ]
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_grok_adapter_maps_citations_and_errors():
+    """Test cited URLs match with their position, and HTTP errors map."""
+    grok = GrokAdapter(api_key="test-key", transport=httpx.MockTransport(grok_api))
+
+    citation = await grok.probe("cited", URL)
+    assert (citation["engine"], citation["position"]) == ("grok", 2)
+    assert citation["citation_text"] == "Answer to cited."
+    assert await grok.probe("other", URL) is None
+
+    with pytest.raises(EngineRateLimitedError) as rate_limited:
+        await grok.probe("busy", URL)
+    assert rate_limited.value.retry_after == 2.0
+    with pytest.raises(ProbeError) as rejected:
+        await grok.probe("bad", URL)
+    assert not rejected.value.retryable
+    await grok.close()
+
+
+@pytest.mark.asyncio
+async def test_claude_adapter_reads_text_block_citations():
+    """Test text blocks are joined and their citations deduplicated."""
+    claude = ClaudeAdapter(
+        api_key="test-key", transport=httpx.MockTransport(claude_api)
+    )
+
+    answer = await claude.ask("What is AIEO?")
+    assert answer.text == "AIEO structures content for AI answers."
+    assert answer.cited_urls == ["https://other.example.org/a", URL]
+    await claude.close()
+
+
+@pytest.mark.asyncio
+async def test_adapter_without_api_key_fails_permanently():
+    """Test a missing API key is not retried."""
+    with pytest.raises(ProbeError) as missing:
+        await GrokAdapter(api_key="").probe("prompt", URL)
+    assert not missing.value.retryable
+
+
+@pytest.mark.asyncio
+async def test_mock_engine_cites_at_configured_rate():
+    """Test the citation rate holds and repeated runs agree."""
+    engine = MockEngine("grok", citation_rate=0.25, latency_ms=0, error_rate=0)
+    prompts = [f"prompt {i}" for i in range(400)]
+
+    cited = [await engine.probe(prompt, URL) for prompt in prompts]
+    rate = sum(citation is not None for citation in cited) / len(prompts)
+    assert 0.18 < rate < 0.32
+    again = [await engine.probe(prompt, URL) for prompt in prompts]
+    assert [c is None for c in again] == [c is None for c in cited]
+
+
+def test_mock_engine_latency_distribution():
+    """Test latencies spread log-normally around the median."""
+    engine = MockEngine("claude", latency_ms=100, latency_sigma=0.5, seed=1)
+    latencies = sorted(engine.latency() for _ in range(1000))
+    assert 0.08 < latencies[500] < 0.12
+    assert latencies[990] > 0.2
+    assert MockEngine("claude", latency_ms=100, latency_sigma=0).latency() == 0.1
+
+
+@pytest.mark.asyncio
+async def test_tracker_probes_mock_engines(monkeypatch):
+    """Test every configured engine is mocked when mock engines are on."""
+    monkeypatch.setattr("app.core.config.settings.CITATION_MOCK_ENGINES", True)
+    monkeypatch.setattr("app.core.config.settings.CITATION_MOCK_LATENCY_MS", 1.0)
+    monkeypatch.setattr("app.core.config.settings.CITATION_MOCK_CITATION_RATE", 1.0)
+    assert isinstance(create_engine("grok"), MockEngine)
+    tracker = CitationTracker()
+
+    report = await tracker.probe(URL, ["a", "b"], ["grok", "claude"])
+    assert len(report.citations) == 4
+    assert {citation["engine"] for citation in report.citations} == {"grok", "claude"}
+
+
+@pytest.mark.asyncio
+async def test_tracker_reports_unknown_engines():
+    """Test an unknown engine is reported, not retried."""
+    report = await CitationTracker().probe(URL, ["a"], ["nope"])
+    assert report.errors[0]["code"] == "PROBE_FAILED"
+    assert report.errors[0]["attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_tracker_shares_one_citation_index(monkeypatch):
+    """Test answers are matched against the round's index, not one per answer."""
+    monkeypatch.setattr("app.core.config.settings.CITATION_MOCK_ENGINES", True)
+    monkeypatch.setattr("app.core.config.settings.CITATION_MOCK_LATENCY_MS", 0.0)
+    monkeypatch.setattr("app.core.config.settings.CITATION_MOCK_CITATION_RATE", 1.0)
+    tracker = CitationTracker()
+    other = "https://example.com/other"
+
+    def no_new_index(*args, **kwargs):
+        raise AssertionError("index built per answer")
+
+    monkeypatch.setattr(citation_engines, "CitationIndex", no_new_index)
+    reports = [
+        await tracker.probe(url, ["a", "b"], ["grok", "claude"]) for url in (URL, other)
+    ]
+
+    assert len(tracker.index) == 2
+    assert [
+        {citation["url"] for citation in report.citations} for report in reports
+    ] == [{URL}, {other}]
+    assert all(len(report.citations) == 4 for report in reports)
+
+
+def test_match_ignores_other_tracked_urls():
+    """Test an answer citing another tracked page is not a citation of URL."""
+    index = CitationIndex([URL, "https://example.com/other"])
+    answer = EngineAnswer(text="See https://example.com/other.", cited_urls=[])
+
+    assert MockEngine("grok").match(answer, "prompt", URL, index) is None
+    assert MockEngine("grok").match(answer, "prompt", "https://example.com/other/")
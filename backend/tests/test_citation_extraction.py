@@ -0,0 +1,94 @@
+"""Tests for citation extraction from engine answers."""
+
+import pytest
+
+from app.services.citation_extraction import (
+    CitationIndex,
+    normalize_domain,
+    normalize_url,
+)
+
+ANSWER = (
+    "AIEO structures pages for AI answers. According to the guide at "
+    "https://www.Example.com/guide/?utm_source=grok&b=2&a=1#setup, tables help. "
+    "See also [the blog](http://blog.example.org/post), or email "
+    "team@example.net. Other sources: https://other.test/page."
+)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://example.com/guide?a=1&b=2",
+        "http://www.example.com/guide/?b=2&a=1",
+        "EXAMPLE.com/guide?a=1&b=2&utm_medium=ai&gclid=x#top",
+        "https://example.com:443/guide/?a=1&fbclid=y&b=2",
+    ],
+)
+def test_spellings_of_a_url_normalize_alike(url):
+    """Test scheme, www, slash, fragment, order and tracking are ignored."""
+    assert normalize_url(url) == "example.com/guide?a=1&b=2"
+
+
+def test_normalize_keeps_what_identifies_the_page():
+    """Test path case, real parameters and odd ports still differ."""
+    assert normalize_url("example.com/Guide") != normalize_url("example.com/guide")
+    assert normalize_url("example.com/?page=2") == "example.com?page=2"
+    assert normalize_url("example.com:8080/") == "example.com:8080"
+    assert normalize_domain("WWW.Example.com.") == "example.com"
+
+
+def test_extract_urls_and_domains_in_one_pass():
+    """Test pages and domains are matched with position and context."""
+    index = CitationIndex(
+        urls=["https://example.com/guide?a=1&b=2", "https://example.com/other"],
+        domains=["example.org", "example.net"],
+    )
+    matches = index.extract(ANSWER)
+
+    assert [(m.tracked, m.kind, m.position) for m in matches] == [
+        ("https://example.com/guide?a=1&b=2", "url", 1),
+        ("example.org", "domain", 2),
+    ]
+    guide = matches[0]
+    assert ANSWER[guide.offset :].startswith("https://www.Example.com/guide/")
+    assert "According to the guide" in guide.citation_text
+    assert "tables help." in guide.citation_text
+    # The e-mail address is not a citation of example.net
+    assert all(m.tracked != "example.net" for m in matches)
+
+
+def test_listed_sources_keep_engine_order():
+    """Test sources listed by the engine rank first, even if not in the text."""
+    index = CitationIndex(urls=["https://other.test/page", "https://listed.test/"])
+    matches = index.extract(
+        ANSWER, cited_urls=["https://listed.test", "https://other.test/page/"]
+    )
+
+    listed, other = matches
+    assert (listed.position, listed.offset) == (1, None)
+    assert listed.citation_text.startswith("AIEO structures pages")
+    assert other.position == 2
+    assert ANSWER[other.offset :].startswith("https://other.test/page")
+
+
+def test_streamed_chunks_match_like_whole_text():
+    """Test URLs split across chunks are still found at the same offsets."""
+    index = CitationIndex(urls=["https://example.com/guide?a=1&b=2"])
+    extractor = index.extractor()
+    for i in range(0, len(ANSWER), 7):
+        extractor.feed(ANSWER[i : i + 7])
+    streamed = extractor.close()
+
+    assert streamed == index.extract(ANSWER)
+    assert len(streamed) == 1
+
+
+def test_matching_does_not_depend_on_index_size():
+    """Test a large index matches the same answers the same way."""
+    index = CitationIndex(urls=[f"https://site{i}.test/p/{i}" for i in range(20000)])
+    index.add_url("https://example.com/guide?b=2&a=1")
+
+    assert len(index) == 20001
+    (match,) = index.extract(ANSWER)
+    assert match.tracked == "https://example.com/guide?b=2&a=1"
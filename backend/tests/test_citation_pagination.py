@@ -0,0 +1,110 @@
+"""Tests for keyset pagination of citations."""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.citation import Citation
+from app.services.citation_tracker import (
+    CitationTracker,
+    decode_cursor,
+    encode_cursor,
+)
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+def citation_id(i: int) -> uuid.UUID:
+    return uuid.UUID(f"aaaaaaaa-0000-0000-0000-{i:012x}")
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Citation.__table__])
+    session = async_sessionmaker(engine)()
+    await session.execute(
+        insert(Citation),
+        [
+            {
+                "id": citation_id(i),
+                "url": "https://example.com/a",
+                "domain": "example.com",
+                "engine": "grok" if i % 2 else "claude",
+                "prompt": f"prompt {i}",
+                "citation_text": "...",
+                # Pairs of citations share a detection time
+                "detected_at": NOW - timedelta(minutes=i // 2),
+            }
+            for i in range(25)
+        ],
+    )
+    await session.commit()
+    yield session
+    await session.close()
+    await engine.dispose()
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.QDRANT_URL", "")
+    return CitationTracker()
+
+
+async def all_pages(tracker, db, **filters):
+    pages, cursor = [], None
+    while True:
+        citations, cursor = await tracker.get_citations_page(
+            db, cursor=cursor, **filters
+        )
+        pages.append([c.id for c in citations])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+async def test_pages_cover_every_citation_once(db, tracker):
+    """Test pages follow (detected_at, id) order with no gaps or repeats."""
+    pages = await all_pages(tracker, db, limit=4)
+
+    assert [len(page) for page in pages] == [4] * 6 + [1]
+    ids = [i for page in pages for i in page]
+    expected = sorted(
+        range(25), key=lambda i: (NOW - timedelta(minutes=i // 2), citation_id(i))
+    )
+    assert ids == [citation_id(i) for i in reversed(expected)]
+
+
+@pytest.mark.asyncio
+async def test_filters_apply_to_pages_and_count(db, tracker):
+    """Test filtered pages and the separate count agree."""
+    pages = await all_pages(tracker, db, engine="grok", limit=5)
+    assert sum(len(page) for page in pages) == 12
+    assert await tracker.count_citations(db, engine="grok") == 12
+    assert await tracker.count_citations(db, url="https://example.com/b") == 0
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_cursor(db, tracker):
+    """Test an exact final page does not point at an empty one."""
+    citations, cursor = await tracker.get_citations_page(db, limit=25)
+    assert len(citations) == 25
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_cursor_round_trip_and_invalid_cursors(db, tracker):
+    """Test cursors are opaque tokens and bad ones raise ValueError."""
+    cursor = encode_cursor(NOW, citation_id(3))
+    assert decode_cursor(cursor) == (NOW, citation_id(3))
+    assert "|" not in cursor and "=" not in cursor
+
+    for bad in ["not a cursor", encode_cursor(NOW, citation_id(3))[:-4], "!!"]:
+        with pytest.raises(ValueError):
+            await tracker.get_citations_page(db, cursor=bad)
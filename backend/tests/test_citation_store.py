@@ -0,0 +1,136 @@
+"""Tests for bulk citation storage."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.citation import Citation, CitationDedupeKey
+from app.services.citation_tracker import CitationTracker, extract_domain
+
+# Start of an hour, within the days dedupe keys are kept for
+NOW = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+
+
+def citation(url="https://example.com/a", engine="grok", prompt="p", minutes=0):
+    return {
+        "url": url,
+        "engine": engine,
+        "prompt": prompt,
+        "citation_text": "According to example.com...",
+        "position": 1,
+        "detected_at": NOW + timedelta(minutes=minutes),
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(
+        engine, tables=[Citation.__table__, CitationDedupeKey.__table__]
+    )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.QDRANT_URL", "")
+    return CitationTracker()
+
+
+def count(db) -> int:
+    return db.scalar(select(func.count()).select_from(Citation))
+
+
+def test_store_in_batches_with_domains(db, tracker):
+    """Test rows are inserted in batches with their domain and defaults."""
+    citations = [citation(prompt=f"p{i}") for i in range(5)]
+    citations.append(citation(url="https://www.other.org/b?x=1", prompt="q"))
+
+    report = tracker.store_citations(db, citations, batch_size=2)
+    assert (report["inserted"], report["duplicates"]) == (6, 0)
+    assert report["rows_per_second"] > 0
+    assert count(db) == 6
+    assert set(db.scalars(select(Citation.domain))) == {
+        "example.com",
+        "www.other.org",
+    }
+    assert not any(db.scalars(select(Citation.verified)))
+
+
+def test_repeat_detections_in_a_bucket_are_stored_once(db, tracker):
+    """Test duplicates within a call and against stored rows are skipped."""
+    first = tracker.store_citations(
+        db,
+        [
+            citation(minutes=1),
+            citation(minutes=2),  # Same hour: duplicate
+            citation(minutes=90),  # Next hour
+            citation(engine="claude", minutes=1),
+        ],
+        batch_size=1,
+    )
+    assert (first["inserted"], first["duplicates"]) == (3, 1)
+
+    second = tracker.store_citations(
+        db, [citation(minutes=30), citation(prompt="new", minutes=30)]
+    )
+    assert (second["inserted"], second["duplicates"]) == (1, 1)
+    assert count(db) == 4
+
+
+def test_concurrent_stores_insert_once(engine, db, tracker):
+    """Test two workers storing the same batch insert it once, without reads."""
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    other = sessionmaker(bind=engine)()
+    citations = [citation(prompt=f"p{i}") for i in range(3)]
+
+    first = tracker.store_citations(db, citations)
+    second = tracker.store_citations(other, citations)
+    other.close()
+
+    assert not any(s.lstrip().startswith("SELECT") for s in statements)
+    assert (first["inserted"], second["inserted"]) == (3, 0)
+    assert second["duplicates"] == 3
+    assert count(db) == 3
+
+
+def test_old_dedupe_keys_are_pruned(db, tracker, monkeypatch):
+    """Test keys of windows past CITATION_DEDUPE_KEY_DAYS are dropped."""
+    monkeypatch.setattr("app.core.config.settings.CITATION_DEDUPE_KEY_DAYS", 1)
+    tracker.store_citations(
+        db, [citation(prompt="old", minutes=-2 * 24 * 60), citation(prompt="new")]
+    )
+    assert count(db) == 2
+    assert db.scalar(select(func.count()).select_from(CitationDedupeKey)) == 1
+
+
+def test_detected_at_defaults_to_now(db, tracker):
+    """Test citations without a detection time are stamped on insert."""
+    row = citation()
+    del row["detected_at"]
+    before = datetime.utcnow()
+    tracker.store_citations(db, [row])
+    assert db.scalar(select(Citation.detected_at)) >= before - timedelta(seconds=1)
+
+
+def test_extract_domain():
+    """Test the host is kept as given, and non-URLs pass through."""
+    assert extract_domain("https://Example.com:8443/path") == "Example.com:8443"
+    assert extract_domain("not a url") == "not a url"
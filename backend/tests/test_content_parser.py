@@ -1,5 +1,7 @@
 """Tests for content parser."""
 
+import pytest
+
 from app.services.content_parser import ContentParser
 
 
@@ -42,3 +44,74 @@ def test_extract_tables():
 
     assert len(result["tables"]) > 0
     assert result["tables"][0]["row_count"] > 0
+
+
+def test_headers_ordered_by_level():
+    """Test headers are grouped by level, then document order."""
+    parser = ContentParser()
+    content = "<h2>B</h2><h1>A</h1><h2>C</h2>"
+
+    result = parser.parse(content, format="html")
+
+    assert [h["text"] for h in result.headers] == ["A", "B", "C"]
+    assert [h["position"] for h in result.headers] == [0, 1, 2]
+
+
+def test_nested_lists_and_links():
+    """Test nested list items and links are extracted in one pass."""
+    parser = ContentParser()
+    content = '<ul><li>One<ol><li>Nested</li></ol></li></ul><a href="/x">X</a><a>No</a>'
+
+    result = parser.parse(content, format="html")
+
+    assert [lst["type"] for lst in result.lists] == ["unordered", "ordered"]
+    assert result.lists[0]["item_count"] == 2
+    assert result.links == [{"text": "X", "url": "/x"}]
+
+
+def test_document_derived_views():
+    """Test lazily derived views of the parsed document."""
+    parser = ContentParser()
+    content = "# Title\n\nAlpha beta. Beta gamma!"
+
+    result = parser.parse(content)
+
+    assert result.lower_text == result.text.lower()
+    assert result.tokens == result.text.lower().split()
+    assert result.word_frequencies["beta."] == 1
+    assert len(result.sentences) == 2
+    assert result["word_count"] == result.word_count
+
+
+def test_backends_extract_equivalent_html():
+    """Test the lxml backend matches the html.parser backend."""
+    content = """<!DOCTYPE html><html><head><title>T</title>
+<style>p {}</style><script>var a = 1;</script></head><body>
+<!-- comment --><h2>Second</h2><h1>First <a href="/x">link</a></h1>
+<table><tr><th>A</th><td>B<table><tr><td>inner</td></tr></table></td></tr></table>
+<ul><li>one<ol><li>nested</li></ol></li><li>two</li></ul><ol></ol>
+<p>Text &amp; more<!-- c -->tail</p><template><h3>hidden</h3></template>
+</body></html>"""
+
+    standard = ContentParser(backend="standard").parse(content, format="html")
+    for backend in ("fast", "commonmark"):
+        result = ContentParser(backend=backend).parse(content, format="html")
+        assert result.to_dict() == standard.to_dict()
+
+
+def test_backends_repair_malformed_html_differently():
+    """Test unclosed list items are closed by lxml but nested by html.parser."""
+    content = "<ul><li>a<li>b</ul>"
+
+    standard = ContentParser(backend="standard").parse(content, format="html")
+    fast = ContentParser(backend="fast").parse(content, format="html")
+
+    assert standard["lists"][0]["items"] == ["ab", "b"]
+    assert fast["lists"][0]["items"] == ["a", "b"]
+    assert fast["text"] == standard["text"]
+
+
+def test_unknown_backend():
+    """Test an unknown backend name is rejected."""
+    with pytest.raises(ValueError):
+        ContentParser(backend="missing")
@@ -0,0 +1,188 @@
+"""Tests for batched entity extraction."""
+
+import re
+
+import pytest
+import spacy
+
+from app.services import entity_extractor
+from app.services.content_parser import ContentParser
+from app.services.entity_extractor import (
+    HeuristicEntityExtractor,
+    SpacyEntityExtractor,
+    chunk_windows,
+    entity_detector_signature,
+    get_entity_extractor,
+    split_text,
+    trie_pattern,
+)
+from app.services.scoring_engine import ScoringEngine, scorer_fingerprint
+
+
+def make_nlp():
+    """Rule-based stand-in for the statistical NER model."""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(
+        [
+            {"label": "ORG", "pattern": "Acme Corp"},
+            {"label": "GPE", "pattern": "New York"},
+            {"label": "PERSON", "pattern": "Ada Lovelace"},
+        ]
+    )
+    return nlp
+
+
+def test_split_text_at_sentence_breaks():
+    """Test chunks stay under the limit and end on sentence breaks."""
+    text = "Acme Corp grew. It moved to New York! Ada Lovelace joined? Done."
+
+    chunks = list(split_text(text, 25))
+
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 25 for chunk in chunks)
+    assert chunks[0] == "Acme Corp grew. "
+
+
+def test_chunked_extraction_matches_whole_text():
+    """Test chunking long texts does not change the entities found."""
+    text = " ".join(
+        f"Sentence {i} mentions Acme Corp and New York. Ada Lovelace wrote it."
+        for i in range(50)
+    )
+    whole = SpacyEntityExtractor(nlp=make_nlp(), chunk_chars=len(text)).extract(text)
+
+    extractor = SpacyEntityExtractor(nlp=make_nlp(), chunk_chars=200, batch_size=4)
+
+    assert extractor.extract(text) == whole
+    assert len(whole) == 150
+    assert extractor.extract_many([text, "", "Acme Corp"]) == [
+        whole,
+        [],
+        ["Acme Corp"],
+    ]
+
+
+def test_entities_cut_by_chunk_boundaries_are_found_whole():
+    """Test chunk overlaps keep entity counts of a long text without breaks."""
+    names = ["Acme Corp", "New York", "Ada Lovelace"]
+    # No sentence breaks, so chunks are cut at any space, inside entities too
+    text = " ".join(f"word{i} {names[i % 3]} and" for i in range(400))
+    whole = SpacyEntityExtractor(nlp=make_nlp(), chunk_chars=len(text)).extract(text)
+
+    nlp = make_nlp()
+    naive = [ent.text for chunk in split_text(text, 150) for ent in nlp(chunk).ents]
+    assert len(naive) < len(whole) == 400
+
+    for chunk_chars in (97, 150, 1000):
+        extractor = SpacyEntityExtractor(nlp=make_nlp(), chunk_chars=chunk_chars)
+        assert extractor.extract(text) == whole
+        engine = ScoringEngine(entity_extractor=extractor)
+        document = ContentParser().parse(text)
+        density = engine.score_document(document)["pattern_scores"]["entity_density"]
+        assert density["entity_count"] == len(set(whole))
+
+
+def test_chunk_windows():
+    """Test windows cover the text once, with whitespace-cut context."""
+    text = " ".join(f"w{i}" for i in range(100))
+
+    windows = list(chunk_windows(text, 60, 15))
+
+    assert "".join(window[start:end] for window, start, end in windows) == text
+    for window, start, end in windows:
+        assert len(window) <= 60
+        # Context is cut at whitespace, never inside a word
+        assert f" {window.strip()} " in f" {text} "
+
+
+def test_score_documents_batches_ner():
+    """Test batched scoring matches scoring documents one at a time."""
+    engine = ScoringEngine(entity_extractor=SpacyEntityExtractor(nlp=make_nlp()))
+    parser = ContentParser()
+    contents = [
+        "# Acme Corp\n\nAcme Corp is based in New York.",
+        "Ada Lovelace wrote the first program.",
+        "No entities here.",
+    ]
+
+    batched = engine.score_documents([parser.parse(c) for c in contents])
+
+    assert batched == [engine.score(c) for c in contents]
+    assert batched[0]["pattern_scores"]["entity_density"]["entity_count"] == 2
+
+
+def test_heuristic_extractor():
+    """Test the rule-based detector on common entity shapes."""
+    extractor = HeuristicEntityExtractor()
+    text = (
+        "The Bank of America reported $5 million in Q1 2024. According to "
+        "Google, 45% of users in New York prefer ChatGPT. On January 5, 2024 "
+        "Ada Lovelace shipped Windows 11. Audit the page. Metadata matters."
+    )
+
+    assert extractor.extract(text) == [
+        "Bank of America",
+        "$5 million",
+        "Q1 2024",
+        "Google",
+        "45%",
+        "New York",
+        "ChatGPT",
+        "January 5, 2024",
+        "Ada Lovelace",
+        "Windows 11",
+    ]
+
+
+def test_heuristic_sentence_initial_words():
+    """Test a capitalised sentence start counts only if seen mid-sentence."""
+    extractor = HeuristicEntityExtractor(known_entities=[])
+
+    assert extractor.extract("Audit it. Then audit it again.") == []
+    assert extractor.extract("Acme grew. We love Acme.") == ["Acme", "Acme"]
+
+
+def test_trie_pattern():
+    """Test the trie regex matches exactly the given words."""
+    pattern = re.compile(f"(?:{trie_pattern(['GPT-4', 'GPT-4o', 'Grok'])})$")
+
+    assert all(pattern.match(w) for w in ("GPT-4", "GPT-4o", "Grok"))
+    assert not any(pattern.match(w) for w in ("GPT", "GPT-4x", "Gro"))
+
+
+def test_get_entity_extractor():
+    """Test detector selection by name."""
+    assert isinstance(get_entity_extractor("heuristic"), HeuristicEntityExtractor)
+    assert get_entity_extractor("auto").available
+    with pytest.raises(ValueError):
+        get_entity_extractor("missing")
+
+
+def test_fingerprint_follows_the_resolved_detector(monkeypatch):
+    """Test "auto" with and without a spaCy model gives distinct scorers."""
+    monkeypatch.setattr(entity_extractor.settings, "ENTITY_DETECTOR", "auto")
+    fingerprints = {}
+    for version in (None, "3.7.1", "3.8.0"):
+        monkeypatch.setattr(
+            entity_extractor, "spacy_model_version", lambda model: version
+        )
+        scorer_fingerprint.cache_clear()
+        fingerprints[version] = scorer_fingerprint()
+    scorer_fingerprint.cache_clear()
+
+    assert len(set(fingerprints.values())) == 3
+    assert entity_detector_signature("heuristic") == ["heuristic", None]
+
+
+def test_signature_without_spacy(monkeypatch):
+    """Test the spaCy signature does not need spaCy installed."""
+    monkeypatch.setattr(entity_extractor, "SPACY_AVAILABLE", False)
+    monkeypatch.delattr(entity_extractor, "spacy", raising=False)
+
+    assert entity_detector_signature("spacy") == [
+        "spacy",
+        entity_extractor.settings.SPACY_MODEL,
+        None,
+        None,
+    ]
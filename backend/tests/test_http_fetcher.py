@@ -0,0 +1,141 @@
+"""Tests for the shared HTTP fetcher."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.errors import FetchFailedError
+from app.services.audit_service import AuditService
+from app.services.http_fetcher import HostLimiter, HTTPFetcher
+from app.services.scoring_executor import ScoringExecutor
+
+PAGE = b"""<html><body><h1>What is AIEO?</h1>
+<p>According to research, 45% of answers cite structured pages.</p>
+</body></html>"""
+
+
+class ConditionalServer:
+    """Mock origin that honours If-None-Match."""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(
+            200, content=PAGE, headers={"ETag": '"v1"', "Content-Type": "text/html"}
+        )
+
+
+@pytest.fixture
+def server():
+    return ConditionalServer()
+
+
+@pytest.fixture
+def fetcher(server, fake_redis):
+    executor = ScoringExecutor(pool_size=0, queue_depth=4)
+    fetcher = HTTPFetcher(transport=httpx.MockTransport(server), executor=executor)
+    fetcher.metadata._redis = fake_redis
+    yield fetcher
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_revalidates_with_etag(fetcher, server):
+    """Test a re-fetch sends the stored ETag and skips the unchanged body."""
+    first = await fetcher.fetch("https://example.com/page")
+    second = await fetcher.fetch("https://example.com/page")
+    await fetcher.close()
+
+    assert first.document.headers[0]["text"] == "What is AIEO?"
+    assert second.not_modified
+    assert second.document is None
+    assert second.content_hash == first.content_hash
+    assert "If-None-Match" not in server.requests[0].headers
+    assert server.requests[1].headers["If-None-Match"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_http_errors_are_fetch_failures(fetcher):
+    """Test error statuses surface as FetchFailedError."""
+    with pytest.raises(FetchFailedError, match="URL not found"):
+        await fetcher.fetch("https://example.com/missing")
+    await fetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_caps_concurrency():
+    """Test requests to one host wait for a free slot, other hosts do not."""
+    limiter = HostLimiter(2)
+    active = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    async def request(host):
+        async with limiter.slot(host):
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+
+    await asyncio.gather(*(request("a") for _ in range(6)), request("b"))
+
+    assert peak == {"a": 2, "b": 1}
+    assert limiter._hosts == {}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_page_is_served_from_cache(fetcher, fake_redis):
+    """Test a 304 re-audit returns the cached result without parsing."""
+    service = AuditService(
+        executor=fetcher.executor, redis_client=fake_redis, fetcher=fetcher
+    )
+    try:
+        first = await service.audit(url="https://example.com/page")
+        # Any parsing or scoring would now fail
+        service.scoring_executor = fetcher.executor = None
+        second = await service.audit(url="https://example.com/page")
+    finally:
+        await fetcher.close()
+
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_large_page_is_parsed_off_the_event_loop(fake_redis):
+    """Test the event loop keeps serving while a multi-MB page is parsed."""
+    section = "<h2>Section</h2><p>" + "According to research, pages get cited. " * 50
+    page = ("<html><body>" + section * 1000 + "</body></html>").encode("utf-8")
+    executor = ScoringExecutor(pool_size=0, queue_depth=4)
+    fetcher = HTTPFetcher(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=page)
+        ),
+        executor=executor,
+    )
+    fetcher.metadata._redis = fake_redis
+
+    gaps = []
+
+    async def tick():
+        while True:
+            started = asyncio.get_running_loop().time()
+            await asyncio.sleep(0.001)
+            gaps.append(asyncio.get_running_loop().time() - started)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        result = await fetcher.fetch("https://example.com/large")
+    finally:
+        ticker.cancel()
+        executor.shutdown()
+        await fetcher.close()
+
+    assert len(result.document.headers) == 1000
+    assert len(gaps) > 10
+    assert max(gaps) < 0.25
@@ -0,0 +1,127 @@
+"""Tests for incremental re-scoring."""
+
+from app.services.incremental_scoring import IncrementalScorer, split_sections
+from app.services.scoring_engine import ScoringEngine
+
+CONTENT = """# Guide to AIEO
+
+According to research from 2024, AIEO is a method. What is it? It helps.
+
+```python
+# not a header
+```
+
+## How do I start?
+
+1. Audit the page
+2. Apply the fixes
+
+## Comparison
+
+| Tool | Score |
+|------|-------|
+| A vs B | 1 |
+
+First, second and third steps. However, why? Because it is essential.
+"""
+
+
+def test_split_sections():
+    """Test sections start at header lines outside code fences."""
+    sections = split_sections(CONTENT)
+
+    assert "".join(sections) == CONTENT
+    assert [section.split("\n")[0] for section in sections] == [
+        "# Guide to AIEO",
+        "## How do I start?",
+        "## Comparison",
+    ]
+
+
+def test_split_sections_skips_raw_html():
+    """Test "#" lines inside raw HTML blocks do not start sections."""
+    content = "# Intro\n\nText.\n\n<div>\n# in html\n</div>\n# out"
+
+    assert split_sections(content) == [content]
+    assert split_sections("Text.\n   # indented\n\n# Real") == [
+        "Text.\n   # indented\n\n",
+        "# Real",
+    ]
+
+
+def test_split_sections_needs_a_blank_line():
+    """Test a header right after a table row stays in the table's section."""
+    content = "| a | b |\n|---|---|\n| 1 | 2 |\n# Next\n\nText.\n \t\n# Last"
+
+    assert split_sections(content) == [
+        "| a | b |\n|---|---|\n| 1 | 2 |\n# Next\n\nText.\n \t\n",
+        "# Last",
+    ]
+
+
+def test_incremental_matches_full_score():
+    """Test incremental scoring gives the same result as a full score."""
+    engine = ScoringEngine()
+    scorer = IncrementalScorer(engine)
+    edited = CONTENT.replace("It helps.", "It helps. Source: the AIEO study.")
+    contents = (
+        CONTENT,
+        edited,
+        "<div>\n# in html\n</div>\n# out",
+        "# A\r\n\r\nText.\r\n## B\r\nMore.",
+        "<div>\n\n# inside\n\n</div>\n\n# after",
+    )
+
+    for content in contents:
+        assert scorer.score(content) == engine.score(content)
+        assert scorer.parse(content).to_dict() == engine.parser.parse(content).to_dict()
+
+
+# Blocks that headers may follow, with or without a blank line
+EDGE_BLOCKS = [
+    "Plain paragraph text.",
+    "| a | b |\n|---|---|\n| 1 | 2 |",
+    "- one\n- two",
+    "1. first\n2. second",
+    "> quoted\n> text",
+    "```\n# fenced\n```",
+    "    # indented code",
+    "Setext\n======",
+    "<div>\n# raw\n</div>",
+    "---",
+    "### Deep header",
+]
+
+
+def test_incremental_matches_full_parse_on_edge_cases():
+    """Test section-wise parsing equals a full parse around every block."""
+    engine = ScoringEngine()
+    scorer = IncrementalScorer(engine)
+
+    for before in EDGE_BLOCKS:
+        for after in EDGE_BLOCKS:
+            for separator in ("\n", "\n\n", "\n  \n", "\r\n\r\n"):
+                content = (
+                    f"# Title\n\n{before}{separator}# Next{separator}"
+                    f"{after}\n\n## Sub\nText.\n"
+                )
+                expected = engine.parser.parse(content).to_dict()
+                assert scorer.parse(content).to_dict() == expected, content
+
+
+def test_incremental_reparses_changed_sections_only():
+    """Test an edit re-parses only the section that changed."""
+    engine = ScoringEngine()
+    scorer = IncrementalScorer(engine)
+    parsed = []
+    parse = engine.parser.parse
+    engine.parser.parse = lambda content, *args: parsed.append(content) or parse(
+        content, *args
+    )
+
+    scorer.score(CONTENT)
+    assert len(parsed) == 3
+
+    scorer.score(CONTENT.replace("Apply the fixes", "Apply every fix"))
+    assert len(parsed) == 4
+    assert parsed[-1].startswith("## How do I start?")
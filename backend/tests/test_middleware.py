@@ -0,0 +1,82 @@
+"""Tests for the request timing, logging and rate limiting middleware."""
+
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.core import rate_limit
+from app.core.middleware import RequestMiddleware
+from app.core.rate_limit import RateLimiter
+
+
+def make_app(rate_limiter=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"message": "AIEO API"}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield f"{i}\n"
+
+        return StreamingResponse(lines(), media_type="text/plain")
+
+    app.add_middleware(RequestMiddleware, rate_limiter=rate_limiter)
+    return app
+
+
+def client(app: FastAPI) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=("203.0.113.7", 5000))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_requests_are_timed_and_logged(caplog):
+    """Test the timing header and the request and response log lines."""
+    caplog.set_level(logging.INFO, logger="aieo")
+    async with client(make_app()) as http:
+        response = await http.get("/", params={"q": "1"})
+
+    assert response.json() == {"message": "AIEO API"}
+    assert float(response.headers["X-Process-Time"]) >= 0
+    assert "X-RateLimit-Limit" not in response.headers
+    request_line, response_line = [r.getMessage() for r in caplog.records]
+    assert request_line == "GET / - Client: 203.0.113.7"
+    assert response_line.startswith("GET / - Status: 200 - Duration: ")
+    assert response_line.endswith("s")
+
+
+@pytest.mark.asyncio
+async def test_streamed_responses_pass_through():
+    """Test streamed bodies arrive whole with the timing header."""
+    async with client(make_app()) as http:
+        response = await http.get("/stream")
+
+    assert response.text == "0\n1\n2\n"
+    assert "X-Process-Time" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_limit_are_refused(monkeypatch, caplog):
+    """Test limit headers, and a logged 429 that never reaches the app."""
+    caplog.set_level(logging.INFO, logger="aieo")
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: None)
+    limiter = RateLimiter(requests_per_minute=2, plan_limits={})
+
+    async with client(make_app(limiter)) as http:
+        responses = [await http.get("/") for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert [r.headers["X-RateLimit-Remaining"] for r in responses] == ["1", "0", "0"]
+    refused = responses[-1]
+    assert refused.headers["X-RateLimit-Limit"] == "2"
+    assert refused.headers["Retry-After"] == "30"
+    assert "X-Process-Time" in refused.headers
+    assert refused.json()["error"]["code"] == "RATE_LIMITED"
+    assert caplog.records[-1].getMessage().startswith("GET / - Status: 429 - ")
@@ -0,0 +1,92 @@
+"""Tests for pattern matcher."""
+
+import re
+
+from app.services.pattern_matcher import (
+    PATTERN_GROUPS,
+    PatternMatcher,
+    fold_case,
+    is_section_local,
+)
+from app.services.scoring_engine import ScoringEngine
+
+SAMPLES = [
+    "",
+    "Plain text without any patterns at all",
+    "According to research from MIT, a study found that 2023 was busy. "
+    "Source: [paper](http://example.com). References: see below.",
+    "What is AIEO? It is a method. How does it work? However, it is defined as X.",
+    "Updated as of January 5, 2024 for version 2 and v1.2. Released 19999.",
+    "Step 1: install. Step a: configure. First, second, then third. 1. one 2. two",
+    "**Term** is a thing. It means this and refers to that. It is an option.",
+    "FAQ - Frequently Asked Questions and common questions? Yes? No?",
+    "This is important because it matters. This is critical because. "
+    "This matters because, significantly and crucially, it is essential.",
+    "Python vs Go: compare versus comparison, difference, better or worse",
+    # Non-ASCII characters that re.IGNORECASE folds onto ASCII letters
+    "İS A thing, thıs ıs İmportant because ſource: "
+    "ſignificantly Key STEP 3 ſtep b ACCORDING TO Study Shows "
+    "REFERENCE: Résumé naïve café — ünïcödé text 2024",
+    "İ İs a İs an ı is defıned as İ",
+]
+
+
+def _legacy_counts(text):
+    """Per-pattern counts computed the way the scorers originally did."""
+    counts = {}
+    for name, (view, patterns) in PATTERN_GROUPS.items():
+        if view == "lower":
+            counts[name] = {p: len(re.findall(p, text.lower())) for p in patterns}
+        elif view == "folded":
+            counts[name] = {
+                p: len(re.findall(p, text, re.IGNORECASE)) for p in patterns
+            }
+        else:
+            counts[name] = {p: len(re.findall(p, text)) for p in patterns}
+    return counts
+
+
+def test_counts_match_legacy_findall():
+    """Test matcher counts are identical to per-pattern re.findall."""
+    matcher = PatternMatcher()
+    for sample in SAMPLES:
+        assert matcher.count(sample) == _legacy_counts(sample), sample
+
+
+def test_counts_match_legacy_on_repeated_document():
+    """Test counts on a long document with many overlapping matches."""
+    matcher = PatternMatcher()
+    text = " ".join(SAMPLES) * 50
+    assert matcher.count(text) == _legacy_counts(text)
+
+
+def test_fold_case_preserves_length():
+    """Test case folding never changes text length."""
+    for sample in SAMPLES:
+        assert len(fold_case(sample)) == len(sample)
+
+
+def test_scores_unchanged_for_substring_keywords():
+    """Test keyword detection matches the original substring checks."""
+    engine = ScoringEngine()
+    parsed = engine.parser.parse("Python VS Go\n\nFrequently Asked Questions")
+
+    assert engine._score_comparison_tables(parsed)["has_comparison_keywords"]
+    assert engine._score_faq_injection(parsed)["has_faq_section"]
+
+
+def test_section_local_patterns_sum_across_texts():
+    """Test section-local pattern counts add up over whitespace-joined texts."""
+    assert is_section_local(r"\d{4}")
+    assert not is_section_local(r"according to")
+    assert not is_section_local(r"first.*second")
+    assert not is_section_local(r"x?")
+
+    matcher = PatternMatcher()
+    parts = ["Updated 2024 vs", "2025 FAQ: v1.2 means", "essential"]
+    whole = matcher.count(" ".join(parts), local=True)
+    for group, (_, patterns) in PATTERN_GROUPS.items():
+        for pattern in patterns:
+            if is_section_local(pattern):
+                total = sum(matcher.count(p, local=True)[group][pattern] for p in parts)
+                assert whole[group][pattern] == total
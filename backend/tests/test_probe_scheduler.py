@@ -0,0 +1,149 @@
+"""Tests for concurrent citation probing."""
+
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+import pytest
+
+from app.services.citation_tracker import CitationTracker
+from app.services.probe_scheduler import (
+    EngineLimits,
+    EngineRateLimitedError,
+    ProbeError,
+    ProbeScheduler,
+    TokenBucket,
+)
+
+URL = "https://example.com/guide"
+PROMPTS = [f"prompt {i}" for i in range(8)]
+
+
+class StubEngine:
+    """Local engine server with latency, rate limiting and failing prompts."""
+
+    def __init__(self, latency=0.02, rate_limited=0, broken=(), hang=()):
+        self.latency = latency
+        # Requests answered 429 before the engine accepts any
+        self.rate_limited = rate_limited
+        self.broken = set(broken)
+        self.hang = set(hang)
+        self.in_flight = Counter()
+        self.peak = Counter()
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        engine = request.url.path.strip("/")
+        prompt = request.url.params["prompt"]
+        self.requests += 1
+        if self.rate_limited > 0:
+            self.rate_limited -= 1
+            return httpx.Response(429, headers={"Retry-After": "0.01"})
+        if prompt in self.broken:
+            return httpx.Response(400, json={"error": "bad prompt"})
+        self.in_flight[engine] += 1
+        self.peak[engine] = max(self.peak[engine], self.in_flight[engine])
+        try:
+            await asyncio.sleep(10 if prompt in self.hang else self.latency)
+        finally:
+            self.in_flight[engine] -= 1
+        return httpx.Response(200, json={"answer": f"See {URL} for {prompt}."})
+
+    def probe_func(self):
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handle), base_url="http://engine"
+        )
+
+        async def probe(engine, prompt, url):
+            response = await client.get(f"/{engine}", params={"prompt": prompt})
+            if response.status_code == 429:
+                raise EngineRateLimitedError(
+                    "Rate limited", float(response.headers["Retry-After"])
+                )
+            if response.status_code >= 400:
+                raise ProbeError(f"HTTP {response.status_code}", retryable=False)
+            if url in response.json()["answer"]:
+                return {"url": url, "engine": engine, "prompt": prompt}
+            return None
+
+        return probe
+
+
+def scheduler(engine: StubEngine, concurrency=2, **kwargs) -> ProbeScheduler:
+    limits = {
+        name: EngineLimits(concurrency=concurrency, rate=0, burst=1)
+        for name in ("grok", "claude")
+    }
+    kwargs.setdefault("backoff", 0.01)
+    return ProbeScheduler(engine.probe_func(), limits=limits, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_probes_run_concurrently_within_engine_caps():
+    """Test probes overlap, but never beyond each engine's cap."""
+    engine = StubEngine(latency=0.05)
+    start = time.monotonic()
+    results = await scheduler(engine).run(URL, PROMPTS, ["grok", "claude"])
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 16
+    assert all(result.citation for result in results)
+    assert [result.engine for result in results[:8]] == ["grok"] * 8
+    assert engine.peak == {"grok": 2, "claude": 2}
+    # 16 sequential probes would take 0.8s
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_probes_are_retried():
+    """Test 429 answers are retried after backing off."""
+    engine = StubEngine(rate_limited=3)
+    results = await scheduler(engine, retries=3).run(URL, PROMPTS[:2], ["grok"])
+
+    assert all(result.citation and not result.error for result in results)
+    assert sum(result.attempts for result in results) == 5
+    assert engine.requests == 5
+
+
+@pytest.mark.asyncio
+async def test_failures_are_returned_as_structured_errors():
+    """Test timeouts and rejected prompts become results, not exceptions."""
+    engine = StubEngine(broken={"prompt 0"}, hang={"prompt 1"})
+    results = await scheduler(engine, timeout=0.05, retries=1).run(
+        URL, PROMPTS[:3], ["claude"]
+    )
+
+    broken, hung, ok = results
+    assert broken.error == {"code": "PROBE_FAILED", "message": "HTTP 400"}
+    assert broken.attempts == 1
+    assert hung.error["code"] == "TIMEOUT"
+    assert hung.attempts == 2
+    assert ok.citation == {"url": URL, "engine": "claude", "prompt": "prompt 2"}
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_out_starts():
+    """Test a bucket lets a burst through, then rate tokens per second."""
+    bucket = TokenBucket(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+    # Two free tokens, then four at 20ms intervals
+    assert time.monotonic() - start >= 0.07
+
+
+@pytest.mark.asyncio
+async def test_tracker_reports_citations_and_errors():
+    """Test the tracker collects citations and failed probes."""
+    engine = StubEngine(broken={"prompt 1"})
+    tracker = CitationTracker(scheduler=scheduler(engine))
+
+    report = await tracker.probe(URL, PROMPTS[:2], ["grok", "claude"])
+    assert report.probes == 4
+    assert len(report.citations) == 2
+    assert [error["engine"] for error in report.errors] == ["grok", "claude"]
+    assert report.errors[0]["prompt"] == "prompt 1"
+    assert await tracker.probe_engines(URL, PROMPTS[:1], ["grok"]) == [
+        {"url": URL, "engine": "grok", "prompt": "prompt 0"}
+    ]
@@ -0,0 +1,207 @@
+"""Tests for GCRA rate limiting."""
+
+import hashlib
+import uuid
+
+import pytest
+from redis.exceptions import NoScriptError
+
+from app.core import rate_limit
+from app.core.auth_cache import APIKeyCache, VerifiedKey
+from app.core.rate_limit import (
+    GCRA_SCRIPT,
+    LocalRateLimiter,
+    RateLimiter,
+    gcra,
+)
+from app.models.api_key import APIKey
+
+from .conftest import FakeRedis
+
+
+class ScriptedRedis(FakeRedis):
+    """FakeRedis running the GCRA script through its Python equivalent."""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 1_000_000.0  # Server clock, ms
+        self.scripts = {}
+        self.evals = 0
+
+    async def script_load(self, script):
+        sha = hashlib.sha1(script.encode("utf-8")).hexdigest()
+        self.scripts[sha] = script
+        return sha
+
+    async def evalsha(self, sha, numkeys, key, *args):
+        if sha not in self.scripts:
+            raise NoScriptError("NOSCRIPT")
+        return await self.eval(self.scripts[sha], numkeys, key, *args)
+
+    async def eval(self, script, numkeys, key, interval, period):
+        assert script == GCRA_SCRIPT and numkeys == 1
+        self.evals += 1
+        stored = self.data.get(key)
+        allowed, tat, remaining, wait = gcra(
+            float(stored) if stored is not None else None,
+            self.now,
+            float(interval),
+            float(period),
+        )
+        if allowed:
+            await self.set(key, tat)
+        return [int(allowed), remaining, int(wait)]
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = ScriptedRedis()
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: client)
+    return client
+
+
+def test_gcra_allows_a_burst_then_one_request_per_interval():
+    """Test a full period of requests passes at once, then they are spaced."""
+    tat, results = None, []
+    for _ in range(4):
+        allowed, tat, remaining, wait = gcra(tat, 0.0, 20.0, 60.0)
+        results.append((allowed, remaining, wait))
+    assert results == [(True, 2, 0), (True, 1, 0), (True, 0, 0), (False, 0, 20.0)]
+
+    # One interval later, one more request fits
+    assert gcra(tat, 20.0, 20.0, 60.0)[:3] == (True, 80.0, 0)
+    # Idle keys start over
+    assert gcra(tat, 500.0, 20.0, 60.0)[:3] == (True, 520.0, 2)
+
+
+def test_local_limiter_is_bounded(monkeypatch):
+    """Test the in-process limiter keeps at most max_keys keys."""
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: 100.0)
+    limiter = LocalRateLimiter(max_keys=3)
+
+    assert [limiter.hit("a", 2)[0] for _ in range(3)] == [True, True, False]
+    for i in range(10):
+        limiter.hit(f"key-{i}", 2)
+    assert len(limiter) == 3
+
+
+@pytest.mark.asyncio
+async def test_limit_is_shared_across_workers(redis_client, monkeypatch):
+    """Test two processes enforce one limit per key through Redis."""
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_PLANS", {})
+    workers = [RateLimiter(requests_per_minute=3) for _ in "ab"]
+
+    results = [await workers[i % 2]._check_rate_limit("key", 3) for i in range(4)]
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert results[-1][2] == 20.0
+    assert len(workers[0].local_limiter) == len(workers[1].local_limiter) == 0
+
+    redis_client.now += 20_000
+    assert (await workers[0]._check_rate_limit("key", 3))[0]
+
+
+@pytest.mark.asyncio
+async def test_script_is_reloaded_after_a_flush(redis_client):
+    """Test a flushed script cache falls back to EVAL and reloads."""
+    limiter = RateLimiter(requests_per_minute=3)
+    await limiter._check_rate_limit("key", 3)
+    redis_client.scripts.clear()
+
+    assert (await limiter._check_rate_limit("key", 3))[:2] == (True, 1)
+    assert redis_client.evals == 2
+    assert limiter.redis_limiter._sha is None
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_local_limiter_without_redis(monkeypatch):
+    """Test limits still apply per process when Redis is unavailable."""
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: None)
+    limiter = RateLimiter(requests_per_minute=2)
+
+    results = [(await limiter._check_rate_limit("key", 2))[0] for _ in range(3)]
+    assert results == [True, True, False]
+
+
+@pytest.fixture
+def verified_keys(monkeypatch):
+    """Keys authentication has verified, by name."""
+    keys = APIKeyCache(max_items=10, ttl=60)
+    monkeypatch.setattr(rate_limit, "api_key_cache", keys)
+
+    def verify(*api_keys):
+        for api_key in api_keys:
+            keys.set(APIKey.hash_key(api_key), VerifiedKey(uuid.uuid4(), None, None))
+
+    return verify
+
+
+@pytest.mark.asyncio
+async def test_limit_follows_the_key_owners_plan(monkeypatch, verified_keys):
+    """Test plan limits, the default for keys without a plan and caching."""
+    lookups = []
+
+    async def lookup(self, api_key):
+        lookups.append(api_key)
+        return {"pro-key-000": "pro", "free-key-00": "free"}.get(api_key)
+
+    monkeypatch.setattr(RateLimiter, "_lookup_plan", lookup)
+    verified_keys("pro-key-000", "free-key-00", "no-plan-key")
+    limiter = RateLimiter(requests_per_minute=10, plan_limits={"free": 60, "pro": 600})
+
+    assert await limiter._limit_for("pro-key-000") == 600
+    assert await limiter._limit_for("free-key-00") == 60
+    assert await limiter._limit_for("no-plan-key") == 10
+    assert await limiter._limit_for("anonymous") == 10
+    assert await limiter._limit_for("pro-key-000") == 600
+    assert await limiter._limit_for("no-plan-key") == 10
+    assert lookups == ["pro-key-000", "free-key-00", "no-plan-key"]
+
+
+@pytest.mark.asyncio
+async def test_unverified_keys_get_the_default_without_a_lookup(
+    monkeypatch, verified_keys
+):
+    """Test made-up keys never reach the database, until verified."""
+    lookups = []
+
+    async def lookup(self, api_key):
+        lookups.append(api_key)
+        return "pro"
+
+    monkeypatch.setattr(RateLimiter, "_lookup_plan", lookup)
+    limiter = RateLimiter(requests_per_minute=10, plan_limits={"pro": 600})
+
+    for i in range(100):
+        assert await limiter._limit_for(f"made-up-key-{i}") == 10
+    assert lookups == []
+
+    verified_keys("made-up-key-0")
+    assert await limiter._limit_for("made-up-key-0") == 600
+    assert lookups == ["made-up-key-0"]
+
+
+@pytest.mark.asyncio
+async def test_keys_are_stored_hashed(redis_client, monkeypatch, verified_keys):
+    """Test neither Redis nor the plan cache ever holds a plaintext key."""
+
+    async def lookup(self, api_key):
+        return "pro"
+
+    monkeypatch.setattr(RateLimiter, "_lookup_plan", lookup)
+    verified_keys("secret-key-0")
+    limiter = RateLimiter(requests_per_minute=10, plan_limits={"pro": 600})
+
+    assert (await limiter.check("secret-key-0"))[:2] == (True, 600)
+    await limiter.check(None)
+
+    key_hash = APIKey.hash_key("secret-key-0")
+    assert set(redis_client.data) == {
+        f"ratelimit:{key_hash}",
+        "ratelimit:anonymous",
+    }
+    assert limiter.plans.get(key_hash) == "pro"
+    assert limiter.plans.get("secret-key-0") is None
+
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: None)
+    await limiter.check("secret-key-0")
+    assert list(limiter.local_limiter._tats) == [key_hash]
@@ -0,0 +1,20 @@
+"""Tests for the shared Redis pool and its users."""
+
+import pytest
+
+from app.core import redis_pool
+from app.core.config import settings
+
+
+@pytest.mark.asyncio
+async def test_pool_is_created_once_and_closed(monkeypatch):
+    """Test startup creates one bounded pool and shutdown releases it."""
+    monkeypatch.setattr(settings, "REDIS_MAX_CONNECTIONS", 7)
+    client = await redis_pool.init_redis()
+    try:
+        assert await redis_pool.init_redis() is client
+        assert redis_pool.get_redis() is client
+        assert client.connection_pool.max_connections == 7
+    finally:
+        await redis_pool.close_redis()
+    assert redis_pool.get_redis() is None
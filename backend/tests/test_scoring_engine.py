@@ -1,6 +1,7 @@
 """Tests for scoring engine."""
 
-from app.services.scoring_engine import ScoringEngine
+from app.services import parser_backends, scoring_engine
+from app.services.scoring_engine import ScoringEngine, scorer_fingerprint
 
 
 def test_score_basic_content():
@@ -59,3 +60,19 @@ def test_gap_generation():
     # Should have gaps
     assert len(result["gaps"]) > 0
     assert all("category" in gap for gap in result["gaps"])
+
+
+def test_fingerprint_follows_the_resolved_parser(monkeypatch):
+    """Test each backend, and commonmark without markdown-it, key results apart."""
+    fingerprints = {}
+    for backend in ("standard", "fast", "commonmark"):
+        monkeypatch.setattr(scoring_engine.settings, "CONTENT_PARSER_BACKEND", backend)
+        scorer_fingerprint.cache_clear()
+        fingerprints[backend] = scorer_fingerprint()
+    monkeypatch.setattr(parser_backends, "MARKDOWN_IT_AVAILABLE", False)
+    scorer_fingerprint.cache_clear()
+    fallback = scorer_fingerprint()
+    scorer_fingerprint.cache_clear()
+
+    assert len(set(fingerprints.values())) == 3
+    assert fallback == fingerprints["fast"]
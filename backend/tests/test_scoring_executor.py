@@ -0,0 +1,109 @@
+"""Tests for the scoring executor."""
+
+import asyncio
+
+import pytest
+
+from app.core.errors import ScoringUnavailableError
+from app.services.content_parser import ContentParser
+from app.services.scoring_engine import ScoringEngine
+from app.services import scoring_executor as executor_module
+from app.services.scoring_executor import ScoringExecutor
+
+CONTENT = """# What is AIEO?
+
+AIEO is a method for structuring content. According to research, 45% of
+answers cite structured pages.
+
+## How do I start?
+
+1. Audit the page
+2. Apply the fixes
+"""
+
+
+@pytest.mark.asyncio
+async def test_thread_executor_matches_engine():
+    """Test in-process scoring returns the engine result."""
+    executor = ScoringExecutor(pool_size=0, queue_depth=1)
+    try:
+        result = await executor.score(CONTENT)
+    finally:
+        executor.shutdown()
+
+    assert result == ScoringEngine().score(CONTENT)
+
+
+@pytest.mark.asyncio
+async def test_process_executor_matches_engine():
+    """Test worker processes score raw content and parsed documents."""
+    expected = ScoringEngine().score(CONTENT)
+    document = ContentParser().parse(CONTENT)
+
+    executor = ScoringExecutor(pool_size=1, max_tasks_per_child=1, queue_depth=2)
+    try:
+        await executor.start()
+        results = await asyncio.gather(
+            executor.score(CONTENT), executor.score_document(document)
+        )
+    finally:
+        executor.shutdown()
+
+    assert results == [expected, expected]
+    assert executor.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_executor_rejects_when_saturated():
+    """Test jobs beyond pool size plus queue depth get a 503."""
+    executor = ScoringExecutor(pool_size=0, queue_depth=1)
+    try:
+        jobs = [executor.score(CONTENT) for _ in range(3)]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+    finally:
+        executor.shutdown()
+
+    errors = [r for r in results if isinstance(r, ScoringUnavailableError)]
+    assert len(errors) == 1
+    assert errors[0].status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_batched_documents_share_one_ner_pass(monkeypatch):
+    """Test documents submitted together are scored by one job, NER at once."""
+    extractor = executor_module._get_engine().entity_extractor
+    calls = []
+    extract_many = extractor.extract_many
+
+    def spy(texts):
+        texts = list(texts)
+        calls.append(len(texts))
+        return extract_many(texts)
+
+    monkeypatch.setattr(extractor, "extract_many", spy)
+    contents = [CONTENT, "# Pricing\n\nAcme costs $10.", "No entities here."]
+    document = ContentParser().parse(contents[2])
+
+    executor = ScoringExecutor(pool_size=0, queue_depth=1, batch_window=0.05)
+    try:
+        results = await asyncio.gather(
+            executor.score_batched(contents[0]),
+            executor.score_batched(contents[1], "markdown"),
+            executor.score_batched(document=document),
+        )
+    finally:
+        executor.shutdown()
+
+    assert calls == [3]
+    assert results == [ScoringEngine().score(content) for content in contents]
+    assert executor.in_flight == 0
+
+
+def test_workers_run_spacy_in_process(monkeypatch):
+    """Test NER_N_PROCESS does not make pool workers start processes."""
+    monkeypatch.setattr(executor_module.settings, "ENTITY_DETECTOR", "spacy")
+    monkeypatch.setattr(executor_module.settings, "NER_N_PROCESS", 4)
+
+    engine = executor_module._create_engine()
+
+    assert engine.entity_extractor.n_process == 1
@@ -0,0 +1,63 @@
+"""Tests for the incremental HTML parser."""
+
+from app.services import scoring_executor as executor_module
+from app.services.content_parser import ContentParser
+from app.services.scoring_engine import ScoringEngine
+from app.services.streaming_parser import StreamingHTMLParser
+
+CONTENT = """<!DOCTYPE html><html><head><title>T</title>
+<script>var a = "<h1>no</h1>";</script></head><body>
+<!-- comment --><h2>Second</h2><h1>First <a href="/x">link &amp; more</a></h1>
+<table><tr><th>A</th><td>B<table><tr><td>inner</td></tr></table></td></tr></table>
+<ul><li>one<ol><li>nested</li></ol></li><li>two</li></ul>
+<p>Text<!-- c -->tail</p><template><h3>hidden</h3></template>
+</body></html>"""
+
+
+def test_streaming_matches_full_parse():
+    """Test chunked parsing gives the same document at any chunk size."""
+    expected = ContentParser(backend="fast").parse(CONTENT, format="html")
+
+    for size in (1, 7, 64, len(CONTENT)):
+        parser = StreamingHTMLParser()
+        for start in range(0, len(CONTENT), size):
+            parser.feed(CONTENT[start : start + size])
+        result = parser.close()
+
+        assert result.to_dict() == expected.to_dict()
+
+
+def test_streaming_empty_document():
+    """Test closing a parser that was never fed."""
+    result = StreamingHTMLParser().close()
+
+    assert result.text == ""
+    assert result.word_count == 0
+    assert result.content_hash == ContentParser()._hash_content("")
+
+
+def test_fetched_pages_follow_the_parser_backend(monkeypatch):
+    """Test only the lxml backends stream, so standard keeps its repairs."""
+    html = "<ul><li>a<li>b</ul><table><tr><td>a<td>b<tr><td>c</table>"
+    body = html.encode("utf-8")
+
+    for backend in ("standard", "fast", "commonmark"):
+        monkeypatch.setattr(
+            executor_module, "_engine", ScoringEngine.__new__(ScoringEngine)
+        )
+        executor_module._engine.parser = ContentParser(backend=backend)
+        expected = ContentParser(backend=backend).parse(html, format="html")
+
+        assert executor_module._parse_html(body, "utf-8").to_dict() == (
+            expected.to_dict()
+        )
+
+    # html.parser nests the unclosed items; lxml closes them
+    assert ContentParser().parse(html, format="html").lists[0]["items"] == [
+        "ab",
+        "b",
+    ]
+    assert ContentParser(backend="fast").parse(html, "html").lists[0]["items"] == [
+        "a",
+        "b",
+    ]
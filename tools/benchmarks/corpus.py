@@ -0,0 +1,88 @@
+"""
+Synthetic document corpus for AIEO benchmarks.
+
+Documents mix prose with the structures the scoring engine looks for
+(headers, tables, lists, links, questions, dates) so every code path
+is exercised. Generation is seeded, so runs are reproducible.
+"""
+
+import random
+
+WORDS = (
+    "the of and to in is a that for it as with was on are by this be from at or an "
+    "according research study source references version updated essential "
+    "significantly crucially means refers defined compare versus better worse "
+    "difference step first second third python openai claude january march 2023 "
+    "2024 v1.2 what how why however but moreover content engine citation model "
+    "table list header data results"
+).split()
+
+
+def paragraph(rng: random.Random, words: int) -> str:
+    """Generate a paragraph of pseudo-random words."""
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text.capitalize().replace(" what ", " What is it? ") + "."
+
+
+def markdown_document(words: int = 2000, seed: int = 7) -> str:
+    """Generate a markdown document of roughly the given word count."""
+    rng = random.Random(seed)
+    parts = []
+    section = 0
+    count = 0
+    while count < words:
+        section += 1
+        parts.append(f"## Section {section}: Why does it matter?\n")
+        parts.append(paragraph(rng, 120) + "\n")
+        count += 120
+        if section % 3 == 0:
+            parts.append("| Tool | Score |\n|------|-------|\n| A vs B | 1 |\n| C | 2 |\n")
+        if section % 4 == 0:
+            parts.append(
+                "1. Step 1 install\n2. Step 2 configure\n"
+                "3. Read [the docs](https://example.com/docs)\n"
+            )
+        if section % 5 == 0:
+            parts.append("- **Term** is a thing\n- According to research by MIT\n")
+        parts.append("")
+    return "\n".join(parts)
+
+
+def html_document(words: int = 2000, seed: int = 7) -> str:
+    """Generate an HTML page of roughly the given word count."""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html><head><title>Benchmark page</title>",
+        "<style>body { margin: 0 }</style><script>var x = 1;</script></head><body>",
+        "<nav><ul><li><a href='/'>Home</a></li><li><a href='/about'>About</a></li></ul></nav>",
+    ]
+    section = 0
+    count = 0
+    while count < words:
+        section += 1
+        parts.append(f"<h2>Section {section}: Why does it matter?</h2>")
+        parts.append(f"<p>{paragraph(rng, 120)} <!-- note --></p>")
+        count += 120
+        if section % 3 == 0:
+            parts.append(
+                "<table><tr><th>Tool</th><th>Score</th></tr>"
+                "<tr><td>A vs B</td><td>1</td></tr></table>"
+            )
+        if section % 4 == 0:
+            parts.append(
+                "<ol><li>Step 1 install</li><li>Step 2 "
+                "<a href='https://example.com/docs'>configure</a></li></ol>"
+            )
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def corpus(count: int = 20, words: int = 2000) -> list:
+    """Generate (content, format) pairs alternating markdown and HTML."""
+    docs = []
+    for i in range(count):
+        if i % 2 == 0:
+            docs.append((markdown_document(words, seed=i), "markdown"))
+        else:
+            docs.append((html_document(words, seed=i), "html"))
+    return docs
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Calibrate the heuristic entity detector against spaCy NER.
+
+Reports per-document latency of both detectors, how closely the heuristic
+unique-entity counts track spaCy's, precision/recall of the entity strings
+(taking spaCy as the reference) and agreement of the entity density score.
+Requires the spaCy model (python -m spacy download en_core_web_sm).
+
+Usage:
+    python tools/benchmarks/entity_calibration.py [--docs 20] [--words 2000]
+    python tools/benchmarks/entity_calibration.py --dir path/to/pages
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "backend"))
+
+from app.services.content_parser import ContentParser  # noqa: E402
+from app.services.entity_extractor import (  # noqa: E402
+    HeuristicEntityExtractor,
+    SpacyEntityExtractor,
+)
+from app.services.scoring_engine import ScoringEngine  # noqa: E402
+
+from corpus import corpus  # noqa: E402
+
+FORMATS = {".md": "markdown", ".markdown": "markdown", ".html": "html", ".htm": "html"}
+
+
+def load_dir(path: Path) -> list:
+    """Load markdown and HTML files as (content, format) pairs."""
+    return [
+        (file.read_text(encoding="utf-8", errors="replace"), FORMATS[file.suffix])
+        for file in sorted(path.rglob("*"))
+        if file.suffix in FORMATS
+    ]
+
+
+def timed_extract(extractor, texts: list):
+    """Extract entities one document at a time, returning ms per document."""
+    start = time.perf_counter()
+    results = [extractor.extract(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    return results, elapsed * 1000 / len(texts)
+
+
+def density_scores(extractor, documents: list) -> list:
+    """Entity density pattern scores of each document with an extractor."""
+    engine = ScoringEngine(entity_extractor=extractor)
+    scores = []
+    for document in documents:
+        document.entities = None
+        scores.append(engine._score_entity_density(document))
+    return scores
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--docs", type=int, default=20)
+    arg_parser.add_argument("--words", type=int, default=2000)
+    arg_parser.add_argument("--dir", type=Path, help="Sample pages (.md/.html)")
+    args = arg_parser.parse_args()
+
+    spacy_extractor = SpacyEntityExtractor()
+    if not spacy_extractor.available:
+        print("spaCy model not available; run: python -m spacy download en_core_web_sm")
+        sys.exit(1)
+    heuristic = HeuristicEntityExtractor()
+
+    docs = load_dir(args.dir) if args.dir else corpus(args.docs, args.words)
+    parser = ContentParser()
+    documents = [parser.parse(content, fmt) for content, fmt in docs]
+    texts = [document.text for document in documents]
+    print(f"Corpus: {len(documents)} documents")
+    print("-" * 60)
+
+    reference, spacy_ms = timed_extract(spacy_extractor, texts)
+    detected, heuristic_ms = timed_extract(heuristic, texts)
+    print(f"{'spacy':<12} {spacy_ms:>10.2f} ms/doc")
+    print(f"{'heuristic':<12} {heuristic_ms:>10.2f} ms/doc")
+    print(f"{'speedup':<12} {spacy_ms / heuristic_ms:>10.1f}x")
+    print("-" * 60)
+
+    spacy_counts = [len(set(entities)) for entities in reference]
+    heuristic_counts = [len(set(entities)) for entities in detected]
+    errors = [abs(a - b) for a, b in zip(spacy_counts, heuristic_counts)]
+    print(f"unique entities/doc   spacy {statistics.mean(spacy_counts):.1f}")
+    print(f"                      heuristic {statistics.mean(heuristic_counts):.1f}")
+    print(f"mean absolute error   {statistics.mean(errors):.1f}")
+    if len(documents) > 1 and len(set(spacy_counts)) > 1:
+        correlation = statistics.correlation(spacy_counts, heuristic_counts)
+        print(f"count correlation     {correlation:.3f}")
+
+    true_positives = sum(len(set(a) & set(b)) for a, b in zip(reference, detected))
+    precision = true_positives / max(sum(heuristic_counts), 1)
+    recall = true_positives / max(sum(spacy_counts), 1)
+    f1 = 2 * precision * recall / max(precision + recall, 1e-9)
+    print(f"precision / recall    {precision:.3f} / {recall:.3f} (F1 {f1:.3f})")
+    print("-" * 60)
+
+    spacy_scores = density_scores(spacy_extractor, documents)
+    heuristic_scores = density_scores(heuristic, documents)
+    score_errors = [
+        abs(a["score"] - b["score"]) for a, b in zip(spacy_scores, heuristic_scores)
+    ]
+    agreement = sum(
+        a["detected"] == b["detected"] for a, b in zip(spacy_scores, heuristic_scores)
+    ) / len(documents)
+    print(f"density score error   {statistics.mean(score_errors):.2f} / 15 (mean)")
+    print(f"                      {max(score_errors):.2f} / 15 (max)")
+    print(f"detected agreement    {agreement:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the overhead of the API middleware stack.
+
+Serves `/` and `/api/v1/aieo/patterns` in process through an ASGI
+transport, once from a bare app and once behind the middleware of
+app.main (timing, logging and rate limiting, then CORS), and reports
+requests per second and the added time per request. Log lines are
+formatted and written to the null device; rate limits are decided by the
+in-process limiter, with a limit no request reaches.
+
+Usage:
+    python tools/benchmarks/middleware.py [--requests 5000] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "backend"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+
+from app.api.v1 import patterns  # noqa: E402
+from app.core import rate_limit  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.middleware import RequestMiddleware  # noqa: E402
+from app.core.rate_limit import RateLimiter  # noqa: E402
+
+ENDPOINTS = ["/", settings.API_V1_PREFIX + "/aieo/patterns"]
+
+
+def build_app(with_middleware: bool) -> FastAPI:
+    """The benchmarked endpoints, with or without the middleware stack."""
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {
+            "message": "AIEO API",
+            "version": settings.APP_VERSION,
+            "docs": "/docs",
+        }
+
+    app.include_router(patterns.router, prefix=settings.API_V1_PREFIX)
+
+    if with_middleware:
+        app.add_middleware(
+            RequestMiddleware,
+            rate_limiter=RateLimiter(requests_per_minute=10**9, plan_limits={}),
+        )
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=settings.CORS_ORIGINS,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    """Seconds to serve the requests."""
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 5000))
+    headers = {"X-API-Key": "benchmark-api-key", "Origin": "http://localhost:3000"}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers
+    ) as client:
+        # Warm up routing and dependency caches
+        for _ in range(50):
+            (await client.get(path)).raise_for_status()
+
+        async def worker(count: int):
+            for _ in range(count):
+                (await client.get(path)).raise_for_status()
+
+        share, extra = divmod(requests, concurrency)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(share + (i < extra)) for i in range(concurrency)))
+        return time.perf_counter() - start
+
+
+async def run(args):
+    bare = build_app(with_middleware=False)
+    stacked = build_app(with_middleware=True)
+
+    print(f"{args.requests} requests per run, concurrency {args.concurrency}")
+    print("-" * 72)
+    print(
+        f"{'endpoint':<24} {'bare req/s':>11} {'stack req/s':>12} "
+        f"{'overhead/req':>13} {'slowdown':>9}"
+    )
+    for path in ENDPOINTS:
+        # Best of the repeats, for each app
+        best = []
+        for app in (bare, stacked):
+            runs = []
+            for _ in range(args.repeat):
+                runs.append(await measure(app, path, args.requests, args.concurrency))
+            best.append(min(runs))
+        bare_seconds, stack_seconds = best
+        overhead_us = (stack_seconds - bare_seconds) / args.requests * 1e6
+        print(
+            f"{path:<24} {args.requests / bare_seconds:>11.0f} "
+            f"{args.requests / stack_seconds:>12.0f} "
+            f"{overhead_us:>11.1f}us {stack_seconds / bare_seconds:>8.2f}x"
+        )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--requests", type=int, default=5000)
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    # Log as the app does, to the null device
+    handler = logging.FileHandler(os.devnull)
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+    logger = logging.getLogger("aieo")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    # No Redis: the in-process limiter decides
+    rate_limit.get_redis = lambda: None
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark ContentParser backends side by side.
+
+Reports documents per second for each backend and checks that the
+extracted text, headers, tables, lists and links are equivalent.
+
+Usage:
+    python tools/benchmarks/parser_backends.py [--docs 20] [--words 5000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "backend"))
+
+from app.services.parser_backends import PARSER_BACKENDS  # noqa: E402
+from app.services.content_parser import ContentParser  # noqa: E402
+
+from corpus import corpus  # noqa: E402
+
+FIELDS = ("text", "headers", "tables", "lists", "links", "word_count")
+
+
+def run(parser: ContentParser, docs: list, rounds: int):
+    """Parse every document, returning results and documents per second."""
+    results = [parser.parse(content, fmt) for content, fmt in docs]  # warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content, fmt in docs:
+            parser.parse(content, fmt)
+    elapsed = time.perf_counter() - start
+    return results, (len(docs) * rounds) / elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--docs", type=int, default=20)
+    arg_parser.add_argument("--words", type=int, default=5000)
+    arg_parser.add_argument("--rounds", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    docs = corpus(args.docs, args.words)
+    print(f"Corpus: {len(docs)} documents, ~{args.words} words each")
+    print("-" * 60)
+
+    print(f"{'backend':<12} {'markdown':>14} {'html':>14}")
+    outputs = {}
+    for name in PARSER_BACKENDS:
+        parser = ContentParser(backend=name)
+        outputs[name] = []
+        rates = []
+        for fmt in ("markdown", "html"):
+            subset = [doc for doc in docs if doc[1] == fmt]
+            results, docs_per_second = run(parser, subset, args.rounds)
+            outputs[name].extend(results)
+            rates.append(f"{docs_per_second:.1f} docs/s")
+        print(f"{name:<12} {rates[0]:>14} {rates[1]:>14}")
+
+    print("-" * 60)
+    baseline, *others = PARSER_BACKENDS
+    for name in others:
+        for field in FIELDS:
+            mismatches = sum(
+                1
+                for a, b in zip(outputs[baseline], outputs[name])
+                if a[field] != b[field]
+            )
+            status = "equivalent" if mismatches == 0 else f"{mismatches} differ"
+            print(f"{name} vs {baseline} {field:<12} {status}")
+
+
+if __name__ == "__main__":
+    main()